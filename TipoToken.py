@@ -47,5 +47,12 @@ class TipoToken:
     # Outros
     EOF = "EOF"
     UNKNOWN = "UNKNOWN"
+    ERRO = "ERRO"               # token com erro léxico (saída do léxico)
+
+
+# Código inteiro de cada tipo de token (cabe em um byte), usado pelas
+# representações compactas de tokens. TIPOS[codigo] volta para o nome.
+TIPOS = [valor for nome, valor in vars(TipoToken).items() if not nome.startswith('_')]
+CODIGOS = {tipo: codigo for codigo, tipo in enumerate(TIPOS)}
 
 # Nota: PALAVRAS_CHAVE foi movido para reserved_words.py para centralização
\ No newline at end of file
@@ -1,186 +1,323 @@
-import re
+import codecs
+from array import array
 from TipoToken import TipoToken
 from reserved_words import reserved_words
 
-class AFD:
-    def __init__(self):
-        # Estados do AFD baseados no seu código
-        self.ESTADO_INICIAL = "q0"
-        self.estado_atual = "q0"
-
-        # Tabela de transições baseada no seu padrão
-        self.transitions = {
-            # Delimitadores - reconhece imediatamente
-            ('q0', re.compile(r'^\($')): 'q0',
-            ('q0', re.compile(r'^\)$')): 'q0',
-            ('q0', re.compile(r'^\{$')): 'q0',
-            ('q0', re.compile(r'^\}$')): 'q0',
-            ('q0', re.compile(r'^;$')): 'q0',
-            ('q0', re.compile(r'^:$')): 'q0',
-            ('q0', re.compile(r'^,$')): 'q0',            
-            ('q0', re.compile(r'^\*$')): 'q0',
-            ('q0', re.compile(r'^\/$')): 'q0',
-            ('q0', re.compile(r'^\+$')): 'q0',
-
-            # Operador - (seta ->)
-            ('q0', re.compile(r'^-$')): 'q1',
-            ('q1', re.compile(r'^>$')): 'q0',
-            ('q1', re.compile(r'^.$')): 'q0',
-
-            # Operador ! e !=
-            ('q0', re.compile(r'^!$')): 'q2',
-            ('q2', re.compile(r'^=$')): 'q0',
-            ('q2', re.compile(r'^.$')): 'q0',
-
-            # Operador = e ==
-            ('q0', re.compile(r'^=$')): 'q3',
-            ('q3', re.compile(r'^=$')): 'q0',
-            ('q3', re.compile(r'^.$')): 'q0',
-
-            # Operador < e <=
-            ('q0', re.compile(r'^<$')): 'q4',
-            ('q4', re.compile(r'^=$')): 'q0',
-            ('q4', re.compile(r'^.$')): 'q0',
-
-            # Operador > e >=
-            ('q0', re.compile(r'^>$')): 'q5',
-            ('q5', re.compile(r'^=$')): 'q0',
-            ('q5', re.compile(r'^.$')): 'q0',
-
-            # Identificadores
-            ('q0', re.compile(r'^[A-Za-z_]$')): 'q6',
-            ('q6', re.compile(r'^[A-Za-z0-9_]$')): 'q6',
-            ('q6', re.compile(r'^.$')): 'q0',
-
-            # Números inteiros
-            ('q0', re.compile(r'^[0-9]$')): 'q7',
-            ('q7', re.compile(r'^[0-9]$')): 'q7',
-            ('q7', re.compile(r'[^.]$')): 'q0',
-
-            # Números decimais
-            ('q7', re.compile(r'^.$')): 'q8',
-            ('q8', re.compile(r'^[0-9]$')): 'q9',
-            ('q9', re.compile(r'^[0-9]$')): 'q9',
-            ('q9', re.compile(r'^.$')): 'q0',
-
-            # Char literal
-            ('q0', re.compile(r"^'$")): 'q10',
-            ('q10', re.compile(r'^.$', re.DOTALL)): 'q11',
-            ('q11', re.compile(r"^'$")): 'q0',
-
-            # String
-            ('q0', re.compile(r'^\"')): 'q12',
-            ('q12', re.compile(r'^[^"]*')): 'q12',
-            ('q12', re.compile(r'^\"')): 'q0' 
-        }
-
-        # Mapeamento de estados finais para tipos de token
-        self.finish_states = {
-            'q0': {
-                '(': TipoToken.LBRACKET,
-                ')': TipoToken.RBRACKET,
-                '{': TipoToken.LBRACE,
-                '}': TipoToken.RBRACE,
-                ';': TipoToken.SEMICOLON,
-                ':': TipoToken.COLON,
-                ',': TipoToken.COMMA,
-                '+': TipoToken.PLUS,
-                '*': TipoToken.MULT,
-                '/': TipoToken.DIV,
-                '"': TipoToken.FMT_STRING,
-                "'": TipoToken.CHAR_LITERAL
-            },
-            'q1': TipoToken.MINUS,
-            'q3': TipoToken.ASSIGN,
-            'q4': TipoToken.LT,
-            'q5': TipoToken.GT,
-            'q6': TipoToken.ID,
-            'q7': TipoToken.INT_CONST,
-            'q8': TipoToken.UNKNOWN,
-            'q9': TipoToken.FLOAT_CONST,
-            'q11': TipoToken.CHAR_LITERAL,
-            'q12': TipoToken.FMT_STRING
-        }
-
-        # Tokens de dois caracteres
-        self.two_char_tokens = {
-            '->': TipoToken.ARROW,
-            '!=': TipoToken.NE,
-            '==': TipoToken.EQ,
-            '<=': TipoToken.LE,
-            '>=': TipoToken.GE
-        }
-
-    def reset(self):
-        """Reseta o AFD para o estado inicial"""
-        self.estado_atual = self.ESTADO_INICIAL
-
-    def processar_caractere(self, char):
-        """Processa um caractere e retorna o próximo estado"""
-        for (current_state, regex_pattern), next_state in self.transitions.items():
-            if self.estado_atual == current_state and regex_pattern.match(str(char)):
-                self.estado_atual = next_state
-                return self.estado_atual
-        return self.estado_atual
-
-
-    def obter_tipo_token(self, lexema):
-        """Determina o tipo do token baseado no estado atual e no lexema"""
-        # Primeiro verifica tokens de dois caracteres
-        if lexema in self.two_char_tokens:
-            return self.two_char_tokens[lexema]
-
-        # Verifica tokens de um caractere no estado q0
-        if self.estado_atual == 'q0' and len(lexema) == 1:
-            if lexema in self.finish_states['q0']:
-                return self.finish_states['q0'][lexema]
-        
-        if re.fullmatch(r"'(.)'", lexema):
-            return TipoToken.CHAR_LITERAL
-        
-        # Verifica outros estados
-        if self.estado_atual in self.finish_states:
-            tipo_base = self.finish_states[self.estado_atual]
-
-            if isinstance(tipo_base, dict):
-                if lexema in tipo_base:
-                    return tipo_base[lexema]
-            elif tipo_base == TipoToken.FMT_STRING and self.estado_atual == 'q0' and lexema.startswith('"') and lexema.endswith('"'):
-                 return TipoToken.FMT_STRING
-            elif isinstance(tipo_base, str):
-                # Para identificadores, verifica se é palavra-chave
-                if tipo_base == TipoToken.ID:
-                    return reserved_words.get(lexema, TipoToken.ID)
-                return tipo_base
 
+# ---------------------------------------------------------------------------
+# AFD de varredura (tabela densa estado × classe de caractere)
+# ---------------------------------------------------------------------------
 
-        return TipoToken.UNKNOWN
+# Classes de caracteres: todos os caracteres de uma mesma classe têm
+# exatamente as mesmas transições, então a tabela só precisa de uma coluna
+# por classe em vez de uma por caractere.
+CLASSES = [
+    'LETRA', 'DIGITO', 'PONTO', 'ESPACO', 'NOVA_LINHA',
+    '(', ')', '{', '}', ';', ':', ',',
+    '+', '-', '*', '/', '=', '!', '<', '>',
+    "'", '"', 'OUTRO'
+]
+NUM_CLASSES = len(CLASSES)
+CLASSE_OUTRO = CLASSES.index('OUTRO')
+
+# Estado morto: não existe transição, o token termina antes deste caractere
+ESTADO_MORTO = 0xFFFF
+
+# Tipo interno usado para espaços em branco (nunca vira token)
+ESPACO = "ESPACO"
+
+
+def _montar_classes_ascii():
+    """Mapeia cada caractere ASCII (0-127) para o índice de sua classe"""
+    classes = bytearray([CLASSE_OUTRO] * 128)
+    for codigo in range(128):
+        char = chr(codigo)
+        if char.isalpha() or char == '_':
+            nome = 'LETRA'
+        elif char.isdigit():
+            nome = 'DIGITO'
+        elif char == '.':
+            nome = 'PONTO'
+        elif char == '\n':
+            nome = 'NOVA_LINHA'
+        elif char.isspace():
+            nome = 'ESPACO'
+        elif char in CLASSES:
+            nome = char
+        else:
+            continue
+        classes[codigo] = CLASSES.index(nome)
+    return bytes(classes)
+
+
+CLASSES_ASCII = _montar_classes_ascii()
+
+# Transições do AFD de varredura: (estado, classe) -> próximo estado.
+# Toda combinação ausente leva ao estado morto.
+TRANSICOES_VARREDURA = {
+    # Espaços em branco (agrupados num único lexema ignorado)
+    ('q0', 'ESPACO'): 'q30',
+    ('q0', 'NOVA_LINHA'): 'q30',
+    ('q30', 'ESPACO'): 'q30',
+    ('q30', 'NOVA_LINHA'): 'q30',
+
+    # Delimitadores e operadores de um caractere
+    ('q0', '('): 'q13',
+    ('q0', ')'): 'q14',
+    ('q0', '{'): 'q15',
+    ('q0', '}'): 'q16',
+    ('q0', ';'): 'q17',
+    ('q0', ':'): 'q18',
+    ('q0', ','): 'q19',
+    ('q0', '+'): 'q20',
+    ('q0', '*'): 'q21',
+    ('q0', '/'): 'q22',
+
+    # Operador - e seta ->
+    ('q0', '-'): 'q1',
+    ('q1', '>'): 'q23',
+
+    # Operador !=  (! sozinho não é token)
+    ('q0', '!'): 'q2',
+    ('q2', '='): 'q24',
+
+    # Operador = e ==
+    ('q0', '='): 'q3',
+    ('q3', '='): 'q25',
+
+    # Operador < e <=
+    ('q0', '<'): 'q4',
+    ('q4', '='): 'q26',
+
+    # Operador > e >=
+    ('q0', '>'): 'q5',
+    ('q5', '='): 'q27',
+
+    # Identificadores
+    ('q0', 'LETRA'): 'q6',
+    ('q6', 'LETRA'): 'q6',
+    ('q6', 'DIGITO'): 'q6',
+
+    # Números inteiros e decimais
+    ('q0', 'DIGITO'): 'q7',
+    ('q7', 'DIGITO'): 'q7',
+    ('q7', 'PONTO'): 'q8',
+    ('q8', 'DIGITO'): 'q9',
+    ('q9', 'DIGITO'): 'q9',
+
+    # Char literal: '' , 'a' e 'a sem fechamento
+    ('q0', "'"): 'q10',
+    ('q10', "'"): 'q28',
+    ('q11', "'"): 'q28',
+
+    # String: tudo até a próxima aspas (aceita sem fechamento, como antes)
+    ('q0', '"'): 'q12',
+    ('q12', '"'): 'q29',
+}
+
+# q10 aceita qualquer caractere como conteúdo do char e q12 qualquer
+# caractere diferente de aspas como conteúdo da string
+for _classe in CLASSES:
+    if _classe != "'":
+        TRANSICOES_VARREDURA[('q10', _classe)] = 'q11'
+    if _classe != '"':
+        TRANSICOES_VARREDURA[('q12', _classe)] = 'q12'
+
+# Estados de aceitação e o tipo de token que cada um reconhece
+ESTADOS_FINAIS = {
+    'q1': TipoToken.MINUS,
+    'q3': TipoToken.ASSIGN,
+    'q4': TipoToken.LT,
+    'q5': TipoToken.GT,
+    'q6': TipoToken.ID,
+    'q7': TipoToken.INT_CONST,
+    'q8': TipoToken.UNKNOWN,        # "12." é reconhecido inteiro, mas é erro
+    'q9': TipoToken.FLOAT_CONST,
+    'q11': TipoToken.CHAR_LITERAL,
+    'q12': TipoToken.FMT_STRING,
+    'q13': TipoToken.LBRACKET,
+    'q14': TipoToken.RBRACKET,
+    'q15': TipoToken.LBRACE,
+    'q16': TipoToken.RBRACE,
+    'q17': TipoToken.SEMICOLON,
+    'q18': TipoToken.COLON,
+    'q19': TipoToken.COMMA,
+    'q20': TipoToken.PLUS,
+    'q21': TipoToken.MULT,
+    'q22': TipoToken.DIV,
+    'q23': TipoToken.ARROW,
+    'q24': TipoToken.NE,
+    'q25': TipoToken.EQ,
+    'q26': TipoToken.LE,
+    'q27': TipoToken.GE,
+    'q28': TipoToken.CHAR_LITERAL,
+    'q29': TipoToken.FMT_STRING,
+    'q30': ESPACO,
+}
+
+
+class TabelaAFD:
+    """Tabela de transições compilada: estados e classes viram inteiros"""
+
+    def __init__(self, transicoes, finais, inicial='q0'):
+        nomes = [inicial]
+        for (origem, _), destino in transicoes.items():
+            for estado in (origem, destino):
+                if estado not in nomes:
+                    nomes.append(estado)
+
+        self.nomes = nomes
+        self.indices = {nome: i for i, nome in enumerate(nomes)}
+        self.inicial = self.indices[inicial]
+
+        # linha do estado i ocupa tabela[i * NUM_CLASSES : (i + 1) * NUM_CLASSES]
+        self.tabela = array('H', [ESTADO_MORTO] * (len(nomes) * NUM_CLASSES))
+        for (origem, classe), destino in transicoes.items():
+            pos = self.indices[origem] * NUM_CLASSES + CLASSES.index(classe)
+            self.tabela[pos] = self.indices[destino]
+
+        # tipo reconhecido por estado (None = estado não final)
+        self.aceita = [finais.get(nome) for nome in nomes]
+
+    def reconhecer(self, codigo, inicio):
+        """Casa o maior lexema possível a partir de 'inicio'.
+
+        Retorna (tipo, fim). Se nenhum prefixo é aceito, consome um único
+        caractere e retorna TipoToken.UNKNOWN.
+        """
+        tabela = self.tabela
+        aceita = self.aceita
+        classes = CLASSES_ASCII
+        tamanho = len(codigo)
+
+        estado = self.inicial
+        tipo = TipoToken.UNKNOWN
+        fim = inicio + 1
+        pos = inicio
 
+        while pos < tamanho:
+            cod = ord(codigo[pos])
+            classe = classes[cod] if cod < 128 else CLASSE_OUTRO
+            estado = tabela[estado * NUM_CLASSES + classe]
+            if estado == ESTADO_MORTO:
+                break
+            pos += 1
+            if aceita[estado] is not None:
+                tipo = aceita[estado]
+                fim = pos
 
-    def eh_estado_final(self, estado=None):
-        """Verifica se um estado é final (pode retornar um token)"""
-        if estado is None:
-            estado = self.estado_atual
+        if tipo == TipoToken.ID:
+            tipo = reserved_words.get(codigo[inicio:fim], TipoToken.ID)
+
+        return tipo, fim
+
+
+# Compilada uma única vez na importação do módulo
+TABELA_VARREDURA = TabelaAFD(TRANSICOES_VARREDURA, ESTADOS_FINAIS)
+
+
+def escanear(codigo):
+    """Varre o código em uma única passada, gerando (tipo, lexema, linha).
+
+    Espaços em branco são descartados; lexemas não reconhecidos saem com
+    tipo TipoToken.UNKNOWN para que o chamador registre o erro. O último
+    token gerado é sempre o EOF.
+    """
+    for tipo, inicio, fim, linha in escanear_posicoes(codigo):
+        yield tipo, codigo[inicio:fim], linha
+
+
+def escanear_posicoes(codigo, posicao=0, linha=1):
+    """Como escanear, mas gera (tipo, inicio, fim, linha) sem recortar o
+    lexema: codigo[inicio:fim] só é criado por quem precisar dele.
+
+    'posicao' e 'linha' permitem recomeçar a varredura no início de um
+    token qualquer (onde o AFD está sempre no estado inicial).
+    """
+    reconhecer = TABELA_VARREDURA.reconhecer
+    tamanho = len(codigo)
+
+    while posicao < tamanho:
+        tipo, fim = reconhecer(codigo, posicao)
+
+        if tipo != ESPACO:
+            yield tipo, posicao, fim, linha
+
+        # só espaços, strings, chars e erros podem conter quebras de linha
+        if tipo in _PODEM_TER_LINHAS:
+            linha += codigo.count('\n', posicao, fim)
+        posicao = fim
+
+    yield TipoToken.EOF, tamanho, tamanho, linha
+
+
+_PODEM_TER_LINHAS = frozenset({
+    ESPACO, TipoToken.FMT_STRING, TipoToken.CHAR_LITERAL, TipoToken.UNKNOWN
+})
+
+
+# Tamanho padrão (em caracteres/bytes) de cada leitura da fonte em fluxo
+TAMANHO_BLOCO = 1 << 16
+
+
+def escanear_arquivo(fonte, tamanho_bloco=TAMANHO_BLOCO):
+    """Versão em fluxo de escanear: lê 'fonte' em blocos sob demanda.
+
+    'fonte' é qualquer objeto com read(n): arquivo de texto, arquivo
+    binário ou mmap (bytes são decodificados como UTF-8 incrementalmente).
+    Só o bloco atual fica em memória; um token que chega ao fim do bloco
+    (string longa, número cortado ao meio...) é reconhecido de novo depois
+    da próxima leitura, então os tokens e linhas são os mesmos de
+    escanear(fonte.read()).
+    """
+    decodificador = codecs.getincrementaldecoder('utf-8')()
+
+    def ler(n):
+        dados = fonte.read(n)
+        acabou = not dados
+        if isinstance(dados, (bytes, bytearray)):
+            dados = decodificador.decode(dados, final=acabou)
+        return dados, acabou
+
+    reconhecer = TABELA_VARREDURA.reconhecer
+    janela, acabou = ler(tamanho_bloco)
+    posicao = 0
+    linha = 1
+
+    while True:
+        if posicao >= len(janela):
+            if acabou:
+                break
+            janela, acabou = ler(tamanho_bloco)
+            posicao = 0
+            continue
+
+        tipo, fim = reconhecer(janela, posicao)
+
+        # Depois de um estado final o AFD só segue por estados finais ou
+        # morre, então um token que termina antes do fim da janela está
+        # completo. Se encostou no fim, pode continuar no próximo bloco.
+        if fim >= len(janela) and not acabou:
+            pendente = janela[posicao:]
+            novo, acabou = ler(max(tamanho_bloco, len(pendente)))
+            janela = pendente + novo
+            posicao = 0
+            continue
+
+        lexema = janela[posicao:fim]
+        if tipo != ESPACO:
+            yield tipo, lexema, linha
+        if tipo in _PODEM_TER_LINHAS:
+            linha += lexema.count('\n')
+        posicao = fim
+
+    yield TipoToken.EOF, "", linha
 
-        estados_finais = ['q0', 'q1', 'q2', 'q3', 'q4', 'q5', 'q6', 'q7', 'q9', 'q10', 'q11']
-        return estado in estados_finais
 
 # Função de compatibilidade com seu código existente
 def returnNextState(token):
-    """Função compatível com seu código existente"""
-    afd = AFD()
-    afd.reset()
-
-    # Simula o processamento do token
-    
-    for char in token:
-        afd.processar_caractere(char)
-    
-        
-        #char
-        
-
-    # Obtém o tipo do token
-    tipo = afd.obter_tipo_token(token)
-    print(f"[DEBUG AFD] Analisando: {repr(token)} -> {tipo}")
-    return tipo    
\ No newline at end of file
+    """Classifica um lexema já isolado usando o AFD de varredura"""
+    tipo, fim = TABELA_VARREDURA.reconhecer(token, 0)
+    if fim != len(token):
+        return TipoToken.UNKNOWN
+    return tipo
@@ -0,0 +1,241 @@
+# arena_ast.py
+#
+# Representação compacta (arena) da AST: em vez de um objeto por nó, os nós
+# ficam em arrays paralelos, numerados em pré-ordem. A subárvore do nó i é
+# o intervalo contíguo [i, i + tamanho), então um passo que percorre a
+# árvore anda pelos arrays quase sempre para frente.
+#
+#   classes[i]      classe do nó (índice em CLASSES)
+#   operadores[i]   código TipoToken do operador (SEM_OPERADOR se não tiver)
+#   linhas[i]       linha
+#   tipos[i]        tipo do valor, ou o de retorno numa FunctionNode
+#                   (índice em nomes_tipo; 0 = None)
+#   valores[i]      nome ou valor literal (índice em constantes; -1 = nenhum)
+#   filhos[inicio_filhos[i]:inicio_filhos[i] + n_filhos[i]]
+#                   índices dos filhos (SEM_NO = filho ausente, como a
+#                   expressão de um comando com erro)
+#
+# As funções ficam em 'raizes' (índice do FunctionNode), com os parâmetros
+# e a tabela de símbolos em 'parametros' e 'tabelas'.
+
+from array import array
+
+from p_ast import (
+    FunctionNode, BlockNode,
+    VarNode, IntConstNode, FloatConstNode, CharConstNode, StringNode,
+    BinaryOpNode, UnaryOpNode, CallNode, AssignNode, PrintNode, ReturnNode,
+    IfNode, WhileNode
+)
+from TipoToken import TIPOS, CODIGOS
+
+CLASSES = [
+    FunctionNode, BlockNode, AssignNode, PrintNode, ReturnNode,
+    IfNode, WhileNode, BinaryOpNode, UnaryOpNode, CallNode,
+    VarNode, IntConstNode, FloatConstNode, CharConstNode, StringNode,
+]
+_CODIGO_CLASSE = {classe: codigo for codigo, classe in enumerate(CLASSES)}
+
+SEM_OPERADOR = 255
+SEM_NO = -1
+
+# atributo guardado em 'valores'
+_VALOR = {
+    FunctionNode: "name", AssignNode: "name", VarNode: "name", CallNode: "name",
+    IntConstNode: "value", FloatConstNode: "value",
+    CharConstNode: "value", StringNode: "value",
+}
+
+# atributo guardado em 'tipos' (nas outras classes, 'type')
+_TIPO = {FunctionNode: "return_type"}
+
+# filhos: tupla = um filho por atributo; str = atributo com lista de filhos
+_FILHOS = {
+    FunctionNode: ("body",),
+    BlockNode: "commands",
+    AssignNode: ("expr",),
+    PrintNode: "args",
+    ReturnNode: ("expr",),
+    BinaryOpNode: ("left", "right"),
+    UnaryOpNode: ("expr",),
+    CallNode: "args",
+    IfNode: ("cond", "then_body", "else_body"),
+    WhileNode: ("cond", "body"),
+}
+
+
+def _filhos(no):
+    atributos = _FILHOS.get(type(no), ())
+    if isinstance(atributos, str):
+        return getattr(no, atributos)
+    return [getattr(no, atributo) for atributo in atributos]
+
+
+class ArenaAST:
+    """AST de um conjunto de funções em arrays paralelos"""
+
+    def __init__(self, funcoes=()):
+        self.classes = array('B')
+        self.operadores = array('B')
+        self.linhas = array('I')
+        self.tipos = array('B')
+        self.valores = array('i')
+        self.inicio_filhos = array('I')
+        self.n_filhos = array('H')
+        self.filhos = array('i')
+
+        self.constantes = []
+        self._indice_constante = {}
+        self.nomes_tipo = [None, "int", "float", "char", "string"]
+        self._indice_tipo = {nome: i for i, nome in enumerate(self.nomes_tipo)}
+
+        self.raizes = []
+        self.parametros = []
+        self.tabelas = []
+
+        for funcao in funcoes:
+            self.adicionar(funcao)
+
+    def __len__(self):
+        return len(self.classes)
+
+    # ------------------------------------------------------------------
+    # construção
+    # ------------------------------------------------------------------
+
+    def adicionar(self, funcao):
+        """Copia uma FunctionNode (e a subárvore dela) para a arena"""
+        self.raizes.append(len(self.classes))
+        self.parametros.append(funcao.params)
+        self.tabelas.append(funcao.table)
+
+        # pré-ordem sem recursão; cada filho preenche a sua posição em
+        # 'filhos', reservada quando o pai foi criado
+        pilha = [(funcao, SEM_NO)]
+        while pilha:
+            no, posicao = pilha.pop()
+            indice = self._novo(no)
+            if posicao != SEM_NO:
+                self.filhos[posicao] = indice
+
+            filhos = _filhos(no)
+            inicio = len(self.filhos)
+            self.inicio_filhos.append(inicio)
+            self.n_filhos.append(len(filhos))
+            self.filhos.extend([SEM_NO] * len(filhos))
+
+            for k in range(len(filhos) - 1, -1, -1):
+                if filhos[k] is not None:
+                    pilha.append((filhos[k], inicio + k))
+
+        return self.raizes[-1]
+
+    def _novo(self, no):
+        classe = type(no)
+        self.classes.append(_CODIGO_CLASSE[classe])
+
+        op = getattr(no, "op", None)
+        self.operadores.append(SEM_OPERADOR if op is None else CODIGOS[op])
+        self.linhas.append(getattr(no, "line", 0) or 0)
+        self.tipos.append(self._tipo(getattr(no, _TIPO.get(classe, "type"), None)))
+
+        atributo = _VALOR.get(classe)
+        self.valores.append(self._constante(getattr(no, atributo)) if atributo else -1)
+        return len(self.classes) - 1
+
+    def _constante(self, valor):
+        # a chave inclui a classe: 1 e 1.0 são iguais como chave de dict
+        chave = (valor.__class__, valor)
+        indice = self._indice_constante.get(chave)
+        if indice is None:
+            indice = self._indice_constante[chave] = len(self.constantes)
+            self.constantes.append(valor)
+        return indice
+
+    def _tipo(self, nome):
+        indice = self._indice_tipo.get(nome)
+        if indice is None:
+            indice = self._indice_tipo[nome] = len(self.nomes_tipo)
+            self.nomes_tipo.append(nome)
+        return indice
+
+    # ------------------------------------------------------------------
+    # acesso por índice
+    # ------------------------------------------------------------------
+
+    def classe(self, i):
+        return CLASSES[self.classes[i]]
+
+    def operador(self, i):
+        codigo = self.operadores[i]
+        return None if codigo == SEM_OPERADOR else TIPOS[codigo]
+
+    def valor(self, i):
+        indice = self.valores[i]
+        return None if indice < 0 else self.constantes[indice]
+
+    def tipo(self, i):
+        return self.nomes_tipo[self.tipos[i]]
+
+    def linha(self, i):
+        return self.linhas[i]
+
+    def filhos_de(self, i):
+        inicio = self.inicio_filhos[i]
+        return self.filhos[inicio:inicio + self.n_filhos[i]]
+
+    def fim_da_funcao(self, k):
+        """Fim (exclusivo) do intervalo de nós da função k"""
+        return self.raizes[k + 1] if k + 1 < len(self.raizes) else len(self.classes)
+
+    # ------------------------------------------------------------------
+    # volta para objetos
+    # ------------------------------------------------------------------
+
+    def funcao(self, k):
+        """FunctionNode da função k, reconstruída a partir dos arrays"""
+        inicio, fim = self.raizes[k], self.fim_da_funcao(k)
+
+        # em pré-ordem os filhos têm índice maior que o pai: construindo de
+        # trás para frente, os filhos de cada nó já estão prontos
+        objetos = {}
+        for i in range(fim - 1, inicio - 1, -1):
+            objetos[i] = self._objeto(i, objetos)
+
+        raiz = objetos[inicio]
+        raiz.params = self.parametros[k]
+        raiz.table = self.tabelas[k]
+        return raiz
+
+    def para_ast(self):
+        return [self.funcao(k) for k in range(len(self.raizes))]
+
+    def _objeto(self, i, objetos):
+        classe = self.classe(i)
+        no = classe.__new__(classe)
+        for atributo in classe.__slots__:
+            setattr(no, atributo, None)
+
+        if "line" in classe.__slots__:
+            no.line = self.linhas[i]
+        atributo_tipo = _TIPO.get(classe, "type")
+        if atributo_tipo in classe.__slots__:
+            setattr(no, atributo_tipo, self.tipo(i))
+        if "op" in classe.__slots__:
+            no.op = self.operador(i)
+        if classe in _VALOR:
+            setattr(no, _VALOR[classe], self.valor(i))
+
+        filhos = [objetos.pop(f) if f != SEM_NO else None for f in self.filhos_de(i)]
+        atributos = _FILHOS.get(classe, ())
+        if isinstance(atributos, str):
+            setattr(no, atributos, filhos)
+        else:
+            for atributo, filho in zip(atributos, filhos):
+                setattr(no, atributo, filho)
+        return no
+
+    def tamanho_bytes(self):
+        """Memória dos arrays (sem as constantes e as tabelas de símbolos)"""
+        arrays = (self.classes, self.operadores, self.linhas, self.tipos,
+                  self.valores, self.inicio_filhos, self.n_filhos, self.filhos)
+        return sum(a.itemsize * len(a) for a in arrays)
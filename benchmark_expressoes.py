@@ -0,0 +1,85 @@
+# benchmark_expressoes.py
+#
+# Mede o tempo de cada fase sobre expressões geradas muito grandes (cadeias
+# longas de operações, parênteses aninhados, aninhamento à direita e
+# menos unários encadeados). Nenhum passo usa recursão, então nada depende
+# do limite de recursão do Python, e o tempo por token deve ficar
+# aproximadamente constante quando o tamanho cresce (tempo linear). Os
+# parênteses não viram nós, então a medida é por token, não por nó.
+#
+# O JSON é medido compacto: com recuo, o texto de uma árvore funda cresce
+# com nós x profundidade.
+#
+#     python benchmark_expressoes.py [--tamanhos 10000 100000 1000000]
+#                                    [--formas cadeia direita ...]
+
+import argparse
+import io
+import pickle
+import sys
+import time
+
+from arena_ast import ArenaAST
+from buffer_tokens import analisar_para_buffer
+from main2 import Parser
+from main_semantico import montar_saida_semantica
+from saida_json import escrever_json
+from semantic import SemanticAnalyzer
+
+# forma -> gerador da expressão com n operandos/níveis
+FORMAS = {
+    "cadeia": lambda n: " + ".join(["a"] * n),
+    "mista": lambda n: "a" + "".join(" " + "+-*/"[i % 4] + " a" for i in range(n - 1)),
+    "parenteses": lambda n: "(" * n + "a" + ")" * n,
+    "direita": lambda n: "a + (" * n + "a" + ")" * n,
+    "unario": lambda n: "-" * n + "a",
+}
+
+
+def programa(expressao):
+    return "fn main() {\n  let a: int;\n  a = " + expressao + ";\n}\n"
+
+
+def medir(forma, n):
+    """Tempo (s) de cada fase para a forma com tamanho n"""
+    codigo = programa(FORMAS[forma](n))
+    tempos = {}
+
+    def etapa(nome, funcao, *args):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        tempos[nome] = time.perf_counter() - inicio
+        return resultado
+
+    tokens, erros_lexicos = etapa("lexico", analisar_para_buffer, codigo)
+    erros_sintaticos, _, funcoes = etapa("sintatico", Parser(tokens).parse)
+    erros_semanticos = etapa("semantico", SemanticAnalyzer(funcoes).analyze)
+    saida = etapa("ast_para_dict", montar_saida_semantica, funcoes, erros_semanticos)
+    etapa("json", escrever_json, saida, io.StringIO(), None)
+    arena = etapa("arena", ArenaAST, funcoes)
+    etapa("pickle", pickle.dumps, arena, pickle.HIGHEST_PROTOCOL)
+
+    erros = len(erros_lexicos) + len(erros_sintaticos) + len(erros_semanticos)
+    return len(tokens), len(arena), tempos, erros
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo das fases em expressões muito grandes")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--formas", nargs="+", choices=sorted(FORMAS), default=list(FORMAS))
+    args = parser.parse_args()
+
+    print(f"limite de recursão: {sys.getrecursionlimit()}")
+    for forma in args.formas:
+        print(f"\n== {forma} ==")
+        for n in args.tamanhos:
+            n_tokens, nos, tempos, erros = medir(forma, n)
+            total = sum(tempos.values())
+            por_token = "  ".join(f"{nome} {t / n_tokens * 1e6:.2f}" for nome, t in tempos.items())
+            print(f"{n_tokens:>9} tokens {nos:>9} nós  {total:7.2f} s  "
+                  f"({total / n_tokens * 1e6:.2f} µs/token; {por_token})"
+                  + (f"  [{erros} erros]" if erros else ""))
+
+
+if __name__ == "__main__":
+    main()
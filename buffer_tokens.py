@@ -0,0 +1,216 @@
+# buffer_tokens.py
+
+from array import array
+from bisect import bisect_left
+
+from afd import escanear_posicoes
+from reserved_words import reserved_words
+from tabela_interna import TabelaInterna
+from TipoToken import TipoToken, TIPOS, CODIGOS
+
+# Tipos cujos lexemas vão para uma tabela do léxico
+TIPOS_TABELADOS = (
+    TipoToken.ID, TipoToken.INT_CONST, TipoToken.FLOAT_CONST, TipoToken.FMT_STRING
+)
+
+
+class BufferTokens:
+    """Fluxo de tokens compacto (struct-of-arrays).
+
+    Cada token ocupa 17 bytes: o código do tipo em um array('B'), início,
+    fim e linha em arrays('I') e o índice na tabela do léxico em um
+    array('i') (-1 quando o tipo não tem tabela). O lexema não é guardado:
+    é recortado do código-fonte original só quando alguém pede por ele.
+    """
+
+    def __init__(self, fonte):
+        self.fonte = fonte
+        self.tipos = array('B')
+        self.inicios = array('I')
+        self.fins = array('I')
+        self.linhas = array('I')
+        self.indices = array('i')
+        self.tabelas = {tipo: TabelaInterna() for tipo in TIPOS_TABELADOS}
+
+    def adicionar(self, tipo, inicio, fim, linha, indice=-1):
+        self.tipos.append(CODIGOS[tipo])
+        self.inicios.append(inicio)
+        self.fins.append(fim)
+        self.linhas.append(linha)
+        self.indices.append(indice)
+
+    def registrar(self, tipo, inicio, fim, linha):
+        """Adiciona um token como sai do AFD: interna o lexema na tabela do
+        seu tipo ou, se não foi reconhecido, marca como TipoToken.ERRO.
+        Retorna a mensagem de erro léxico (ou None)."""
+        indice = -1
+        erro = None
+        if tipo in self.tabelas:
+            lexema = self.fonte[inicio:fim]
+            # palavras reservadas ('string', 'char_lit') não vão para tabela
+            if lexema not in reserved_words:
+                indice = self.tabelas[tipo].internar(lexema)
+        elif tipo == TipoToken.UNKNOWN:
+            erro = f"Erro léxico: Token não reconhecido '{self.fonte[inicio:fim]}' na linha {linha}"
+            tipo = TipoToken.ERRO
+        self.adicionar(tipo, inicio, fim, linha, indice)
+        return erro
+
+    def erros(self):
+        """Mensagens de erro léxico dos tokens TipoToken.ERRO do buffer"""
+        codigo_erro = CODIGOS[TipoToken.ERRO]
+        return [
+            f"Erro léxico: Token não reconhecido '{self.lexema(i)}' na linha {self.linha(i)}"
+            for i, codigo in enumerate(self.tipos) if codigo == codigo_erro
+        ]
+
+    def __len__(self):
+        return len(self.tipos)
+
+    # acesso usado pelo parser (IndexError fora do buffer)
+
+    def tipo(self, i):
+        return TIPOS[self.tipos[i]]
+
+    def codigo(self, i):
+        return self.tipos[i]
+
+    def lexema(self, i):
+        return self.fonte[self.inicios[i]:self.fins[i]]
+
+    def linha(self, i):
+        return self.linhas[i]
+
+    def indice(self, i):
+        indice = self.indices[i]
+        return None if indice < 0 else indice
+
+    def __getitem__(self, i):
+        """Token i no formato de dict usado pelo JSON de tokens"""
+        return {
+            "token": self.tipo(i),
+            "lexema": self.lexema(i),
+            "linha": self.linha(i),
+            "indice": self.indice(i)
+        }
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def tuplas(self):
+        """Tokens como (tipo, lexema, linha, índice), formato de main.tokens"""
+        for i in range(len(self)):
+            yield self.tipo(i), self.lexema(i), self.linha(i), self.indice(i)
+
+
+def analisar_para_buffer(codigo):
+    """Análise léxica direto para um BufferTokens, sem tuplas nem dicts.
+
+    Retorna (buffer, erros). Lexemas não reconhecidos entram no buffer com
+    tipo TipoToken.ERRO, como na lista de tokens do main.py; identificadores,
+    números e textos são internados em buffer.tabelas.
+    """
+    buffer = BufferTokens(codigo)
+    erros = []
+
+    for tipo, inicio, fim, linha in escanear_posicoes(codigo):
+        erro = buffer.registrar(tipo, inicio, fim, linha)
+        if erro:
+            erros.append(erro)
+
+    return buffer, erros
+
+
+def relexar(buffer, posicao, removidos, inseridos):
+    """Análise léxica incremental depois de uma edição no texto.
+
+    A edição troca 'removidos' caracteres a partir de 'posicao' pelo texto
+    'inseridos'. Os tokens que terminam antes da edição são mantidos; a
+    varredura recomeça no fim do último deles e para assim que um token
+    novo começa exatamente onde começava (deslocado) um token antigo
+    posterior à edição: daí em diante o texto é o mesmo, então os tokens
+    também são, e só têm início, fim e linha ajustados.
+
+    Retorna (novo_buffer, primeiro, fim_antigo, fim_novo): os tokens
+    [primeiro, fim_antigo) do buffer antigo viraram [primeiro, fim_novo) do
+    novo. O buffer antigo não é alterado: o novo recebe uma cópia das
+    tabelas do léxico, que é compactada quando os lexemas que nenhum token
+    usa mais (de edições anteriores) passam a ser a maioria.
+    """
+    antigo = buffer.fonte
+    fonte = antigo[:posicao] + inseridos + antigo[posicao + removidos:]
+    fim_edicao = posicao + removidos  # no texto antigo
+    delta = len(inseridos) - removidos
+    total = len(buffer)
+
+    # Um token só depende dos caracteres de inicio até fim (inclusive: o
+    # caractere em 'fim' é o que fez o AFD parar), então os tokens com
+    # fim < posicao não mudam.
+    primeiro = bisect_left(buffer.fins, posicao)
+    if primeiro > 0:
+        recomeco = buffer.fins[primeiro - 1]
+        linha_recomeco = buffer.linhas[primeiro - 1] + antigo.count(
+            '\n', buffer.inicios[primeiro - 1], recomeco
+        )
+    else:
+        recomeco, linha_recomeco = 0, 1
+
+    novo = BufferTokens(fonte)
+    novo.tabelas = {tipo: tabela.copy() for tipo, tabela in buffer.tabelas.items()}
+    for nome in ('tipos', 'inicios', 'fins', 'linhas', 'indices'):
+        setattr(novo, nome, getattr(buffer, nome)[:primeiro])
+
+    j = primeiro
+    for tipo, inicio, fim, linha in escanear_posicoes(fonte, recomeco, linha_recomeco):
+        # avança até o próximo token antigo que pode coincidir com este
+        while j < total and (buffer.inicios[j] < fim_edicao or buffer.inicios[j] + delta < inicio):
+            j += 1
+
+        if j < total and buffer.inicios[j] + delta == inicio:
+            fim_novo = len(novo)
+            _copiar_deslocado(novo, buffer, j, delta, linha - buffer.linhas[j])
+            _compactar_se_preciso(novo)
+            return novo, primeiro, j, fim_novo
+
+        novo.registrar(tipo, inicio, fim, linha)
+
+    _compactar_se_preciso(novo)
+    return novo, primeiro, total, len(novo)
+
+
+# lexemas nas tabelas a partir do qual a compactação é considerada
+MINIMO_COMPACTAR = 64
+
+
+def _compactar_se_preciso(buffer):
+    """Refaz as tabelas só com os lexemas usados pelos tokens do buffer
+    quando elas têm mais que o dobro de entradas dos tokens tabelados (o
+    custo, linear no buffer, fica amortizado entre as edições)"""
+    entradas = sum(len(tabela) for tabela in buffer.tabelas.values())
+    if entradas < MINIMO_COMPACTAR or entradas <= 2 * (len(buffer) - buffer.indices.count(-1)):
+        return
+
+    tabelas = {tipo: TabelaInterna() for tipo in buffer.tabelas}
+    indices = buffer.indices
+    for i in range(len(buffer)):
+        if indices[i] >= 0:
+            indices[i] = tabelas[buffer.tipo(i)].internar(buffer.lexema(i))
+    buffer.tabelas = tabelas
+
+
+def _copiar_deslocado(novo, buffer, j, delta, delta_linha):
+    """Copia os tokens buffer[j:] para o fim de novo, deslocando posições
+    e linhas (map com método embutido: o laço roda em C)"""
+    novo.tipos.extend(buffer.tipos[j:])
+    novo.indices.extend(buffer.indices[j:])
+    if delta:
+        novo.inicios.extend(map(delta.__add__, buffer.inicios[j:]))
+        novo.fins.extend(map(delta.__add__, buffer.fins[j:]))
+    else:
+        novo.inicios.extend(buffer.inicios[j:])
+        novo.fins.extend(buffer.fins[j:])
+    if delta_linha:
+        novo.linhas.extend(map(delta_linha.__add__, buffer.linhas[j:]))
+    else:
+        novo.linhas.extend(buffer.linhas[j:])
@@ -0,0 +1,407 @@
+# bytecode.py
+#
+# Tradução da AST checada para bytecode, executado pela máquina de pilha
+# de vm.py. Cada função vira um FunctionCode:
+#
+#   - code: bytes com instruções de 2 bytes (opcode, argumento), como o
+#     wordcode do CPython; argumentos maiores que 255 vêm precedidos de
+#     EXTENDED_ARG com os bytes mais altos;
+#   - consts: pool de constantes (números, textos e a descrição de cada
+#     println), referenciadas pelo índice;
+#   - locais: uma posição por símbolo da SymbolTable, na ordem da tabela
+#     (os parâmetros primeiro), como em runtime.frame_layout;
+#   - lines: (índice da instrução, linha) onde a linha do fonte muda, para
+#     os erros de execução.
+#
+# Destinos de desvio são índices de instrução (sem contar os EXTENDED_ARG),
+# então o tamanho dos argumentos não muda os destinos. Um Program é
+# serializado com marshal (to_bytes/from_bytes, e também pelo pickle), para
+# ser guardado no cache e rodado de novo sem passar pelo léxico e pelo
+# parser.
+#
+#     python bytecode.py programa.p     mostra o bytecode (disassembly)
+
+import bisect
+import marshal
+import operator
+import sys
+
+from p_ast import BinaryOpNode, UnaryOpNode, VarNode, IntConstNode, FloatConstNode
+from runtime import (
+    STATEMENTS, EXPRESSIONS, ExecutionError, check_types, frame_layout, int_div,
+    decode_char, decode_string, print_pieces
+)
+from TipoToken import TipoToken
+from visitor import Visitor
+
+# muda quando o formato do bytecode muda (invalida o que foi serializado)
+BYTECODE_VERSION = 1
+
+(
+    EXTENDED_ARG,
+    LOAD_LOCAL,         # empilha o local arg
+    LOAD_CONST,         # empilha a constante arg
+    STORE_LOCAL,        # desempilha no local arg
+    BINARY,             # a, b -> BINARY_FUNCTIONS[arg](a, b)
+    BINARY_LOCAL,       # a -> BINARY_FUNCTIONS[arg & 15](a, local arg >> 4)
+    BINARY_CONST,       # a -> BINARY_FUNCTIONS[arg & 15](a, const arg >> 4)
+    JUMP_UNLESS,        # a, b -> desvia para arg >> 3 se não COMPARE[arg & 7](a, b)
+    JUMP_WHEN,          # a, b -> desvia para arg >> 3 se COMPARE[arg & 7](a, b)
+    POP_JUMP_IF_FALSE,  # desvia para arg se o valor desempilhado é 0
+    POP_JUMP_IF_TRUE,
+    JUMP,
+    CALL,               # chama a função arg do programa (argumentos na pilha)
+    RETURN_VALUE,
+    RETURN_DEFAULT,     # retorna o valor zero do tipo de retorno
+    PRINT,              # println descrito pela constante arg
+    NEGATE,
+    POP,
+) = range(18)
+
+OPNAMES = [
+    "EXTENDED_ARG", "LOAD_LOCAL", "LOAD_CONST", "STORE_LOCAL", "BINARY",
+    "BINARY_LOCAL", "BINARY_CONST", "JUMP_UNLESS", "JUMP_WHEN",
+    "POP_JUMP_IF_FALSE", "POP_JUMP_IF_TRUE", "JUMP", "CALL", "RETURN_VALUE",
+    "RETURN_DEFAULT", "PRINT", "NEGATE", "POP",
+]
+
+JUMPS = {JUMP, POP_JUMP_IF_FALSE, POP_JUMP_IF_TRUE}
+COMPARE_JUMPS = {JUMP_UNLESS, JUMP_WHEN}
+
+COMPARISON_OPS = [
+    TipoToken.EQ, TipoToken.NE, TipoToken.LT, TipoToken.GT, TipoToken.LE, TipoToken.GE
+]
+COMPARE = [operator.eq, operator.ne, operator.lt, operator.gt, operator.le, operator.ge]
+
+
+def _as_int(compare):
+    return lambda a, b: 1 if compare(a, b) else 0
+
+
+# argumento das instruções BINARY*; a divisão por zero levanta
+# ZeroDivisionError, que a VM troca pelo erro de execução com a linha
+BINARY_FUNCTIONS = [operator.add, operator.sub, operator.mul, int_div, operator.truediv]
+BINARY_FUNCTIONS += [_as_int(compare) for compare in COMPARE]
+
+ADD, SUB, MUL, INT_DIV, FLOAT_DIV = range(5)
+BINARY_OPS = {TipoToken.PLUS: ADD, TipoToken.MINUS: SUB, TipoToken.MULT: MUL}
+BINARY_OPS.update({op: 5 + k for k, op in enumerate(COMPARISON_OPS)})
+BINARY_NAMES = ["+", "-", "*", "/ (int)", "/"] + ["==", "!=", "<", ">", "<=", ">="]
+
+CONSTANTS = (IntConstNode, FloatConstNode)
+
+
+def encode(instructions):
+    """Lista de [opcode, argumento] -> bytes"""
+    code = bytearray()
+    for op, arg in instructions:
+        if arg > 0xFFFFFF:
+            code += bytes((EXTENDED_ARG, arg >> 24 & 0xFF))
+        if arg > 0xFFFF:
+            code += bytes((EXTENDED_ARG, arg >> 16 & 0xFF))
+        if arg > 0xFF:
+            code += bytes((EXTENDED_ARG, arg >> 8 & 0xFF))
+        code += bytes((op, arg & 0xFF))
+    return bytes(code)
+
+
+def decode(code):
+    """bytes -> (opcodes, argumentos), uma posição por instrução"""
+    ops, args = [], []
+    extended = 0
+    for i in range(0, len(code), 2):
+        op, arg = code[i], code[i + 1] | extended
+        if op == EXTENDED_ARG:
+            extended = arg << 8
+            continue
+        extended = 0
+        ops.append(op)
+        args.append(arg)
+    return ops, args
+
+
+class FunctionCode:
+    """Bytecode de uma função"""
+
+    def __init__(self, name, n_params, local_names, local_types, return_type,
+                 code, consts, lines):
+        self.name = name
+        self.n_params = n_params
+        self.local_names = local_names
+        self.local_types = local_types
+        self.return_type = return_type
+        self.code = code
+        self.consts = consts
+        self.lines = lines      # ((índice, linha), ...)
+
+    def to_tuple(self):
+        return (self.name, self.n_params, self.local_names, self.local_types,
+                self.return_type, self.code, self.consts, self.lines)
+
+    def line_at(self, index):
+        """Linha do fonte da instrução 'index'"""
+        starts = [start for start, _ in self.lines]
+        k = bisect.bisect_right(starts, index) - 1
+        return self.lines[k][1] if k >= 0 else None
+
+    def disassemble(self):
+        ops, args = decode(self.code)
+        targets = set()
+        for op, arg in zip(ops, args):
+            if op in JUMPS:
+                targets.add(arg)
+            elif op in COMPARE_JUMPS:
+                targets.add(arg >> 3)
+
+        params = ", ".join(self.local_names[:self.n_params])
+        result = [f"fn {self.name}({params}) -> {self.return_type or '()'}"]
+        line_starts = dict(self.lines)
+        for index, (op, arg) in enumerate(zip(ops, args)):
+            line = f"{line_starts[index]:>5}" if index in line_starts else "     "
+            mark = ">>" if index in targets else "  "
+            result.append(f"{line} {mark} {index:>4} {OPNAMES[op]:<18}{self._describe(op, arg)}")
+        return "\n".join(result)
+
+    def _describe(self, op, arg):
+        if op in (LOAD_LOCAL, STORE_LOCAL):
+            return f"{arg} ({self.local_names[arg]})"
+        if op == LOAD_CONST:
+            return f"{arg} ({self.consts[arg]!r})"
+        if op == BINARY:
+            return f"{arg} ({BINARY_NAMES[arg]})"
+        if op == BINARY_LOCAL:
+            return f"{BINARY_NAMES[arg & 15]} {self.local_names[arg >> 4]}"
+        if op == BINARY_CONST:
+            return f"{BINARY_NAMES[arg & 15]} {self.consts[arg >> 4]!r}"
+        if op in COMPARE_JUMPS:
+            return f"{arg >> 3} ({BINARY_NAMES[5 + (arg & 7)]})"
+        if op == PRINT:
+            return f"{arg} ({'{}'.join(self.consts[arg][0])!r})"
+        if op in JUMPS or op == CALL:
+            return str(arg)
+        return ""
+
+
+class Program:
+    """Bytecode de todas as funções; CALL usa o índice em 'functions'"""
+
+    def __init__(self, functions):
+        self.functions = functions
+        self.index = {func.name: k for k, func in enumerate(functions)}
+
+    def to_bytes(self):
+        return marshal.dumps(
+            (BYTECODE_VERSION, tuple(func.to_tuple() for func in self.functions))
+        )
+
+    @classmethod
+    def from_bytes(cls, data):
+        try:
+            version, functions = marshal.loads(data)
+        except (EOFError, ValueError, TypeError):
+            raise ExecutionError("[ERRO DE EXECUÇÃO] Bytecode inválido") from None
+        if version != BYTECODE_VERSION:
+            raise ExecutionError(
+                f"[ERRO DE EXECUÇÃO] Bytecode da versão {version}, esperado {BYTECODE_VERSION}"
+            )
+        return cls([FunctionCode(*fields) for fields in functions])
+
+    # o cache (cache.CacheCompilacao) guarda com pickle
+    def __getstate__(self):
+        return self.to_bytes()
+
+    def __setstate__(self, state):
+        self.__init__(Program.from_bytes(state).functions)
+
+    def disassemble(self):
+        return "\n\n".join(func.disassemble() for func in self.functions)
+
+
+class BytecodeCompiler(Visitor):
+    """Gera o bytecode de uma função (a AST já passou pelo semântico)"""
+
+    def __init__(self, func, index):
+        self.func = func
+        self.index = index      # nome -> posição da função no Program
+        self.slots, _ = frame_layout(func)
+        self.instructions = []
+        self.consts = []
+        self._const_index = {}
+        self.lines = []
+
+    def compile(self):
+        func = self.func
+        self.visit(func.body)
+        self.emit(RETURN_DEFAULT)
+
+        symbols = func.table.symbols
+        return FunctionCode(
+            func.name, len(func.params), tuple(symbols),
+            tuple(symbol.type for symbol in symbols.values()), func.return_type,
+            encode(self.instructions), tuple(self.consts), tuple(self.lines)
+        )
+
+    # emissão
+
+    def emit(self, op, arg=0):
+        self.instructions.append([op, arg])
+        return len(self.instructions) - 1
+
+    def mark(self, line):
+        """A próxima instrução é da linha 'line' do fonte"""
+        if self.lines and self.lines[-1][1] == line:
+            return
+        if self.lines and self.lines[-1][0] == len(self.instructions):
+            self.lines.pop()
+        self.lines.append((len(self.instructions), line))
+
+    def here(self):
+        return len(self.instructions)
+
+    def patch(self, index, target):
+        op, arg = self.instructions[index]
+        if op in COMPARE_JUMPS:
+            self.instructions[index][1] = target << 3 | arg & 7
+        else:
+            self.instructions[index][1] = target
+
+    def const(self, value):
+        key = (type(value), value)  # 1, 1.0 e True não se misturam
+        index = self._const_index.get(key)
+        if index is None:
+            index = self._const_index[key] = len(self.consts)
+            self.consts.append(value)
+        return index
+
+    # comandos
+
+    def visit_BlockNode(self, block):
+        for cmd in block.commands:
+            if isinstance(cmd, STATEMENTS):
+                self.mark(cmd.line)
+                yield cmd
+            elif isinstance(cmd, EXPRESSIONS):
+                self.mark(cmd.line)
+                yield cmd
+                self.emit(POP)
+
+    def visit_AssignNode(self, cmd):
+        yield cmd.expr
+        self.emit(STORE_LOCAL, self.slots[cmd.name])
+
+    def visit_PrintNode(self, cmd):
+        pieces, args = print_pieces(cmd)
+        for arg in args:
+            yield arg
+        description = (tuple(pieces), tuple(arg.type for arg in args))
+        self.emit(PRINT, self.const(description))
+
+    def visit_ReturnNode(self, cmd):
+        yield cmd.expr
+        self.emit(RETURN_VALUE)
+
+    def visit_IfNode(self, cmd):
+        skip_then = yield from self.condition(cmd.cond, False)
+        yield cmd.then_body
+        if cmd.else_body is None:
+            self.patch(skip_then, self.here())
+            return
+        skip_else = self.emit(JUMP)
+        self.patch(skip_then, self.here())
+        yield cmd.else_body
+        self.patch(skip_else, self.here())
+
+    def visit_WhileNode(self, cmd):
+        # condição no fim do laço: um desvio por volta em vez de dois
+        to_condition = self.emit(JUMP)
+        body = self.here()
+        yield cmd.body
+        self.patch(to_condition, self.here())
+        self.mark(cmd.line)
+        repeat = yield from self.condition(cmd.cond, True)
+        self.patch(repeat, body)
+
+    def condition(self, expr, jump_if):
+        """Gera a condição e um desvio (a corrigir com patch) tomado quando
+        ela é 'jump_if'; uma comparação vira um só JUMP_UNLESS/JUMP_WHEN"""
+        if isinstance(expr, BinaryOpNode) and expr.op in COMPARISON_OPS:
+            yield expr.left
+            yield expr.right
+            op = JUMP_WHEN if jump_if else JUMP_UNLESS
+            return self.emit(op, COMPARISON_OPS.index(expr.op))
+        yield expr
+        return self.emit(POP_JUMP_IF_TRUE if jump_if else POP_JUMP_IF_FALSE)
+
+    # expressões (deixam o valor na pilha)
+
+    def visit_VarNode(self, expr):
+        self.emit(LOAD_LOCAL, self.slots[expr.name])
+
+    def visit_IntConstNode(self, expr):
+        self.emit(LOAD_CONST, self.const(expr.value))
+
+    visit_FloatConstNode = visit_IntConstNode
+
+    def visit_CharConstNode(self, expr):
+        self.emit(LOAD_CONST, self.const(decode_char(expr.value)))
+
+    def visit_StringNode(self, expr):
+        self.emit(LOAD_CONST, self.const(decode_string(expr.value)))
+
+    def visit_BinaryOpNode(self, expr):
+        if expr.op in BINARY_OPS:
+            function = BINARY_OPS[expr.op]
+        else:
+            function = INT_DIV if expr.left.type == "int" else FLOAT_DIV
+
+        yield expr.left
+        right = expr.right
+        # operando direito simples: uma instrução só
+        if isinstance(right, VarNode):
+            op, arg = BINARY_LOCAL, self.slots[right.name] << 4 | function
+        elif isinstance(right, CONSTANTS):
+            op, arg = BINARY_CONST, self.const(right.value) << 4 | function
+        else:
+            yield right
+            op, arg = BINARY, function
+        if function in (INT_DIV, FLOAT_DIV):
+            self.mark(expr.line)  # a linha do erro de divisão por zero
+        self.emit(op, arg)
+
+    def visit_UnaryOpNode(self, expr):
+        count = 0
+        node = expr
+        while isinstance(node, UnaryOpNode):
+            count += 1
+            node = node.expr
+        yield node
+        if count % 2:
+            self.emit(NEGATE)
+
+    def visit_CallNode(self, expr):
+        for arg in expr.args:
+            yield arg
+        self.emit(CALL, self.index[expr.name])
+
+    def generic_visit(self, node):
+        raise ExecutionError(
+            f"[ERRO DE EXECUÇÃO] Nó {type(node).__name__} não pode ser executado"
+        )
+
+
+def compile_program(functions_ast):
+    """Program com o bytecode das funções (com nomes repetidos vale a
+    última, como no semântico)"""
+    check_types(functions_ast)
+    by_name = {func.name: func for func in functions_ast}
+    index = {name: k for k, name in enumerate(by_name)}
+    return Program([BytecodeCompiler(func, index).compile() for func in by_name.values()])
+
+
+if __name__ == "__main__":
+    from runtime import load_program
+
+    funcoes = load_program(sys.argv[1])
+    if funcoes is None:
+        sys.exit(1)
+    print(compile_program(funcoes).disassemble())
@@ -0,0 +1,154 @@
+# cache.py
+#
+# Cache em disco dos resultados do pipeline (tokens, tabelas de símbolos,
+# AST e erros), endereçado pelo conteúdo: a chave é o hash dos bytes do .p
+# junto com uma impressão digital do próprio compilador, então qualquer
+# mudança no léxico, no parser ou no semântico invalida o cache inteiro.
+#
+#     cache_dir/ab/abcdef0123....pkl
+#
+# As gravações são atômicas (arquivo temporário + os.replace), então vários
+# processos do lote.py podem usar o mesmo diretório ao mesmo tempo. Quando o
+# tamanho total passa do limite, as entradas usadas há mais tempo (mtime,
+# atualizado a cada leitura) são removidas.
+
+import hashlib
+import os
+import pickle
+import tempfile
+
+import afd
+import arena_ast
+import buffer_tokens
+import diagnostico
+import grammar
+import ll1
+import main2
+import p_ast
+import reserved_words
+import semantic
+import tabela_interna
+import TipoToken
+import visitor
+
+# Módulos cujo código define o resultado das fases
+MODULOS_COMPILADOR = (
+    TipoToken, reserved_words, afd, buffer_tokens, p_ast, ll1, grammar, main2, visitor, semantic,
+    diagnostico,
+    tabela_interna,  # vai no pickle do BufferTokens
+    arena_ast,  # formato em que a AST é guardada (pipeline.ResultadoCompilacao)
+)
+
+TAMANHO_MAXIMO = 512 * 1024 * 1024
+PODAR_A_CADA = 100  # gravações entre verificações do tamanho total
+
+_impressao = None
+
+
+def modulos_compilador():
+    """MODULOS_COMPILADOR e o pipeline.py, que define o que é guardado
+    (compilar_codigo e ResultadoCompilacao); ele importa este módulo, por
+    isso só entra aqui"""
+    import pipeline
+    return MODULOS_COMPILADOR + (pipeline,)
+
+
+def impressao_compilador():
+    """Hash do código-fonte dos módulos do compilador (calculado uma vez)"""
+    global _impressao
+    if _impressao is None:
+        h = hashlib.sha256()
+        for modulo in modulos_compilador():
+            with open(modulo.__file__, 'rb') as f:
+                h.update(f.read())
+        _impressao = h.hexdigest()
+    return _impressao
+
+
+class CacheCompilacao:
+    def __init__(self, diretorio, tamanho_maximo=TAMANHO_MAXIMO):
+        self.diretorio = diretorio
+        self.tamanho_maximo = tamanho_maximo
+        self._gravacoes = 0
+        os.makedirs(diretorio, exist_ok=True)
+
+    def chave(self, dados, modulos=()):
+        """Chave de um código-fonte (bytes); 'modulos' são os das fases
+        depois do semântico cujo resultado é o que vai para o cache (como o
+        bytecode.py)"""
+        h = hashlib.sha256(impressao_compilador().encode())
+        for modulo in modulos:
+            with open(modulo.__file__, 'rb') as f:
+                h.update(hashlib.sha256(f.read()).digest())
+        h.update(dados)
+        return h.hexdigest()
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, chave[:2], chave + ".pkl")
+
+    def obter(self, chave):
+        """Resultado guardado para a chave, ou None"""
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, 'rb') as f:
+                resultado = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # entrada corrompida (ou de outra versão do Python): ignora
+            return None
+
+        try:
+            os.utime(caminho)  # marca como usada recentemente
+        except OSError:
+            pass
+        return resultado
+
+    def guardar(self, chave, resultado):
+        caminho = self._caminho(chave)
+        pasta = os.path.dirname(caminho)
+        os.makedirs(pasta, exist_ok=True)
+
+        fd, temporario = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(resultado, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporario, caminho)
+        except BaseException:
+            try:
+                os.remove(temporario)
+            except OSError:
+                pass
+            raise
+
+        self._gravacoes += 1
+        if self._gravacoes % PODAR_A_CADA == 0:
+            self.podar()
+
+    def entradas(self):
+        """(mtime, tamanho, caminho) de cada entrada do cache"""
+        for pasta in os.scandir(self.diretorio):
+            if not pasta.is_dir():
+                continue
+            for entrada in os.scandir(pasta.path):
+                if not entrada.name.endswith(".pkl"):
+                    continue
+                try:
+                    info = entrada.stat()
+                except FileNotFoundError:
+                    continue  # removida por outro processo
+                yield info.st_mtime, info.st_size, entrada.path
+
+    def podar(self):
+        """Remove as entradas menos usadas até o cache caber no limite"""
+        entradas = sorted(self.entradas())
+        total = sum(tamanho for _, tamanho, _ in entradas)
+
+        for _, tamanho, caminho in entradas:
+            if total <= self.tamanho_maximo:
+                break
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+            total -= tamanho
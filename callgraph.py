@@ -0,0 +1,114 @@
+# callgraph.py
+#
+# Grafo de chamadas do programa, montado a partir das FunctionNode: para
+# cada função, as funções que ela chama (e quantas vezes). As componentes
+# fortemente conexas dizem quais funções são recursivas (direta ou
+# indiretamente) e dão a ordem "de baixo para cima" (quem é chamado vem
+# antes de quem chama), usada pelo inliner.py.
+
+from p_ast import CallNode
+from visitor import Visitor
+
+
+class CallCollector(Visitor):
+    """Lista as CallNode de uma função, em ordem de aparição"""
+
+    def __init__(self):
+        self.calls = []
+
+    def visit_CallNode(self, node):
+        self.calls.append(node)
+        yield from self.generic_visit(node)
+
+
+def collect_calls(node):
+    collector = CallCollector()
+    collector.visit(node)
+    return collector.calls
+
+
+class CallGraph:
+    def __init__(self, functions_ast):
+        # com nomes repetidos vale a última função (como no semântico)
+        self.functions = {func.name: func for func in functions_ast}
+        self.calls = {}    # função -> {função chamada: nº de chamadas}
+        self.callers = {name: set() for name in self.functions}
+
+        for name, func in self.functions.items():
+            counts = self.calls[name] = {}
+            for call in collect_calls(func.body):
+                counts[call.name] = counts.get(call.name, 0) + 1
+                if call.name in self.callers:
+                    self.callers[call.name].add(name)
+
+        self.components = self._components()
+        self.recursive = set()
+        for component in self.components:
+            if len(component) > 1 or component[0] in self.calls[component[0]]:
+                self.recursive.update(component)
+
+    def callees(self, name):
+        """Funções do programa chamadas por 'name' (sem as não declaradas)"""
+        return [callee for callee in self.calls.get(name, ()) if callee in self.functions]
+
+    def is_recursive(self, name):
+        return name in self.recursive
+
+    def bottom_up(self):
+        """Nomes das funções, cada uma depois de todas as que ela chama
+        (fora as da mesma componente recursiva)"""
+        return [name for component in self.components for name in component]
+
+    def _components(self):
+        """Componentes fortemente conexas (Tarjan, com pilha explícita), na
+        ordem em que o algoritmo as fecha: chamadas antes de quem chama"""
+        index, low = {}, {}
+        stack, on_stack = [], set()
+        components = []
+
+        for root in self.functions:
+            if root in index:
+                continue
+            work = [(root, iter(self.callees(root)))]
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+
+            while work:
+                name, pending = work[-1]
+                callee = next(pending, None)
+                if callee is not None:
+                    if callee not in index:
+                        index[callee] = low[callee] = len(index)
+                        stack.append(callee)
+                        on_stack.add(callee)
+                        work.append((callee, iter(self.callees(callee))))
+                    elif callee in on_stack:
+                        low[name] = min(low[name], index[callee])
+                    continue
+
+                work.pop()
+                if work:
+                    caller = work[-1][0]
+                    low[caller] = min(low[caller], low[name])
+                if low[name] == index[name]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == name:
+                            break
+                    components.append(component)
+
+        return components
+
+    def to_dict(self):
+        return {
+            name: {
+                "chama": self.callees(name),
+                "chamada_por": sorted(self.callers[name]),
+                "recursiva": self.is_recursive(name),
+            }
+            for name in self.functions
+        }
@@ -0,0 +1,270 @@
+# cfg.py
+#
+# Grafo de fluxo de controle (CFG) de uma função, montado sobre a AST já
+# checada pelo semântico. Cada bloco básico tem uma sequência de comandos
+# sem desvios (atribuições, println, chamadas, return) e, se termina num
+# if/while, o nó desse comando em 'branch': successors[0] é o caminho com
+# a condição verdadeira e successors[1] o com ela falsa. Todo return e o
+# fim da função levam ao bloco 'exit'.
+#
+# Em cima do grafo: blocos inalcançáveis (código depois de um return),
+# dominadores imediatos (Cooper, Harvey e Kennedy, "A Simple, Fast
+# Dominance Algorithm") e os laços naturais (arestas de volta para um
+# bloco que domina a origem), que é o que as otimizações de laço e de
+# ramos mortos usam. Nada aqui é recursivo.
+#
+#     python cfg.py programa.p     mostra o CFG de cada função
+
+import sys
+
+from p_ast import IfNode, WhileNode, ReturnNode
+
+
+class BasicBlock:
+    def __init__(self, index):
+        self.index = index
+        self.statements = []
+        self.branch = None        # IfNode/WhileNode que decide a saída
+        self.successors = []
+        self.predecessors = []
+
+    def __repr__(self):
+        return f"B{self.index}"
+
+
+class CFG:
+    def __init__(self, func):
+        self.function = func
+        self.blocks = []
+        self.entry = self._new_block()
+        self.exit = self._new_block()
+        self._build(func.body)
+
+        self.order = self._reverse_postorder()
+        self.idom = self._dominators()
+        self._interval = self._dominator_intervals()
+
+    # ------------------------------------------------------------------
+    # construção
+    # ------------------------------------------------------------------
+
+    def _new_block(self):
+        block = BasicBlock(len(self.blocks))
+        self.blocks.append(block)
+        return block
+
+    @staticmethod
+    def _edge(source, target):
+        source.successors.append(target)
+        target.predecessors.append(source)
+
+    def _build(self, body):
+        # Pilha de tarefas: um iterador de comandos, ("goto", bloco) liga o
+        # bloco atual ao bloco e continua nele, ("start", bloco) continua
+        # num bloco que já tem as arestas de entrada. Depois de um return
+        # não há bloco atual (None) até o próximo começar.
+        current = self.entry
+        tasks = [("goto", self.exit), iter(body.commands)]
+
+        while tasks:
+            task = tasks.pop()
+            if isinstance(task, tuple):
+                action, block = task
+                if action == "goto" and current is not None:
+                    self._edge(current, block)
+                current = block
+                continue
+
+            statement = next(task, None)
+            if statement is None:
+                continue
+            tasks.append(task)
+
+            if current is None:
+                current = self._new_block()  # inalcançável
+
+            if isinstance(statement, IfNode):
+                current.branch = statement
+                then_block, join = self._new_block(), self._new_block()
+                else_block = self._new_block() if statement.else_body else join
+                self._edge(current, then_block)
+                self._edge(current, else_block)
+
+                tasks.append(("goto", join))
+                if statement.else_body:
+                    tasks.append(iter(statement.else_body.commands))
+                    tasks.append(("start", else_block))
+                    tasks.append(("goto", join))
+                tasks.append(iter(statement.then_body.commands))
+                tasks.append(("start", then_block))
+
+            elif isinstance(statement, WhileNode):
+                header, body_block, after = self._new_block(), self._new_block(), self._new_block()
+                self._edge(current, header)
+                header.branch = statement
+                self._edge(header, body_block)
+                self._edge(header, after)
+
+                tasks.append(("start", after))
+                tasks.append(("goto", header))
+                tasks.append(iter(statement.body.commands))
+                tasks.append(("start", body_block))
+
+            else:
+                current.statements.append(statement)
+                if isinstance(statement, ReturnNode):
+                    self._edge(current, self.exit)
+                    current = None
+
+    # ------------------------------------------------------------------
+    # análises
+    # ------------------------------------------------------------------
+
+    def _reverse_postorder(self):
+        """Blocos alcançáveis a partir da entrada, em pós-ordem reversa"""
+        postorder = []
+        seen = {self.entry}
+        work = [(self.entry, iter(self.entry.successors))]
+        while work:
+            block, pending = work[-1]
+            successor = next(pending, None)
+            if successor is None:
+                work.pop()
+                postorder.append(block)
+            elif successor not in seen:
+                seen.add(successor)
+                work.append((successor, iter(successor.successors)))
+        postorder.reverse()
+        return postorder
+
+    def _dominators(self):
+        """Dominador imediato de cada bloco alcançável (a entrada aponta
+        para ela mesma)"""
+        number = {block: i for i, block in enumerate(self.order)}
+        idom = {self.entry: self.entry}
+
+        def intersect(a, b):
+            while a is not b:
+                while number[a] > number[b]:
+                    a = idom[a]
+                while number[b] > number[a]:
+                    b = idom[b]
+            return a
+
+        changed = True
+        while changed:
+            changed = False
+            for block in self.order[1:]:
+                new = None
+                for pred in block.predecessors:
+                    if pred in idom:
+                        new = pred if new is None else intersect(pred, new)
+                if idom.get(block) is not new:
+                    idom[block] = new
+                    changed = True
+        return idom
+
+    def _dominator_intervals(self):
+        """Intervalo [entrada, saída] de cada bloco numa busca em
+        profundidade na árvore de dominadores: a domina b se o intervalo de
+        a contém o de b (sem subir a cadeia de idom a cada pergunta)"""
+        children = {block: [] for block in self.idom}
+        for block, parent in self.idom.items():
+            if block is not parent:
+                children[parent].append(block)
+
+        interval, clock = {}, 0
+        work = [(self.entry, iter(children[self.entry]))]
+        start = {self.entry: 0}
+        while work:
+            block, pending = work[-1]
+            child = next(pending, None)
+            clock += 1
+            if child is None:
+                work.pop()
+                interval[block] = (start[block], clock)
+            else:
+                start[child] = clock
+                work.append((child, iter(children[child])))
+        return interval
+
+    def reachable(self, block):
+        return block in self.idom
+
+    def unreachable(self):
+        """Blocos que não são alcançados a partir da entrada"""
+        return [block for block in self.blocks if block not in self.idom]
+
+    def dominates(self, a, b):
+        """a domina b: todo caminho da entrada até b passa por a"""
+        if a not in self._interval or b not in self._interval:
+            return False
+        start_a, end_a = self._interval[a]
+        start_b, end_b = self._interval[b]
+        return start_a <= start_b and end_b <= end_a
+
+    def dominators(self, block):
+        """Dominadores de um bloco alcançável, do próprio bloco até a entrada"""
+        result = [block]
+        while block is not self.entry:
+            block = self.idom[block]
+            result.append(block)
+        return result
+
+    def back_edges(self):
+        return [
+            (source, target)
+            for source in self.order for target in source.successors
+            if self.dominates(target, source)
+        ]
+
+    def loops(self):
+        """Laços naturais: (cabeçalho, blocos do laço), um por aresta de volta"""
+        result = []
+        for source, header in self.back_edges():
+            body = {header, source}
+            work = [source]
+            while work:
+                block = work.pop()
+                if block is header:
+                    continue
+                for pred in block.predecessors:
+                    if pred not in body and self.reachable(pred):
+                        body.add(pred)
+                        work.append(pred)
+            result.append((header, sorted(body, key=lambda b: b.index)))
+        return result
+
+    def describe(self):
+        lines = [f"função {self.function.name}: entrada {self.entry}, saída {self.exit}"]
+        for block in self.blocks:
+            header = f"  {block}"
+            if block is not self.entry and block in self.idom:
+                header += f" (idom {self.idom[block]})"
+            elif block not in self.idom:
+                header += " (inalcançável)"
+            lines.append(header + ":")
+            for statement in block.statements:
+                lines.append(f"    {type(statement).__name__} (linha {statement.line})")
+            if block.branch is not None:
+                kind = "if" if isinstance(block.branch, IfNode) else "while"
+                lines.append(f"    {kind} (linha {block.branch.line}) -> "
+                             f"{block.successors[0]} / {block.successors[1]}")
+            elif block.successors:
+                lines.append(f"    -> {', '.join(map(repr, block.successors))}")
+        for header, body in self.loops():
+            lines.append(f"  laço em {header}: {', '.join(map(repr, body))}")
+        return "\n".join(lines)
+
+
+def build_cfgs(functions_ast):
+    return [CFG(func) for func in functions_ast]
+
+
+if __name__ == "__main__":
+    from pipeline import compilar_arquivo
+
+    resultado = compilar_arquivo(sys.argv[1])
+    for cfg in build_cfgs(resultado.funcoes):
+        print(cfg.describe())
+        print()
@@ -0,0 +1,543 @@
+# cgen.py
+#
+# Geração de C a partir da AST checada, compilado pelo cc do sistema num
+# executável nativo. Tipos: int -> long long, float -> double, char -> char
+# (só ASCII); textos são literais de C. Cada função P vira uma função C
+# (p_<nome>, variáveis v_<nome>) e o println vira um printf com o texto do
+# próprio println como formato. As funções de apoio do prelúdio usam o
+# prefixo prt_, que nenhum nome do programa gera.
+#
+# As regras de runtime.py valem aqui também: '/' entre ints trunca em
+# direção a zero, dividir por zero termina o programa com o erro de
+# execução e a linha, comparações resultam em 0/1 e floats saem na menor
+# forma que volta ao mesmo valor. Diferenças do C: ints têm 64 bits (com
+# -fwrapv, o estouro dá a volta em vez de crescer como no Python) e a
+# profundidade da recursão é limitada pela pilha do processo.
+#
+# O C não define a ordem em que os operandos e os argumentos são
+# avaliados. Num comando com mais de uma chamada ou divisão (o que pode
+# escrever ou parar o programa), ou com uma expressão aninhada demais, cada
+# operação vai para uma variável temporária, na ordem do P.
+#
+# Com --cache, o executável fica guardado pelo conteúdo do .p (junto com o
+# compilador C usado) e não é gerado de novo.
+#
+#     python cgen.py programa.p [--cache DIR] [-o executavel] [--tempo]
+#     python cgen.py programa.p --fonte     mostra o C gerado
+
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+from cache import CacheCompilacao
+from p_ast import BinaryOpNode, UnaryOpNode, CallNode
+from runtime import (
+    STATEMENTS, EXPRESSIONS, ExecutionError, check_arguments, check_types, default_value,
+    decode_char, decode_string, print_pieces, too_deep, load_program
+)
+import optimizer
+import runtime
+from TipoToken import TipoToken
+from visitor import Visitor
+
+MAX_NESTING = 100
+
+CC = os.environ.get("CC", "cc")
+CFLAGS = ("-O2", "-std=c99", "-fwrapv")
+LIBS = ("-lm",)
+
+C_TYPES = {"int": "long long", "float": "double", "char": "char", "string": "const char *"}
+
+# conversão do printf de cada tipo (floats passam por prt_float)
+PRINTF_FORMATS = {"int": "%lld", "float": "%s", "char": "%c", "string": "%s"}
+
+ARITHMETIC = {TipoToken.PLUS: "+", TipoToken.MINUS: "-", TipoToken.MULT: "*"}
+
+COMPARISONS = {
+    TipoToken.EQ: "==", TipoToken.NE: "!=", TipoToken.LT: "<",
+    TipoToken.GT: ">", TipoToken.LE: "<=", TipoToken.GE: ">=",
+}
+
+C_ESCAPES = {"\n": "\\n", "\t": "\\t"}
+
+# prefixo das temporárias de cada tipo
+TEMPORARY_PREFIXES = {"int": "ti", "float": "tf", "char": "tc", "string": "ts"}
+
+PRELUDE = r"""#include <math.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+static void prt_division_by_zero(int line)
+{
+    fflush(stdout);
+    fprintf(stderr, "[ERRO DE EXECUÇÃO] Divisão por zero (linha %d)\n", line);
+    exit(1);
+}
+
+static long long prt_div_int(long long a, long long b, int line)
+{
+    if (b == 0)
+        prt_division_by_zero(line);
+    if (b == -1)
+        return (long long)(0ULL - (unsigned long long)a);
+    return a / b;
+}
+
+static double prt_div_float(double a, double b, int line)
+{
+    if (b == 0.0)
+        prt_division_by_zero(line);
+    return a / b;
+}
+
+/* menor '%.Ng' que volta ao mesmo valor (runtime.format_float) */
+static char prt_float_buffers[PRT_FLOAT_BUFFERS][32];
+static int prt_float_next;
+
+static const char *prt_float(double x)
+{
+    char *buffer = prt_float_buffers[prt_float_next];
+    prt_float_next = (prt_float_next + 1) % PRT_FLOAT_BUFFERS;
+    if (isnan(x))
+        return "nan";
+    if (isinf(x))
+        return x > 0 ? "inf" : "-inf";
+    for (int precision = 1; precision <= 17; precision++) {
+        snprintf(buffer, 32, "%.*g", precision, x);
+        if (strtod(buffer, NULL) == x)
+            break;
+    }
+    return buffer;
+}
+"""
+
+
+def _mangle(prefix, name):
+    """Identificador C para um nome P (que pode ter letras não ASCII)"""
+    if name.isascii():
+        return prefix + name
+    text = "".join(
+        c if c.isascii() and c != "_" else "__" if c == "_" else f"_{ord(c):x}_"
+        for c in name
+    )
+    return prefix + "u_" + text
+
+
+def _function_name(name):
+    return _mangle("p_", name)
+
+
+def _variable_name(name):
+    return _mangle("v_", name)
+
+
+def c_string(text):
+    """Literal de C com os bytes UTF-8 do texto"""
+    out = []
+    for byte in text.encode("utf-8"):
+        char = chr(byte)
+        if char in '"\\':
+            out.append("\\" + char)
+        elif char in C_ESCAPES:
+            out.append(C_ESCAPES[char])
+        elif 32 <= byte < 127:
+            out.append(char)
+        else:
+            out.append(f"\\{byte:03o}")  # 3 dígitos: o escape acaba aqui
+    return '"' + "".join(out) + '"'
+
+
+def c_char(char):
+    if not char.isascii():
+        raise ExecutionError(
+            f"[ERRO DE EXECUÇÃO] O backend C só aceita char ASCII, encontrado {char!r}"
+        )
+    if char in "'\\" or not 32 <= ord(char) < 127:
+        return f"((char){ord(char)})"
+    return f"'{char}'"
+
+
+def c_literal(value, type_name):
+    # negativos (constantes dobradas pelo optimizer.py) entre parênteses:
+    # '-' seguido de '-5LL' seria '--'
+    if type_name == "int":
+        return f"{value}LL" if value >= 0 else f"({value}LL)"
+    if type_name == "float":
+        return repr(float(value)) if value >= 0 else f"({float(value)!r})"
+    if type_name == "char":
+        return c_char(value)
+    return c_string(value)
+
+
+def _effects(expressions, enough=2):
+    """Há pelo menos 'enough' chamadas/divisões nas expressões?"""
+    count = 0
+    stack = list(expressions)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, (BinaryOpNode, UnaryOpNode, CallNode)):
+            if isinstance(node, CallNode) or getattr(node, "op", None) == TipoToken.DIV:
+                count += 1
+                if count >= enough:
+                    return True
+            stack.extend(value for _, value in node.fields())
+    return False
+
+
+class CGenerator(Visitor):
+    """Gera o C de um programa (a AST já passou pelo semântico). Comandos
+    retornam listas de linhas, expressões o texto C."""
+
+    def __init__(self, functions_ast):
+        # com nomes repetidos vale a última função, como no semântico
+        self.functions = list({func.name: func for func in functions_ast}.values())
+        self.float_buffers = 1
+
+    def source(self):
+        main = next((func for func in self.functions if func.name == "main"), None)
+        if main is None:
+            raise ExecutionError("[ERRO DE EXECUÇÃO] Função 'main' não existe")
+        check_arguments("main", len(main.params), 0)
+
+        definitions = [self.function(func) for func in self.functions]
+        lines = [f"#define PRT_FLOAT_BUFFERS {self.float_buffers}", PRELUDE]
+        lines += [self.signature(func) + ";" for func in self.functions]
+        for definition in definitions:
+            lines.append("")
+            lines += definition
+        lines += ["", "int main(void)", "{", f"    {_function_name('main')}();", "    return 0;", "}"]
+        return "\n".join(lines) + "\n"
+
+    def signature(self, func):
+        result = C_TYPES[func.return_type] if func.return_type else "void"
+        params = ", ".join(
+            f"{C_TYPES[type_name]} {_variable_name(name)}" for name, type_name, _ in func.params
+        ) or "void"
+        return f"static {result} {_function_name(func.name)}({params})"
+
+    def function(self, func):
+        self.live = dict.fromkeys(TEMPORARY_PREFIXES, 0)
+        self.used = dict.fromkeys(TEMPORARY_PREFIXES, 0)
+        self.prelude = None     # linhas das temporárias, em forma linear
+        self.temporaries = {}   # nome -> tipo
+
+        params = {name for name, _, _ in func.params}
+        declarations = []
+        for name, symbol in func.table.symbols.items():
+            if name not in params:
+                value = c_literal(default_value(symbol.type), symbol.type)
+                declarations.append(f"{C_TYPES[symbol.type]} {_variable_name(name)} = {value};")
+
+        body = self.visit(func.body)
+        for type_name, prefix in TEMPORARY_PREFIXES.items():
+            if self.used[type_name]:
+                names = ", ".join(f"{prefix}{k}" for k in range(self.used[type_name]))
+                declarations.append(f"{C_TYPES[type_name]} {names};")
+        if func.return_type:
+            default = default_value(func.return_type)
+            body.append(f"return {c_literal(default, func.return_type)};")
+
+        return ([self.signature(func), "{"]
+                + ["    " + line for line in declarations + body] + ["}"])
+
+    def statement(self, expressions, build, effects=2):
+        """Gera as expressões do comando (em forma linear se for preciso) e
+        as linhas de 'build(valores)'"""
+        linear = _effects(expressions, effects) or any(too_deep(expr, MAX_NESTING) for expr in expressions)
+        self.prelude = [] if linear else None
+        for type_name in self.live:
+            self.live[type_name] = 0
+        values = []
+        for expr in expressions:
+            values.append((yield expr))
+        prelude, self.prelude = self.prelude or [], None
+        return prelude, build(*values)
+
+    def simple(self, expressions, build, effects=2):
+        """statement() para comandos que são uma linha só"""
+        prelude, lines = yield from self.statement(expressions, build, effects)
+        if not prelude:
+            return lines
+        return ["{"] + ["    " + line for line in prelude + lines] + ["}"]
+
+    def value(self, code, type_name, operands):
+        """Resultado de uma operação; em forma linear, vai para uma
+        temporária (usadas como uma pilha por tipo, como no transpiler.py)"""
+        if self.prelude is None:
+            return code
+        for operand in operands:
+            if operand in self.temporaries:
+                self.live[self.temporaries[operand]] -= 1
+        index = self.live[type_name]
+        self.live[type_name] += 1
+        self.used[type_name] = max(self.used[type_name], self.live[type_name])
+        name = f"{TEMPORARY_PREFIXES[type_name]}{index}"
+        self.temporaries[name] = type_name
+        self.prelude.append(f"{name} = {code};")
+        return name
+
+    # comandos
+
+    def visit_BlockNode(self, block):
+        lines = []
+        for cmd in block.commands:
+            if isinstance(cmd, STATEMENTS):
+                lines += yield cmd
+            elif isinstance(cmd, EXPRESSIONS):
+                lines += yield from self.simple([cmd], lambda value: [f"{value};"])
+        return lines
+
+    def visit_AssignNode(self, cmd):
+        target = _variable_name(cmd.name)
+        return (yield from self.simple([cmd.expr], lambda value: [f"{target} = {value};"]))
+
+    def visit_PrintNode(self, cmd):
+        pieces, args = print_pieces(cmd)
+        if any("\0" in piece for piece in pieces):
+            raise ExecutionError(
+                f"[ERRO DE EXECUÇÃO] O backend C não aceita '\\0' no texto do println (linha {cmd.line})"
+            )
+        floats = sum(1 for arg in args if arg.type == "float")
+        self.float_buffers = max(self.float_buffers, floats)
+
+        def build(*values):
+            text = pieces[0].replace("%", "%%")
+            arguments = []
+            for piece, value, arg in zip(pieces[1:], values, args):
+                text += PRINTF_FORMATS[arg.type] + piece.replace("%", "%%")
+                arguments.append(f"prt_float({value})" if arg.type == "float" else value)
+            return [f"printf({', '.join([c_string(text)] + arguments)});"]
+
+        # uma chamada dentro do printf poderia reusar os buffers de prt_float
+        # de outro argumento: com floats, qualquer chamada vai antes
+        return (yield from self.simple(args, build, 1 if floats else 2))
+
+    def visit_ReturnNode(self, cmd):
+        return (yield from self.simple([cmd.expr], lambda value: [f"return {value};"]))
+
+    def visit_IfNode(self, cmd):
+        then_body = yield cmd.then_body
+        else_body = (yield cmd.else_body) if cmd.else_body is not None else None
+        prelude, (cond,) = yield from self.statement([cmd.cond], lambda cond: [cond])
+
+        lines = [f"if ({cond}) {{"] + ["    " + line for line in then_body]
+        if else_body is not None:
+            lines += ["} else {"] + ["    " + line for line in else_body]
+        lines.append("}")
+        if prelude:
+            lines = ["{"] + ["    " + line for line in prelude + lines] + ["}"]
+        return lines
+
+    def visit_WhileNode(self, cmd):
+        body = yield cmd.body
+        prelude, (cond,) = yield from self.statement([cmd.cond], lambda cond: [cond])
+        if not prelude:
+            return [f"while ({cond}) {{"] + ["    " + line for line in body] + ["}"]
+
+        # condição em forma linear: recalculada no começo de cada volta
+        inner = prelude + [f"if (!({cond}))", "    break;"] + body
+        return ["for (;;) {"] + ["    " + line for line in inner] + ["}"]
+
+    # expressões
+
+    def visit_VarNode(self, expr):
+        return _variable_name(expr.name)
+
+    def visit_IntConstNode(self, expr):
+        return c_literal(expr.value, "int")
+
+    def visit_FloatConstNode(self, expr):
+        return c_literal(expr.value, "float")
+
+    def visit_CharConstNode(self, expr):
+        return c_char(decode_char(expr.value))
+
+    def visit_StringNode(self, expr):
+        return c_string(decode_string(expr.value))
+
+    def visit_BinaryOpNode(self, expr):
+        left = yield expr.left
+        right = yield expr.right
+        operands = (left, right)
+        if expr.op in ARITHMETIC:
+            return self.value(f"({left} {ARITHMETIC[expr.op]} {right})", expr.type, operands)
+        if expr.op in COMPARISONS:
+            op = COMPARISONS[expr.op]
+            if expr.left.type == "string":
+                return self.value(f"((long long)(strcmp({left}, {right}) {op} 0))", "int", operands)
+            # em C a comparação dá int; P espera um inteiro de 64 bits
+            return self.value(f"((long long)({left} {op} {right}))", "int", operands)
+        divide = "prt_div_int" if expr.type == "int" else "prt_div_float"
+        return self.value(f"{divide}({left}, {right}, {expr.line})", expr.type, operands)
+
+    def visit_UnaryOpNode(self, expr):
+        count = 0
+        node = expr
+        while isinstance(node, UnaryOpNode):
+            count += 1
+            node = node.expr
+        value = yield node
+        if count % 2 == 0:
+            return value
+        return self.value(f"(-{value})", expr.type, (value,))
+
+    def visit_CallNode(self, expr):
+        args = []
+        for arg in expr.args:
+            args.append((yield arg))
+        code = f"{_function_name(expr.name)}({', '.join(args)})"
+        if expr.type is None:
+            # chamada de função sem tipo de retorno: só pode ser um comando
+            return code
+        return self.value(code, expr.type, args)
+
+    def generic_visit(self, node):
+        raise ExecutionError(
+            f"[ERRO DE EXECUÇÃO] Nó {type(node).__name__} não pode ser traduzido para C"
+        )
+
+
+def c_source(functions_ast):
+    check_types(functions_ast)
+    return CGenerator(functions_ast).source()
+
+
+_cc_version = None
+
+
+def cc_version():
+    """Primeira linha de 'cc --version' (entra na chave do cache)"""
+    global _cc_version
+    if _cc_version is None:
+        try:
+            saida = subprocess.run([*shlex.split(CC), "--version"], capture_output=True, text=True)
+            _cc_version = (saida.stdout or saida.stderr).splitlines()[0] if saida.returncode == 0 else CC
+        except (OSError, IndexError):
+            _cc_version = CC
+    return _cc_version
+
+
+def build(source, executable):
+    """Compila o C com o cc do sistema"""
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo = os.path.join(pasta, "programa.c")
+        with open(arquivo, "w", encoding="utf-8") as f:
+            f.write(source)
+        comando = [*shlex.split(CC), *CFLAGS, "-o", executable, arquivo, *LIBS]
+        try:
+            saida = subprocess.run(comando, capture_output=True, text=True)
+        except OSError as erro:
+            raise ExecutionError(f"[ERRO DE EXECUÇÃO] Não foi possível rodar '{CC}': {erro}") from None
+        if saida.returncode != 0:
+            raise ExecutionError(
+                f"[ERRO DE EXECUÇÃO] '{CC}' falhou:\n{saida.stderr.strip()}"
+            )
+
+
+def native_executable(caminho, cache=None, destino=None, otimizar=False):
+    """Executável nativo de um .p (gerado ou do cache); None se o .p tem
+    erros. Sem 'destino', o executável vai para um arquivo temporário;
+    'otimizar' passa o optimizer.py na AST."""
+    with open(caminho, 'rb') as f:
+        dados = f.read()
+    temporario = destino is None
+    if temporario:
+        fd, destino = tempfile.mkstemp(prefix="p_", suffix=".bin")
+        os.close(fd)
+    try:
+        executavel = _gerar_executavel(caminho, dados, cache, destino, otimizar)
+    except BaseException:
+        if temporario:
+            os.unlink(destino)
+        raise
+    if executavel is None and temporario:
+        os.unlink(destino)
+    return executavel
+
+
+def _gerar_executavel(caminho, dados, cache, destino, otimizar):
+    """Grava o executável em 'destino'; None se o .p tem erros"""
+    chave = None
+    if cache is not None:
+        identificacao = f"{cc_version()}\0{' '.join(CFLAGS + LIBS)}\0".encode()
+        modulos = (sys.modules[__name__], runtime) + ((optimizer,) if otimizar else ())
+        chave = cache.chave(identificacao + dados, modulos)
+        guardado = cache.obter(chave)
+        if guardado is not None:
+            with open(destino, 'wb') as f:
+                f.write(guardado)
+            os.chmod(destino, 0o755)
+            return destino
+
+    funcoes = load_program(caminho, otimizar)
+    if funcoes is None:
+        return None
+    build(c_source(funcoes), destino)
+    if chave is not None:
+        with open(destino, 'rb') as f:
+            cache.guardar(chave, f.read())
+    return destino
+
+
+def run_native(executable):
+    """Roda o executável (com a saída no terminal); retorna o código de saída"""
+    resultado = subprocess.run([os.path.abspath(executable)])
+    if resultado.returncode < 0:
+        print(f"[ERRO DE EXECUÇÃO] O programa terminou com o sinal {-resultado.returncode} "
+              f"(recursão profunda demais?)", file=sys.stderr)
+        return 1
+    return resultado.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compila um programa P para C e o executa")
+    parser.add_argument("arquivo", help="arquivo .p")
+    parser.add_argument("--cache", help="diretório do cache de executáveis")
+    parser.add_argument("-o", dest="saida", metavar="EXECUTAVEL",
+                        help="grava o executável em vez de executar")
+    parser.add_argument("--fonte", action="store_true", help="mostra o C gerado em vez de executar")
+    parser.add_argument("--tempo", action="store_true", help="mostra o tempo de execução")
+    parser.add_argument("--otimizar", action="store_true", help="passa o optimizer.py antes")
+    args = parser.parse_args()
+
+    try:
+        if args.fonte:
+            funcoes = load_program(args.arquivo, args.otimizar)
+            if funcoes is None:
+                sys.exit(1)
+            print(c_source(funcoes), end="")
+            return
+
+        inicio = time.perf_counter()
+        cache = CacheCompilacao(args.cache) if args.cache else None
+        executavel = native_executable(args.arquivo, cache, args.saida, args.otimizar)
+        if executavel is None:
+            sys.exit(1)
+    except ExecutionError as erro:
+        print(erro, file=sys.stderr)
+        sys.exit(1)
+    if args.saida:
+        return
+
+    try:
+        compilado = time.perf_counter()
+        codigo = run_native(executavel)
+        fim = time.perf_counter()
+    finally:
+        os.remove(executavel)
+
+    if args.tempo:
+        print(f"compilação {(compilado - inicio) * 1000:.2f} ms, "
+              f"execução {(fim - compilado) * 1000:.2f} ms", file=sys.stderr)
+    sys.exit(codigo)
+
+
+if __name__ == "__main__":
+    main()
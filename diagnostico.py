@@ -0,0 +1,22 @@
+# diagnostico.py
+#
+# Mensagem de erro (sintático ou semântico) com a linha guardada à parte.
+# É uma str, então quem só mostra ou grava os erros (pipeline.py, JSON,
+# cache) não muda; o texto vem do modelo com '{linha}' trocado pela linha.
+# Quem precisa da linha (incremental.py, ao reaproveitar uma função que
+# mudou de lugar) usa o atributo, sem procurar números dentro do texto.
+
+
+class Diagnostico(str):
+    def __new__(cls, modelo, linha):
+        texto = super().__new__(cls, modelo.replace("{linha}", str(linha)))
+        texto.modelo = modelo
+        texto.linha = linha
+        return texto
+
+    def deslocar(self, delta):
+        """O mesmo diagnóstico 'delta' linhas abaixo"""
+        return Diagnostico(self.modelo, self.linha + delta)
+
+    def __getnewargs__(self):
+        return self.modelo, self.linha
@@ -0,0 +1,186 @@
+# grammar.py
+#
+# Gramática da linguagem P, como dados (formato em ll1.py), e a tabela
+# LL(1) gerada a partir dela. O Parser de main2.py só executa a tabela:
+# para estender a linguagem, basta mexer aqui (produções, operadores e as
+# ações '@nome', que são os métodos act_nome do Parser).
+#
+#     python grammar.py     mostra FIRST/FOLLOW e a tabela gerada
+
+from p_ast import BinaryOpNode, UnaryOpNode
+from ll1 import LL1Table
+from TipoToken import TipoToken
+
+
+# Tabela de operadores das expressões.
+# Binários: tipo -> (precedência, associatividade, construtor do nó).
+# Prefixos: tipo -> (precedência, construtor); a precedência é maior que a de
+# qualquer binário, então '-a * b' é '(-a) * b'.
+LEFT, RIGHT = "LEFT", "RIGHT"
+
+BINARY_OPERATORS = {
+    TipoToken.EQ:    (1, LEFT, BinaryOpNode),
+    TipoToken.NE:    (1, LEFT, BinaryOpNode),
+    TipoToken.LT:    (2, LEFT, BinaryOpNode),
+    TipoToken.GT:    (2, LEFT, BinaryOpNode),
+    TipoToken.LE:    (2, LEFT, BinaryOpNode),
+    TipoToken.GE:    (2, LEFT, BinaryOpNode),
+    TipoToken.PLUS:  (3, LEFT, BinaryOpNode),
+    TipoToken.MINUS: (3, LEFT, BinaryOpNode),
+    TipoToken.MULT:  (4, LEFT, BinaryOpNode),
+    TipoToken.DIV:   (4, LEFT, BinaryOpNode),
+}
+
+PREFIX_OPERATORS = {
+    TipoToken.MINUS: (5, UnaryOpNode),
+}
+
+# Operandos das expressões
+ATOMS = [
+    ("@variable", TipoToken.ID, "CallSuffix"),
+    ("@int", TipoToken.INT_CONST),
+    ("@float", TipoToken.FLOAT_CONST),
+    ("@char", TipoToken.CHAR_LITERAL),
+    ("@string", TipoToken.FMT_STRING),
+    (TipoToken.LBRACKET, "Expression", TipoToken.RBRACKET),
+]
+
+
+def _expression_rules():
+    """Um não-terminal por nível de precedência (o mais fraco é
+    'Expression'), cada um com sua cauda:
+
+        Nível     -> Operando NívelTail
+        NívelTail -> op Operando @binary NívelTail | ε     (à esquerda)
+        NívelTail -> op Nível @binary | ε                  (à direita)
+
+    'ExpressionRest' é o que vem depois de um operando já lido (as caudas,
+    do nível mais forte para o mais fraco) e 'NonIdUnary' é uma expressão
+    que não começa com ID; os dois servem para o comando que começa com ID
+    ('x = ...' ou uma expressão) continuar LL(1).
+    """
+    levels = sorted({prec for prec, _, _ in BINARY_OPERATORS.values()})
+    names = ["Expression"] + [f"Expression{prec}" for prec in levels[1:]]
+
+    def operand_for(prec):
+        """Nível mais fraco cujos operadores têm precedência >= prec"""
+        for name, level in zip(names, levels):
+            if level >= prec:
+                return name
+        return "Unary"
+
+    rules = {}
+    for i, (name, prec) in enumerate(zip(names, levels)):
+        operand = names[i + 1] if i + 1 < len(names) else "Unary"
+        tail = name + "Tail"
+        rules[name] = [(operand, tail)]
+        rules[tail] = []
+        for op, (op_prec, assoc, _) in BINARY_OPERATORS.items():
+            if op_prec != prec:
+                continue
+            if assoc == LEFT:
+                rules[tail].append(("@operator", op, operand, "@binary", tail))
+            else:
+                rules[tail].append(("@operator", op, name, "@binary"))
+        rules[tail].append(())
+
+    prefixes = [
+        ("@operator", op, operand_for(prec), "@unary")
+        for op, (prec, _) in PREFIX_OPERATORS.items()
+    ]
+    non_id_atoms = [a for a in ATOMS if TipoToken.ID not in a[:2]]
+
+    rules["Unary"] = prefixes + [("Atom",)]
+    rules["NonIdUnary"] = prefixes + [("NonIdAtom",)]
+    rules["Atom"] = list(ATOMS)
+    rules["NonIdAtom"] = non_id_atoms
+    rules["ExpressionRest"] = [tuple(name + "Tail" for name in reversed(names))]
+    return rules
+
+
+GRAMMAR = {
+    "Program": [("Function", "Program"), ()],
+
+    "Function": [(TipoToken.FN, "@name", "Header", "Block", "@function")],
+    "Header": [("Name", TipoToken.LBRACKET, "Params", TipoToken.RBRACKET, "ReturnType")],
+    "Name": [(TipoToken.ID,), (TipoToken.MAIN,)],
+    "ReturnType": [(TipoToken.ARROW, "@type", "Type", "@return_type"), ()],
+    "Params": [("Param", "ParamsTail"), ()],
+    "ParamsTail": [(TipoToken.COMMA, "Param", "ParamsTail"), ()],
+    "Param": [("@param_name", TipoToken.ID, TipoToken.COLON, "@type", "Type", "@param")],
+    "Type": [(TipoToken.INT,), (TipoToken.FLOAT,), (TipoToken.CHAR,)],
+
+    "Block": [(TipoToken.LBRACE, "@block", "Commands", TipoToken.RBRACE, "@block_end")],
+    "Commands": [("Command", "Commands"), ()],
+
+    # o nó de cada comando entra no bloco (@command) antes do ';', então um
+    # ';' faltando não descarta o comando
+    "Command": [
+        (TipoToken.LET, "@declaration", "Identifiers", TipoToken.COLON,
+         "@type", "Type", "@declare", TipoToken.SEMICOLON),
+        ("@print", TipoToken.PRINTLN, TipoToken.LBRACKET, "Arguments",
+         TipoToken.RBRACKET, "@command", TipoToken.SEMICOLON),
+        ("@line", TipoToken.RETURN, "Expression", "@return", "@command", TipoToken.SEMICOLON),
+        ("@variable", TipoToken.ID, "IdCommand", "@command", TipoToken.SEMICOLON),
+        ("NonIdUnary", "ExpressionRest", "@command", TipoToken.SEMICOLON),
+        ("IfCommand", "@command"),
+        ("@line", TipoToken.WHILE, "Condition", "Block", "@while", "@command"),
+    ],
+    # 'else if' vira um bloco com o if dentro
+    "IfCommand": [("@line", TipoToken.IF, "Condition", "Block", "ElsePart", "@if")],
+    "ElsePart": [(TipoToken.ELSE, "ElseBody"), ("@no_else",)],
+    "ElseBody": [("Block",), ("IfCommand", "@else_if")],
+    "Condition": [("Expression",)],
+    "IdCommand": [(TipoToken.ASSIGN, "Expression", "@assign"), ("CallSuffix", "ExpressionRest")],
+    "CallSuffix": [("@call", TipoToken.LBRACKET, "Arguments", TipoToken.RBRACKET), ()],
+    "Identifiers": [("@identifier", TipoToken.ID, "IdentifiersTail")],
+    "IdentifiersTail": [(TipoToken.COMMA, "@identifier", TipoToken.ID, "IdentifiersTail"), ()],
+    "Arguments": [("Expression", "@argument", "ArgumentsTail"), ()],
+    "ArgumentsTail": [(TipoToken.COMMA, "Expression", "@argument", "ArgumentsTail"), ()],
+
+    **_expression_rules(),
+}
+
+
+# Recuperação de erros em modo pânico: depois de um erro, os tokens são
+# descartados até um destes conjuntos de sincronização
+SYNC_FUNCTION = (TipoToken.FN, TipoToken.EOF)
+SYNC_HEADER = (TipoToken.LBRACE,)
+SYNC_COMMAND = (
+    TipoToken.SEMICOLON, TipoToken.RBRACE, TipoToken.LET,
+    TipoToken.PRINTLN, TipoToken.RETURN, TipoToken.IF, TipoToken.WHILE
+)
+SYNC_CONDITION = (TipoToken.LBRACE,)
+
+# Quadros: um erro dentro destes não-terminais (ou logo no primeiro token)
+# descarta o que já foi lido deles e o parser continua logo depois
+# (não-terminal -> (sincronização, token consumido ao sincronizar))
+FRAMES = {
+    "Command": (SYNC_COMMAND, TipoToken.SEMICOLON),
+    "Header": (SYNC_HEADER, None),
+    "Condition": (SYNC_CONDITION, None),
+}
+
+# Quadros que deixam um valor na pilha de valores: quando um deles é
+# descartado, None fica no lugar (a condição de um if/while com erro)
+FRAME_VALUES = {"Condition"}
+
+# Não-terminais que, num token inesperado, sincronizam e tentam de novo
+RETRY = {
+    "Commands": (SYNC_COMMAND, TipoToken.SEMICOLON),
+    "Block": (SYNC_HEADER, None),
+}
+
+# Mensagens de erro por não-terminal (o padrão lista os tokens esperados)
+_EXPRESSION_ERROR = "Expressão inválida começando com {kind}"
+ERROR_MESSAGES = {
+    "Commands": "Comando inválido começando com {kind}",
+    **{nt: _EXPRESSION_ERROR for nt in GRAMMAR
+       if nt.startswith("Expression") or "Unary" in nt or "Atom" in nt or nt == "Condition"},
+}
+
+TABLE = LL1Table(GRAMMAR, "Program", strict=RETRY)
+
+
+if __name__ == "__main__":
+    print(TABLE.describe())
@@ -0,0 +1,247 @@
+# incremental.py
+#
+# Análise sintática e semântica incremental, por função.
+#
+# Cada chamada de Parser.function_decl consome um trecho contíguo de tokens
+# (um "segmento": normalmente uma função inteira) e o resultado dela só
+# depende desses tokens. Entre uma análise e a próxima guardamos, para cada
+# segmento, o texto-fonte exato que ele cobriu; se o mesmo texto aparece de
+# novo, a FunctionNode (já com os tipos anotados), a tabela de símbolos e os
+# erros são reaproveitados sem rodar o parser nem o semântico. Só os
+# segmentos alterados (e os que usam uma função cuja assinatura mudou) são
+# analisados de novo, contra o índice de assinaturas do programa inteiro.
+
+from diagnostico import Diagnostico
+from p_ast import ASTNode
+from main2 import Parser
+from semantic import SemanticAnalyzer, build_signatures, redefinition_errors
+from TipoToken import TipoToken
+from buffer_tokens import relexar, analisar_para_buffer
+
+
+class Segmento:
+    """Resultado de uma chamada de function_decl e o texto que a originou"""
+
+    def __init__(self, chave, texto, n_tokens, linha, funcao, tabela,
+                 erros_sintaticos, erros_semanticos, assinatura, referencias, ate_eof):
+        self.chave = chave
+        self.texto = texto
+        self.n_tokens = n_tokens
+        self.linha = linha
+        self.funcao = funcao
+        self.tabela = tabela
+        self.erros_sintaticos = erros_sintaticos
+        self.erros_semanticos = erros_semanticos
+        self.assinatura = assinatura
+        self.referencias = referencias
+        # o parser parou no EOF: o texto não diz que nada vinha depois
+        self.ate_eof = ate_eof
+
+
+class AnaliseIncremental:
+    """Guarda os segmentos da última análise para reaproveitá-los na próxima.
+
+    analisar(tokens) recebe um BufferTokens (precisa das posições no
+    código-fonte) e devolve o mesmo que Parser.parse + SemanticAnalyzer:
+    (erros_sintaticos, tabelas, funcoes, erros_semanticos).
+    """
+
+    def __init__(self):
+        self.segmentos = {}      # chave -> [Segmento]
+        self.assinaturas = {}    # nome da função -> texto do cabeçalho
+        self.reaproveitados = 0
+        self.reanalisados = 0
+
+    def analisar(self, tokens):
+        parser = Parser(tokens)
+        segmentos = []
+        reaproveitados = set()
+        self.reaproveitados = self.reanalisados = 0
+
+        while parser.kind() != TipoToken.EOF:
+            segmento = self._reaproveitar(tokens, parser.pos, reaproveitados)
+            if segmento is None:
+                segmento = self._analisar_segmento(parser)
+            else:
+                parser.pos += segmento.n_tokens
+                reaproveitados.add(id(segmento))
+                self.reaproveitados += 1
+            segmentos.append(segmento)
+
+        # funções cuja assinatura mudou, sumiu ou apareceu
+        assinaturas = {s.funcao.name: s.assinatura for s in segmentos if s.funcao}
+        alteradas = {
+            nome for nome in assinaturas.keys() | self.assinaturas.keys()
+            if assinaturas.get(nome) != self.assinaturas.get(nome)
+        }
+        self.assinaturas = assinaturas
+
+        # semântico dos segmentos novos e dos que usam uma dessas funções
+        indice = build_signatures([s.funcao for s in segmentos if s.funcao])
+        for segmento in segmentos:
+            if not segmento.funcao:
+                continue
+            if id(segmento) not in reaproveitados or segmento.referencias & alteradas:
+                segmento.erros_semanticos = _checar(segmento.funcao, indice)
+
+        self.segmentos = {}
+        for segmento in segmentos:
+            self.segmentos.setdefault(segmento.chave, []).append(segmento)
+
+        # nomes repetidos dependem do programa inteiro: calculados sempre
+        redefinidas = redefinition_errors([s.funcao for s in segmentos if s.funcao])
+
+        erros_sintaticos, tabelas, funcoes, erros_semanticos = [], [], [], []
+        for segmento in segmentos:
+            erros_sintaticos.extend(segmento.erros_sintaticos)
+            if segmento.tabela:
+                tabelas.append(segmento.tabela)
+            if segmento.funcao:
+                funcoes.append(segmento.funcao)
+                if id(segmento.funcao) in redefinidas:
+                    erros_semanticos.append(redefinidas[id(segmento.funcao)])
+            erros_semanticos.extend(segmento.erros_semanticos)
+
+        return erros_sintaticos, tabelas, funcoes, erros_semanticos
+
+    def _reaproveitar(self, tokens, pos, reaproveitados):
+        """Segmento anterior (ainda não usado) cujo texto é igual ao que
+        começa em 'pos'"""
+        candidatos = self.segmentos.get(_chave(tokens, pos))
+        if not candidatos:
+            return None
+
+        inicio = tokens.inicios[pos]
+        for segmento in candidatos:
+            if id(segmento) in reaproveitados:
+                continue
+            if segmento.ate_eof and _tipo(tokens, pos + segmento.n_tokens) != TipoToken.EOF:
+                continue
+            if tokens.fonte[inicio:inicio + len(segmento.texto)] == segmento.texto:
+                _deslocar_linhas(segmento, tokens.linha(pos) - segmento.linha)
+                return segmento
+        return None
+
+    def _analisar_segmento(self, parser):
+        tokens = parser.tokens
+        pos = parser.pos
+        n_erros, n_tabelas = len(parser.errors), len(parser.tables)
+
+        funcao = parser.function_decl()
+        self.reanalisados += 1
+
+        # o token onde o parser parou também entra no texto: a recuperação
+        # de erros decide onde parar olhando para ele
+        fim = min(parser.pos, len(tokens)) - 1
+        parada = min(parser.pos, len(tokens) - 1)
+        texto = tokens.fonte[tokens.inicios[pos]:tokens.fins[parada] + 1]
+
+        return Segmento(
+            _chave(tokens, pos), texto, parser.pos - pos, tokens.linha(pos),
+            funcao,
+            parser.tables[n_tabelas] if len(parser.tables) > n_tabelas else None,
+            parser.errors[n_erros:],
+            [],  # preenchido depois, com as assinaturas de todas as funções
+            _assinatura(tokens, pos, parser.pos),
+            {tokens.lexema(i) for i in range(pos, fim + 1) if tokens.tipo(i) == TipoToken.ID},
+            _tipo(tokens, parser.pos) == TipoToken.EOF
+        )
+
+
+class Documento:
+    """Código-fonte aberto num editor: cada edição relexa só o trecho
+    alterado (buffer_tokens.relexar) e reanalisa só as funções afetadas."""
+
+    def __init__(self, codigo):
+        self.tokens, _ = analisar_para_buffer(codigo)
+        self.analise = AnaliseIncremental()
+        self.resultado = self.analise.analisar(self.tokens)
+
+    def editar(self, posicao, removidos, inseridos):
+        self.tokens = relexar(self.tokens, posicao, removidos, inseridos)[0]
+        self.resultado = self.analise.analisar(self.tokens)
+        return self.resultado
+
+    @property
+    def codigo(self):
+        return self.tokens.fonte
+
+    @property
+    def erros_lexicos(self):
+        return self.tokens.erros()
+
+
+def _chave(tokens, pos):
+    """Tipo do primeiro token e lexema do segundo (o nome, numa função)"""
+    return tokens.tipo(pos), tokens.lexema(pos + 1) if pos + 1 < len(tokens) else ""
+
+
+def _tipo(tokens, i):
+    return tokens.tipo(i) if i < len(tokens) else TipoToken.EOF
+
+
+def _checar(funcao, assinaturas):
+    sem = SemanticAnalyzer([funcao], assinaturas)
+    sem.check_function(funcao)
+    return sem.errors
+
+
+def _assinatura(tokens, inicio, fim):
+    """Texto do cabeçalho 'fn nome(...) -> tipo' (até o '{')"""
+    if tokens.tipo(inicio) != TipoToken.FN:
+        return None
+    i = inicio
+    while i < fim and i < len(tokens) and tokens.tipo(i) != TipoToken.LBRACE:
+        i += 1
+    return tokens.fonte[tokens.inicios[inicio]:tokens.inicios[min(i, len(tokens) - 1)]]
+
+
+# ----------------------------------------------------------------------------
+# Deslocamento de linhas de um segmento reaproveitado
+# ----------------------------------------------------------------------------
+
+def _deslocar_mensagem(mensagem, delta):
+    # só os Diagnostico têm linha no texto; as outras mensagens ficam iguais
+    return mensagem.deslocar(delta) if isinstance(mensagem, Diagnostico) else mensagem
+
+
+def _deslocar_linhas(segmento, delta):
+    """Atualiza, no lugar, as linhas da AST, da tabela e dos erros de um
+    segmento que foi reaproveitado numa posição diferente do arquivo"""
+    if not delta:
+        return
+    segmento.linha += delta
+
+    if segmento.funcao:
+        _deslocar_no(segmento.funcao, delta)
+        segmento.funcao.params = [
+            (nome, tipo, linha + delta) for nome, tipo, linha in segmento.funcao.params
+        ]
+    if segmento.tabela:
+        for simbolo in segmento.tabela.symbols.values():
+            simbolo.line += delta
+
+    segmento.erros_sintaticos = [
+        # linha 0 = erro depois do EOF, sem linha real
+        {"linha": e["linha"] + delta if e["linha"] else 0, "erro": _deslocar_mensagem(e["erro"], delta)}
+        for e in segmento.erros_sintaticos
+    ]
+    segmento.erros_semanticos = [
+        _deslocar_mensagem(e, delta) for e in segmento.erros_semanticos
+    ]
+
+
+def _deslocar_no(no, delta):
+    pilha = [no]
+    while pilha:
+        no = pilha.pop()
+        if isinstance(no, list):
+            pilha.extend(no)
+            continue
+        if not isinstance(no, ASTNode):
+            continue
+        for nome, valor in no.fields():
+            if nome == "line":
+                no.line = valor + delta
+            elif nome != "table":
+                pilha.append(valor)
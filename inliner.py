@@ -0,0 +1,200 @@
+# inliner.py
+#
+# Expansão (inline) das chamadas a funções pequenas. Uma função é candidata
+# quando não é recursiva (ver callgraph.py) e o corpo dela é só
+# 'return expressão;', com uma expressão de até INLINE_MAX_SIZE nós que só
+# usa os parâmetros. A chamada é trocada por uma cópia dessa expressão, com
+# cada parâmetro trocado pelo argumento correspondente e a linha da chamada
+# (os erros apontam para onde a função foi chamada).
+#
+# Roda sobre a AST já checada pelo semântico: os tipos anotados são
+# copiados junto. As funções são percorridas de baixo para cima no grafo de
+# chamadas, então uma função pequena que chama outra pequena já foi
+# expandida quando chega a vez de quem chama a primeira.
+#
+# Para o programa continuar fazendo a mesma coisa, uma chamada só é
+# expandida se:
+#   - o número de argumentos é o de parâmetros;
+#   - um argumento usado mais de uma vez na expressão é uma variável ou uma
+#     constante (nada é calculado duas vezes);
+#   - um argumento que tem chamadas ou divisões (que podem escrever ou
+#     parar o programa) é usado exatamente uma vez, é o único assim e a
+#     expressão da função não tem chamadas nem divisões (esses efeitos
+#     continuam acontecendo, e na mesma ordem).
+
+import copy
+
+from p_ast import (
+    ASTNode, VarNode, IntConstNode, FloatConstNode, CharConstNode, StringNode,
+    BinaryOpNode, UnaryOpNode, CallNode, ReturnNode
+)
+from callgraph import CallGraph
+from TipoToken import TipoToken
+from visitor import Visitor, Transformer
+
+INLINE_MAX_SIZE = 16
+
+# argumentos que podem ser repetidos
+LEAVES = (VarNode, IntConstNode, FloatConstNode, CharConstNode, StringNode)
+
+
+def expression_size(expr):
+    """Número de nós de uma expressão"""
+    size = 0
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, ASTNode):
+            size += 1
+            stack.extend(value for _, value in node.fields())
+    return size
+
+
+def is_pure(expr):
+    """A expressão não tem chamadas nem divisões (pode ser descartada)"""
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, CallNode):
+            return False
+        if isinstance(node, BinaryOpNode):
+            if node.op == TipoToken.DIV:
+                return False
+            stack += (node.left, node.right)
+        elif isinstance(node, UnaryOpNode):
+            stack.append(node.expr)
+    return True
+
+
+class InlineCandidate:
+    """Função 'fn f(params) { return expr; }' que pode ser expandida"""
+
+    def __init__(self, func, expr):
+        self.name = func.name
+        self.params = [name for name, _, _ in func.params]
+        self.expr = expr
+        self.pure = is_pure(expr)
+
+        self.uses = dict.fromkeys(self.params, 0)
+        for var in _variables(expr):
+            self.uses[var.name] += 1
+
+    @classmethod
+    def of(cls, func, graph, max_size=INLINE_MAX_SIZE):
+        """Candidata para a função, ou None se ela não pode ser expandida"""
+        if graph.is_recursive(func.name):
+            return None
+        commands = func.body.commands
+        if len(commands) != 1 or not isinstance(commands[0], ReturnNode):
+            return None
+        expr = commands[0].expr
+        if expr is None or expression_size(expr) > max_size:
+            return None
+
+        params = {name for name, _, _ in func.params}
+        if len(params) != len(func.params):
+            return None
+        if any(var.name not in params for var in _variables(expr)):
+            return None  # usa uma variável local
+        return cls(func, expr)
+
+    def accepts(self, args):
+        if len(args) != len(self.params):
+            return False
+
+        with_effects = 0
+        for param, arg in zip(self.params, args):
+            uses = self.uses[param]
+            if not is_pure(arg):
+                with_effects += 1
+                if uses != 1 or not self.pure:
+                    return False
+            elif uses > 1 and not isinstance(arg, LEAVES):
+                return False
+        return with_effects <= 1
+
+    def expand(self, call):
+        expansion = _Expansion(dict(zip(self.params, call.args)), call.line)
+        return expansion.visit(self.expr)
+
+
+def _variables(expr):
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, VarNode):
+            yield node
+        elif isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, ASTNode):
+            stack.extend(value for _, value in node.fields())
+
+
+class _Expansion(Visitor):
+    """Cópia da expressão da função, com os parâmetros trocados pelos
+    argumentos e a linha da chamada"""
+
+    def __init__(self, arguments, line):
+        self.arguments = arguments
+        self.line = line
+        self.used = set()
+
+    def visit_VarNode(self, node):
+        arg = self.arguments[node.name]
+        if node.name in self.used:
+            return copy.copy(arg)  # só acontece com variáveis e constantes
+        self.used.add(node.name)
+        return arg
+
+    def visit_ASTNode(self, node):
+        new = copy.copy(node)
+        for name, value in node.fields():
+            if isinstance(value, ASTNode):
+                setattr(new, name, (yield value))
+            elif isinstance(value, list):
+                items = []
+                for item in value:
+                    items.append((yield item))
+                setattr(new, name, items)
+        new.line = self.line
+        return new
+
+    def generic_visit(self, node):
+        return node
+
+
+class Inliner(Transformer):
+    def __init__(self, candidates):
+        self.candidates = candidates
+        self.inlined = 0
+
+    def visit_CallNode(self, node):
+        node = yield from self.generic_visit(node)  # argumentos primeiro
+        candidate = self.candidates.get(node.name)
+        if candidate is None or not candidate.accepts(node.args):
+            return node
+        self.inlined += 1
+        return candidate.expand(node)
+
+
+def inline_calls(functions_ast, max_size=INLINE_MAX_SIZE):
+    """Expande, no lugar, as chamadas a funções pequenas; retorna quantas
+    chamadas foram expandidas"""
+    graph = CallGraph(functions_ast)
+    inliner = Inliner({})
+
+    for name in graph.bottom_up():
+        func = graph.functions[name]
+        inliner.visit(func)
+        candidate = InlineCandidate.of(func, graph, max_size)
+        if candidate:
+            inliner.candidates[name] = candidate
+
+    # funções com o nome repetido (fora do grafo)
+    for func in functions_ast:
+        if graph.functions[func.name] is not func:
+            inliner.visit(func)
+
+    return inliner.inlined
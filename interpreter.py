@@ -0,0 +1,429 @@
+# interpreter.py
+#
+# Execução de programas P. Cada nó da AST (já checada pelo semântico) é
+# compilado uma única vez numa closure Python, e rodar o programa é só
+# chamar essas closures: o que fazer em cada nó (a classe do nó, o
+# operador, o tipo dos operandos, se um operando é variável ou constante)
+# é decidido na compilação, não a cada avaliação.
+#
+# As closures de expressão recebem o quadro da função (lista com uma
+# posição por variável, ver runtime.py) e retornam o valor. As de comando
+# retornam None ou, num return, a tupla (valor,), que sobe pelos blocos até
+# a chamada da função.
+#
+#     python interpreter.py programa.p [--tempo]
+
+import argparse
+import operator
+import sys
+import time
+
+from p_ast import BinaryOpNode, UnaryOpNode
+from runtime import (
+    STATEMENTS, EXPRESSIONS, ExecutionError, check_arguments, check_types, default_value,
+    frame_layout, int_div, formatter, decode_char, decode_string, print_pieces, load_program
+)
+from TipoToken import TipoToken
+from visitor import Visitor
+
+# operandos compilados: (SLOT, posição no quadro), (CONST, valor) ou
+# (CODE, closure)
+SLOT, CONST, CODE = 0, 1, 2
+
+# cadeias 'a + b + c + ...' com pelo menos isto de operações viram um laço,
+# em vez de uma closure dentro da outra
+CHAIN_MIN = 16
+
+ARITHMETIC = {
+    TipoToken.PLUS: operator.add,
+    TipoToken.MINUS: operator.sub,
+    TipoToken.MULT: operator.mul,
+}
+
+COMPARISONS = {
+    TipoToken.EQ: operator.eq,
+    TipoToken.NE: operator.ne,
+    TipoToken.LT: operator.lt,
+    TipoToken.GT: operator.gt,
+    TipoToken.LE: operator.le,
+    TipoToken.GE: operator.ge,
+}
+
+
+def _as_int(compare):
+    return lambda a, b: 1 if compare(a, b) else 0
+
+
+_INT_COMPARISONS = {op: _as_int(compare) for op, compare in COMPARISONS.items()}
+
+
+def _divider(integer, line):
+    def divide(a, b):
+        if b == 0:
+            raise ExecutionError(f"[ERRO DE EXECUÇÃO] Divisão por zero (linha {line})")
+        return int_div(a, b) if integer else a / b
+    return divide
+
+
+def _closure(operand):
+    kind, value = operand
+    if kind == SLOT:
+        return operator.itemgetter(value)
+    if kind == CONST:
+        return lambda frame: value
+    return value
+
+
+def _binary(function, left, right):
+    """Closure de 'function(esquerda, direita)', especializada para
+    variáveis e constantes"""
+    left_kind, a = left
+    right_kind, b = right
+    if left_kind == SLOT and right_kind == SLOT:
+        return lambda frame: function(frame[a], frame[b])
+    if left_kind == SLOT and right_kind == CONST:
+        return lambda frame: function(frame[a], b)
+    if left_kind == CONST and right_kind == SLOT:
+        return lambda frame: function(a, frame[b])
+
+    left = _closure(left)
+    if right_kind == CONST:
+        return lambda frame: function(left(frame), b)
+    if right_kind == SLOT:
+        return lambda frame: function(left(frame), frame[b])
+    right = _closure(right)
+    return lambda frame: function(left(frame), right(frame))
+
+
+def _nothing(frame):
+    return None
+
+
+def _discard(value):
+    def statement(frame):
+        value(frame)
+    return statement
+
+
+def _block(statements):
+    """Junta (closure, pode retornar) de vários comandos num só"""
+    code = [statement for statement, _ in statements]
+    can_return = any(returns for _, returns in statements)
+    if not code:
+        return _nothing, False
+    if len(code) == 1:
+        return statements[0]
+
+    if not can_return:
+        def block(frame):
+            for statement in code:
+                statement(frame)
+        return block, False
+
+    def block(frame):
+        for statement in code:
+            result = statement(frame)
+            if result is not None:
+                return result
+    return block, True
+
+
+class CompiledFunction:
+    def __init__(self, func):
+        self.name = func.name
+        self.slots, self.template = frame_layout(func)
+        self.n_params = len(func.params)
+        self.default = default_value(func.return_type)
+        self.body = _nothing
+
+    def __call__(self, *args):
+        frame = self.template[:]
+        frame[:self.n_params] = args
+        result = self.body(frame)
+        return result[0] if result is not None else self.default
+
+
+class ClosureCompiler(Visitor):
+    """Compila as funções do programa em closures. Expressões viram
+    operandos (SLOT/CONST/CODE), comandos viram (closure, pode retornar)."""
+
+    def __init__(self, functions_ast, write):
+        self.write = write
+        self.functions = {func.name: CompiledFunction(func) for func in functions_ast}
+        for func in functions_ast:
+            self.current = self.functions[func.name]
+            self.functions[func.name].body = self.visit(func.body)[0]
+
+    # comandos
+
+    def visit_BlockNode(self, block):
+        statements = []
+        for cmd in block.commands:
+            if isinstance(cmd, STATEMENTS):
+                statements.append((yield cmd))
+            elif isinstance(cmd, EXPRESSIONS):
+                # expressão usada como comando: avalia e descarta o valor
+                statements.append((_discard(_closure((yield cmd))), False))
+        return _block(statements)
+
+    def visit_AssignNode(self, cmd):
+        slot = self.current.slots[cmd.name]
+        kind, value = yield cmd.expr
+        if kind == CONST:
+            def assign(frame):
+                frame[slot] = value
+        elif kind == SLOT:
+            def assign(frame):
+                frame[slot] = frame[value]
+        else:
+            def assign(frame):
+                frame[slot] = value(frame)
+        return assign, False
+
+    def visit_PrintNode(self, cmd):
+        pieces, args = print_pieces(cmd)
+        parts = []
+        for arg in args:
+            parts.append((_closure((yield arg)), formatter(arg.type)))
+        write = self.write
+
+        if not parts:
+            text = pieces[0]
+
+            def println(frame):
+                write(text)
+        elif len(parts) == 1:
+            (value, fmt), (before, after) = parts[0], pieces
+
+            if fmt is None:
+                def println(frame):
+                    write(before + value(frame) + after)
+            else:
+                def println(frame):
+                    write(before + fmt(value(frame)) + after)
+        else:
+            texts = [(before, value, fmt or str) for before, (value, fmt) in zip(pieces, parts)]
+            end = pieces[-1]
+
+            def println(frame):
+                write("".join([before + fmt(value(frame)) for before, value, fmt in texts]) + end)
+        return println, False
+
+    def visit_ReturnNode(self, cmd):
+        kind, value = yield cmd.expr
+        if kind == CONST:
+            result = (value,)
+
+            def return_(frame):
+                return result
+        else:
+            value = _closure((kind, value))
+
+            def return_(frame):
+                return (value(frame),)
+        return return_, True
+
+    def visit_IfNode(self, cmd):
+        cond = yield from self.condition(cmd.cond)
+        then_body, then_returns = yield cmd.then_body
+        if cmd.else_body is None:
+            if then_returns:
+                def if_(frame):
+                    if cond(frame):
+                        return then_body(frame)
+            else:
+                def if_(frame):
+                    if cond(frame):
+                        then_body(frame)
+            return if_, then_returns
+
+        else_body, else_returns = yield cmd.else_body
+
+        def if_else(frame):
+            return then_body(frame) if cond(frame) else else_body(frame)
+        return if_else, then_returns or else_returns
+
+    def visit_WhileNode(self, cmd):
+        cond = yield from self.condition(cmd.cond)
+        body, returns = yield cmd.body
+        if not returns:
+            def while_(frame):
+                while cond(frame):
+                    body(frame)
+        else:
+            def while_(frame):
+                while cond(frame):
+                    result = body(frame)
+                    if result is not None:
+                        return result
+        return while_, returns
+
+    def condition(self, expr):
+        """Closure da condição de um if/while; uma comparação devolve o bool
+        direto, sem passar por 0/1"""
+        if isinstance(expr, BinaryOpNode) and expr.op in COMPARISONS:
+            left = yield expr.left
+            right = yield expr.right
+            return _binary(COMPARISONS[expr.op], left, right)
+        return _closure((yield expr))
+
+    # expressões (retornam operandos)
+
+    def visit_VarNode(self, expr):
+        return SLOT, self.current.slots[expr.name]
+
+    def visit_IntConstNode(self, expr):
+        return CONST, expr.value
+
+    visit_FloatConstNode = visit_IntConstNode
+
+    def visit_CharConstNode(self, expr):
+        return CONST, decode_char(expr.value)
+
+    def visit_StringNode(self, expr):
+        return CONST, decode_string(expr.value)
+
+    def visit_BinaryOpNode(self, expr):
+        spine = self.left_spine(expr)
+        if spine is None:
+            left = yield expr.left
+            right = yield expr.right
+            return CODE, _binary(self.operation(expr), left, right)
+
+        # cadeia longa: avaliada num laço, da operação mais interna para fora
+        first = _closure((yield spine[-1].left))
+        steps = []
+        for node in reversed(spine):
+            steps.append((self.operation(node), _closure((yield node.right))))
+
+        def chain(frame):
+            value = first(frame)
+            for function, right in steps:
+                value = function(value, right(frame))
+            return value
+        return CODE, chain
+
+    def visit_UnaryOpNode(self, expr):
+        # '- - - x' vira x ou -x, sem uma closure por sinal
+        count = 0
+        node = expr
+        while isinstance(node, UnaryOpNode):
+            count += 1
+            node = node.expr
+        kind, value = yield node
+        if count % 2 == 0:
+            return kind, value
+        if kind == CONST:
+            return CONST, -value
+        if kind == SLOT:
+            return CODE, lambda frame: -frame[value]
+        return CODE, lambda frame: -value(frame)
+
+    def visit_CallNode(self, expr):
+        target = self.functions[expr.name]
+        args = []
+        for arg in expr.args:
+            args.append(_closure((yield arg)))
+
+        template, n_params, default = target.template, target.n_params, target.default
+
+        if not args:
+            def call(frame):
+                result = target.body(template[:])
+                return result[0] if result is not None else default
+        elif len(args) == 1:
+            arg = args[0]
+
+            def call(frame):
+                callee = template[:]
+                callee[0] = arg(frame)
+                result = target.body(callee)
+                return result[0] if result is not None else default
+        else:
+            def call(frame):
+                callee = template[:]
+                callee[:n_params] = [arg(frame) for arg in args]
+                result = target.body(callee)
+                return result[0] if result is not None else default
+        return CODE, call
+
+    def generic_visit(self, node):
+        raise ExecutionError(
+            f"[ERRO DE EXECUÇÃO] Nó {type(node).__name__} não pode ser executado"
+        )
+
+    # auxiliares
+
+    def operation(self, expr):
+        if expr.op in ARITHMETIC:
+            return ARITHMETIC[expr.op]
+        if expr.op in COMPARISONS:
+            return _INT_COMPARISONS[expr.op]
+        return _divider(expr.left.type == "int", expr.line)
+
+    @staticmethod
+    def left_spine(expr):
+        """Operações binárias ao longo do filho esquerdo (a cadeia 'a + b +
+        c ...' de cima para baixo), se forem pelo menos CHAIN_MIN"""
+        spine = []
+        node = expr
+        while isinstance(node, BinaryOpNode):
+            spine.append(node)
+            node = node.left
+            if len(spine) < CHAIN_MIN and not isinstance(node, BinaryOpNode):
+                return None
+        return spine
+
+
+class Interpreter:
+    """Programa P compilado em closures, pronto para rodar"""
+
+    def __init__(self, functions_ast, out=None):
+        check_types(functions_ast)
+        out = out if out is not None else sys.stdout
+        self.functions = ClosureCompiler(functions_ast, out.write).functions
+
+    def call(self, name, *args):
+        function = self.functions.get(name)
+        if function is None:
+            raise ExecutionError(f"[ERRO DE EXECUÇÃO] Função '{name}' não existe")
+        check_arguments(name, function.n_params, len(args))
+        try:
+            return function(*args)
+        except RecursionError:
+            raise ExecutionError(
+                f"[ERRO DE EXECUÇÃO] Recursão (ou expressão) profunda demais em '{name}'"
+            ) from None
+
+    def run(self, entry="main"):
+        return self.call(entry)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Executa um programa P")
+    parser.add_argument("arquivo", help="arquivo .p")
+    parser.add_argument("--tempo", action="store_true", help="mostra o tempo de execução")
+    parser.add_argument("--otimizar", action="store_true", help="passa o optimizer.py antes")
+    args = parser.parse_args()
+
+    funcoes = load_program(args.arquivo, args.otimizar)
+    if funcoes is None:
+        sys.exit(1)
+
+    try:
+        inicio = time.perf_counter()
+        interpreter = Interpreter(funcoes)
+        compilado = time.perf_counter()
+        interpreter.run()
+        fim = time.perf_counter()
+    except ExecutionError as erro:
+        print(erro, file=sys.stderr)
+        sys.exit(1)
+
+    if args.tempo:
+        print(f"compilação {(compilado - inicio) * 1000:.2f} ms, "
+              f"execução {(fim - compilado) * 1000:.2f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
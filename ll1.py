@@ -0,0 +1,236 @@
+# ll1.py
+#
+# Gerador de tabelas LL(1). A gramática é um dict
+#
+#     não-terminal -> [produção, ...]      produção = tupla de símbolos
+#
+# Os não-terminais são as chaves do dict, os terminais são tipos de token
+# (TipoToken) e os símbolos que começam com '@' são ações semânticas: não
+# consomem tokens, o parser só as executa quando saem da pilha. A tupla
+# vazia é a produção ε.
+#
+# LL1Table calcula FIRST/FOLLOW, monta a tabela [não-terminal][token] e
+# acusa todos os conflitos de uma vez (GrammarConflict), na construção da
+# tabela e não durante a análise. Tudo é convertido para inteiros: os
+# terminais são os códigos de TipoToken.CODIGOS, os não-terminais e as
+# ações vêm logo depois, e a pilha do parser só guarda ints.
+
+from array import array
+
+from TipoToken import TipoToken, TIPOS, CODIGOS
+
+NO_PRODUCTION = -1
+
+
+def is_action(symbol):
+    return symbol.startswith("@")
+
+
+class GrammarConflict(Exception):
+    """A gramática não é LL(1): alguma célula da tabela tem mais de uma
+    produção. 'conflicts' guarda (não-terminal, terminal, [produções])."""
+
+    def __init__(self, conflicts):
+        self.conflicts = conflicts
+        lines = [
+            f"  {nt} com {terminal}: " + " | ".join(_format(p) for p in productions)
+            for nt, terminal, productions in conflicts
+        ]
+        super().__init__("Gramática não é LL(1):\n" + "\n".join(lines))
+
+
+def _format(production):
+    return " ".join(s for s in production if not is_action(s)) or "ε"
+
+
+def nullable_set(grammar):
+    """Não-terminais que derivam ε"""
+    nullable = set()
+    changed = True
+    while changed:
+        changed = False
+        for nt, productions in grammar.items():
+            if nt not in nullable and any(
+                all(s in nullable or is_action(s) for s in p) for p in productions
+            ):
+                nullable.add(nt)
+                changed = True
+    return nullable
+
+
+def first_of(sequence, first, nullable):
+    """(FIRST da sequência, se ela deriva ε)"""
+    result = set()
+    for symbol in sequence:
+        if is_action(symbol):
+            continue
+        if symbol not in first:  # terminal
+            result.add(symbol)
+            return result, False
+        result |= first[symbol]
+        if symbol not in nullable:
+            return result, False
+    return result, True
+
+
+def first_sets(grammar, nullable):
+    first = {nt: set() for nt in grammar}
+    changed = True
+    while changed:
+        changed = False
+        for nt, productions in grammar.items():
+            for p in productions:
+                symbols, _ = first_of(p, first, nullable)
+                if not symbols <= first[nt]:
+                    first[nt] |= symbols
+                    changed = True
+    return first
+
+
+def follow_sets(grammar, start, first, nullable):
+    follow = {nt: set() for nt in grammar}
+    follow[start].add(TipoToken.EOF)
+    changed = True
+    while changed:
+        changed = False
+        for nt, productions in grammar.items():
+            for p in productions:
+                for i, symbol in enumerate(p):
+                    if symbol not in grammar:
+                        continue
+                    symbols, rest_nullable = first_of(p[i + 1:], first, nullable)
+                    if rest_nullable:
+                        symbols = symbols | follow[nt]
+                    if not symbols <= follow[symbol]:
+                        follow[symbol] |= symbols
+                        changed = True
+    return follow
+
+
+class LL1Table:
+    """Tabela LL(1) de uma gramática, com os símbolos já numerados.
+
+    strict: não-terminais anuláveis que NÃO ganham redução padrão. Os
+    demais anuláveis usam a produção ε em toda célula vazia (o erro é
+    detectado no próximo terminal, sem consumir tokens), o que deixa as
+    mensagens mais precisas ("esperado SEMICOLON" em vez de "esperado um
+    de 15 tokens").
+    """
+
+    def __init__(self, grammar, start, strict=()):
+        self.grammar = grammar
+        self.start = start
+        self._check_symbols()
+
+        self.nullable = nullable_set(grammar)
+        self.first = first_sets(grammar, self.nullable)
+        self.follow = follow_sets(grammar, start, self.first, self.nullable)
+
+        # numeração: terminais, não-terminais, ações
+        self.n_terminals = len(TIPOS)
+        self.nonterminals = list(grammar)
+        self.action_base = self.n_terminals + len(self.nonterminals)
+        self.actions = sorted({s for ps in grammar.values() for p in ps for s in p if is_action(s)})
+        self._codes = dict(CODIGOS)
+        self._codes.update((nt, self.n_terminals + i) for i, nt in enumerate(self.nonterminals))
+        self._codes.update((a, self.action_base + i) for i, a in enumerate(self.actions))
+
+        # produções: (não-terminal, símbolos); rhs = códigos invertidos,
+        # na ordem em que vão para a pilha
+        self.productions = [(nt, p) for nt in self.nonterminals for p in grammar[nt]]
+        self.rhs = [tuple(self._codes[s] for s in reversed(p)) for _, p in self.productions]
+
+        self.table = [array('h', [NO_PRODUCTION]) * self.n_terminals for _ in self.nonterminals]
+        self._fill(strict)
+        self.completion = self._completions()
+
+    def code(self, symbol):
+        return self._codes[symbol]
+
+    def name(self, code):
+        if code < self.n_terminals:
+            return TIPOS[code]
+        if code < self.action_base:
+            return self.nonterminals[code - self.n_terminals]
+        return self.actions[code - self.action_base]
+
+    def _check_symbols(self):
+        if self.start not in self.grammar:
+            raise ValueError(f"Símbolo inicial '{self.start}' não está na gramática")
+        for nt, productions in self.grammar.items():
+            for p in productions:
+                for s in p:
+                    if not (s in self.grammar or is_action(s) or s in CODIGOS):
+                        raise ValueError(f"Símbolo desconhecido '{s}' em {nt}")
+
+    def _fill(self, strict):
+        cells = {}
+        self.predict = []
+        for index, (nt, p) in enumerate(self.productions):
+            predict, derives_empty = first_of(p, self.first, self.nullable)
+            if derives_empty:
+                predict = predict | self.follow[nt]
+            self.predict.append(predict)
+            for terminal in predict:
+                cells.setdefault((nt, terminal), []).append(index)
+
+        conflicts = [
+            (nt, terminal, [self.productions[i][1] for i in indices])
+            for (nt, terminal), indices in cells.items() if len(indices) > 1
+        ]
+        if conflicts:
+            conflicts.sort(key=lambda c: (self.nonterminals.index(c[0]), CODIGOS[c[1]]))
+            raise GrammarConflict(conflicts)
+
+        for (nt, terminal), (index,) in cells.items():
+            self.table[self.nonterminals.index(nt)][CODIGOS[terminal]] = index
+
+        # redução padrão dos anuláveis
+        self.defaults = {}
+        for i, nt in enumerate(self.nonterminals):
+            if nt in self.nullable and nt not in strict:
+                empty = next(
+                    index for index, (owner, p) in enumerate(self.productions)
+                    if owner == nt and first_of(p, self.first, self.nullable)[1]
+                )
+                self.defaults[nt] = empty
+                row = self.table[i]
+                for terminal in range(self.n_terminals):
+                    if row[terminal] == NO_PRODUCTION:
+                        row[terminal] = empty
+
+    def _completions(self):
+        """Para cada não-terminal, a produção que termina com menos
+        terminais (usada para fechar construções abertas na recuperação)"""
+        infinite = float("inf")
+        cost = {nt: infinite for nt in self.nonterminals}
+        best = [NO_PRODUCTION] * len(self.nonterminals)
+
+        def cost_of(p):
+            return sum(cost[s] if s in cost else 0 if is_action(s) else 1 for s in p)
+
+        changed = True
+        while changed:
+            changed = False
+            for index, (nt, p) in enumerate(self.productions):
+                c = cost_of(p)
+                if c < cost[nt]:
+                    cost[nt] = c
+                    best[self.nonterminals.index(nt)] = index
+                    changed = True
+        return best
+
+    def describe(self):
+        """FIRST, FOLLOW e a tabela em texto, para conferência"""
+        lines = []
+        for nt in self.nonterminals:
+            lines.append(f"{nt}{' (anulável)' if nt in self.nullable else ''}")
+            lines.append(f"  FIRST  = {{{', '.join(sorted(self.first[nt], key=CODIGOS.get))}}}")
+            lines.append(f"  FOLLOW = {{{', '.join(sorted(self.follow[nt], key=CODIGOS.get))}}}")
+            for index, (owner, p) in enumerate(self.productions):
+                if owner != nt:
+                    continue
+                terminals = ", ".join(sorted(self.predict[index], key=CODIGOS.get))
+                default = "  (padrão)" if self.defaults.get(nt) == index else ""
+                lines.append(f"  {_format(p)}  <-  {terminals}{default}")
+        return "\n".join(lines)
@@ -0,0 +1,161 @@
+# lote.py
+#
+# Compilação em lote: distribui os arquivos .p de um diretório (ou glob)
+# entre processos e grava as saídas de cada arquivo em um subdiretório
+# próprio, mais um resumo.json com os erros e tempos de todos.
+#
+#     python lote.py programas/ --saida build/ -j 8
+#     python lote.py "programas/**/*.p" --saida build/ --lote 32
+
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from cache import CacheCompilacao
+from pipeline import compilar_arquivo, salvar_artefatos
+
+# Um CacheCompilacao por diretório em cada processo
+_caches = {}
+
+
+def _cache(diretorio):
+    if diretorio not in _caches:
+        _caches[diretorio] = CacheCompilacao(diretorio)
+    return _caches[diretorio]
+
+
+def listar_fontes(alvo):
+    """Arquivos .p de um diretório (recursivamente) ou de um padrão glob"""
+    if os.path.isdir(alvo):
+        padrao = os.path.join(alvo, "**", "*.p")
+    else:
+        padrao = alvo
+    return sorted(f for f in glob.glob(padrao, recursive=True) if os.path.isfile(f))
+
+
+def _diretorio_do_arquivo(caminho, raiz, diretorio_saida):
+    """Subdiretório de saída de um .p: caminho relativo à raiz, sem extensão"""
+    relativo = os.path.relpath(caminho, raiz)
+    return os.path.join(diretorio_saida, os.path.splitext(relativo)[0])
+
+
+def _compilar_um(tarefa):
+    """Executado nos processos filhos: compila um arquivo e devolve o resumo"""
+    caminho, raiz, diretorio_saida, exportar_json, diretorio_cache = tarefa
+    inicio = time.perf_counter()
+    inicio_cpu = time.process_time()
+    resumo = {"arquivo": caminho}
+
+    try:
+        cache = _cache(diretorio_cache) if diretorio_cache else None
+        resultado = compilar_arquivo(caminho, cache)
+        resumo["do_cache"] = resultado.do_cache
+        resumo["tokens"] = len(resultado.tokens)
+        resumo["erros_lexicos"] = resultado.erros_lexicos
+        resumo["erros_sintaticos"] = resultado.erros_sintaticos
+        resumo["erros_semanticos"] = resultado.erros_semanticos
+        resumo["tempos"] = resultado.tempos
+
+        if diretorio_saida:
+            destino = _diretorio_do_arquivo(caminho, raiz, diretorio_saida)
+            salvar_artefatos(resultado, destino, exportar_json)
+            resumo["saida"] = destino
+    except Exception as e:
+        resumo["falha"] = f"{type(e).__name__}: {e}"
+
+    resumo["tempo_total"] = time.perf_counter() - inicio
+    resumo["tempo_cpu"] = time.process_time() - inicio_cpu  # sem a espera por E/S
+    return resumo
+
+
+def compilar_lote(fontes, diretorio_saida=None, trabalhadores=None,
+                  tamanho_lote=None, exportar_json=False, raiz=None,
+                  diretorio_cache=None):
+    """Compila todos os arquivos de 'fontes' em paralelo.
+
+    trabalhadores: nº de processos (padrão: nº de CPUs; 1 roda no próprio
+    processo). tamanho_lote: quantos arquivos cada envio ao pool leva (o
+    padrão divide os arquivos em ~4 lotes por processo). As saídas de cada
+    arquivo vão para diretorio_saida/<caminho relativo a 'raiz'>; por padrão
+    a raiz é o diretório comum a todas as fontes. Com diretorio_cache, os
+    resultados são reaproveitados entre execuções (ver cache.py). Retorna o
+    resumo agregado (o mesmo que vai para resumo.json).
+    """
+    if raiz is None and fontes:
+        raiz = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in fontes])
+    trabalhadores = trabalhadores or os.cpu_count() or 1
+    tarefas = [(f, raiz, diretorio_saida, exportar_json, diretorio_cache) for f in fontes]
+    if not tamanho_lote:
+        tamanho_lote = max(1, len(tarefas) // (trabalhadores * 4))
+
+    inicio = time.perf_counter()
+    if trabalhadores == 1:
+        arquivos = [_compilar_um(t) for t in tarefas]
+    else:
+        with ProcessPoolExecutor(max_workers=trabalhadores) as executor:
+            arquivos = list(executor.map(_compilar_um, tarefas, chunksize=tamanho_lote))
+    tempo_total = time.perf_counter() - inicio
+
+    if diretorio_cache:
+        _cache(diretorio_cache).podar()
+
+    resumo = {
+        "arquivos": arquivos,
+        "estatisticas": {
+            "total_arquivos": len(arquivos),
+            "com_erros": sum(
+                1 for a in arquivos
+                if a.get("falha") or a["erros_lexicos"] or a["erros_sintaticos"] or a["erros_semanticos"]
+            ),
+            "falhas": sum(1 for a in arquivos if "falha" in a),
+            "do_cache": sum(1 for a in arquivos if a.get("do_cache")),
+            "erros_lexicos": sum(len(a.get("erros_lexicos", [])) for a in arquivos),
+            "erros_sintaticos": sum(len(a.get("erros_sintaticos", [])) for a in arquivos),
+            "erros_semanticos": sum(len(a.get("erros_semanticos", [])) for a in arquivos),
+            "trabalhadores": trabalhadores,
+            "tempo_total": tempo_total,
+            "tempo_cpu": sum(a["tempo_cpu"] for a in arquivos)
+        }
+    }
+
+    if diretorio_saida:
+        os.makedirs(diretorio_saida, exist_ok=True)
+        with open(os.path.join(diretorio_saida, "resumo.json"), "w", encoding="utf-8") as f:
+            json.dump(resumo, f, indent=2, ensure_ascii=False)
+
+    return resumo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compila vários programas P em paralelo")
+    parser.add_argument("alvo", help="diretório com arquivos .p ou padrão glob")
+    parser.add_argument("--saida", default="build", help="diretório das saídas (padrão: build)")
+    parser.add_argument("-j", "--trabalhadores", type=int, help="nº de processos (padrão: nº de CPUs)")
+    parser.add_argument("--lote", type=int, help="arquivos por envio ao pool")
+    parser.add_argument("--json", action="store_true", help="grava também tokens_<nome>.json")
+    parser.add_argument("--cache", help="diretório do cache de resultados")
+    args = parser.parse_args()
+
+    fontes = listar_fontes(args.alvo)
+    if not fontes:
+        print(f"Nenhum arquivo .p encontrado em {args.alvo}")
+        return
+
+    raiz = args.alvo if os.path.isdir(args.alvo) else None
+    resumo = compilar_lote(
+        fontes, args.saida, args.trabalhadores, args.lote, args.json, raiz, args.cache
+    )
+
+    est = resumo["estatisticas"]
+    print(f"Arquivos compilados: {est['total_arquivos']} ({est['trabalhadores']} processos)")
+    print(f"Arquivos com erros: {est['com_erros']} (falhas internas: {est['falhas']})")
+    print(f"Resultados do cache: {est['do_cache']}")
+    print(f"Tempo total: {est['tempo_total']:.2f} s (CPU somada dos arquivos: {est['tempo_cpu']:.2f} s)")
+    print(f"Resumo salvo em: {os.path.join(args.saida, 'resumo.json')}")
+
+
+if __name__ == "__main__":
+    main()
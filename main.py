@@ -1,16 +1,20 @@
 #Alunos : Julia Nunes e Lucas Alemida
 
-from afd import returnNextState
+from afd import escanear, escanear_arquivo
 from read_file import save_string
+from reserved_words import reserved_words
+from tabela_interna import TabelaInterna
 from TipoToken import TipoToken
+from tokens_binarios import salvar_tokens_binario
 import json
 import os
+import sys
 
-# Listas para armazenar os elementos
-id_list = []
-num_int_list = []
-num_dec_list = []
-text_list = []
+# Tabelas (lexema -> índice) e listas para armazenar os elementos
+id_list = TabelaInterna()
+num_int_list = TabelaInterna()
+num_dec_list = TabelaInterna()
+text_list = TabelaInterna()
 tokens = []
 erros = []
 arquivo_analisado = ""  # Variável global para armazenar o nome do arquivo
@@ -38,188 +42,72 @@ def analisar_com_afd():
     num_dec_list.clear()
     text_list.clear()
     
-    # Usa o AFD para analisar token por token
-    posicao = 0
-    linha = 1
-    
-    while posicao < len(codigo):
-        # Pula espaços em branco
-        while posicao < len(codigo) and codigo[posicao].isspace():
-            if codigo[posicao] == '\n':
-                linha += 1
-            posicao += 1
-        
-        if posicao >= len(codigo):
-            break
-                
-                        
-        # Encontra o próximo token
-        token_str = extrair_proximo_token(codigo, posicao)
-        
-        if token_str:
-            # Usa o AFD para classificar o token
-            tipo_token = returnNextState(token_str)
-            
-            if tipo_token and tipo_token != TipoToken.UNKNOWN:
-                processar_token(tipo_token, token_str, linha)
-            else:
-                # Token não reconhecido
-                erros.append(f"Erro léxico: Token não reconhecido '{token_str}' na linha {linha}")
-                tokens.append(("ERRO", token_str, linha))
-            
-            # Atualiza posição
-            posicao += len(token_str)
-            
-            # Atualiza contador de linhas se houver quebras no token
-            for char in token_str:
-                if char == '\n':
-                    linha += 1
+    # Uma única passada do AFD reconhece e classifica cada token
+    # (o último token gerado é o EOF)
+    for tipo_token, token_str, linha in escanear(codigo):
+        if tipo_token != TipoToken.UNKNOWN:
+            processar_token(tipo_token, token_str, linha)
         else:
-            # Caractere não processável
-            if posicao < len(codigo):
-                erros.append(f"Erro léxico: Caractere não reconhecido '{codigo[posicao]}' na linha {linha}")
-                tokens.append(("ERRO", codigo[posicao], linha))
-                posicao += 1
-    
-    # Adiciona token EOF
-    tokens.append((TipoToken.EOF, "", linha))
-
-def extrair_proximo_token(codigo, posicao_inicial):
-    """Extrai o próximo token do código"""
-    if posicao_inicial >= len(codigo):
-        return ""
-        
-    posicao = posicao_inicial
-    char_atual = codigo[posicao]
-    
-    # Se for string, captura até a próxima aspas
-    if char_atual == '"':
-        token = '"'
-        posicao += 1
-        while posicao < len(codigo) and codigo[posicao] != '"':
-            token += codigo[posicao]
-            posicao += 1
-        if posicao < len(codigo) and codigo[posicao] == '"':
-            token += '"'
-            posicao += 1
-        return token
-    
-    # Se for char, captura até o próximo apóstrofo
-    elif codigo[posicao] == "'":       
-        token = "'"
-        posicao += 1
-        
-        # Caso char vazio
-        if posicao < len(codigo) and codigo[posicao] == "'":
-            token += "'"
-            posicao += 1
-            return token
-        
-        # Caso char com um caractere
-        elif posicao < len(codigo):
-            token += codigo[posicao]  # Adiciona o caractere
-            posicao += 1
-            
-            # Procura aspas de fechamento
-            if posicao < len(codigo) and codigo[posicao] == "'":
-                token += "'"
-                posicao += 1
-                return token
-            else:
-                # Char não fechado - erro
-                return token  # Token incompleto: "'a" em vez de "'a'"
-    
-
-    
-    # Para identificadores e números
-    elif char_atual.isalpha() or char_atual == '_':
-        token = ""
-        while posicao < len(codigo) and (codigo[posicao].isalnum() or codigo[posicao] == '_'):
-            token += codigo[posicao]
-            posicao += 1
-        return token
-    
-    # Para números
-    elif char_atual.isdigit():
-        token = ""
-        tem_ponto = False
-        while posicao < len(codigo):
-            char = codigo[posicao]
-            if char.isdigit():
-                token += char
-                posicao += 1
-            elif char == '.' and not tem_ponto:
-                token += char
-                posicao += 1
-                tem_ponto = True
-            else:
-                break
-        return token
-    
-    # Para operadores e delimitadores
-    else:
-        # Operadores de dois caracteres
-        if posicao + 1 < len(codigo):
-            dois_chars = codigo[posicao:posicao + 2]
-            if dois_chars in ['->', '==', '!=', '<=', '>=']:
-                return dois_chars
-        
-        # Operadores de um caractere
-        delimitadores = '(){}[];:,=!<>+-*/"'
-        if char_atual in delimitadores:
-            return char_atual
-        
-        # Caractere desconhecido
-        return char_atual
-    
-    token_str = extrair_proximo_token(codigo, posicao)
-    print(f"[DEBUG] Token extraído: {repr(token_str)}")
+            # Token não reconhecido
+            erros.append(f"Erro léxico: Token não reconhecido '{token_str}' na linha {linha}")
+            tokens.append((TipoToken.ERRO, token_str, linha, None))
 
 def processar_token(tipo_token, lexema, linha):
     """Processa o token classificando nas listas apropriadas"""
-    global tokens, id_list, num_int_list, num_dec_list, text_list
+    tokens.append(classificar_token(tipo_token, lexema, linha))
+
+def classificar_token(tipo_token, lexema, linha):
+    """Registra o lexema nas tabelas e devolve a tupla
+    (tipo, lexema, linha, índice na tabela ou None)"""
+    global id_list, num_int_list, num_dec_list, text_list
     
     # Verifica se é palavra reservada
-    from reserved_words import reserved_words
     if lexema in reserved_words:
-        tokens.append((reserved_words[lexema], lexema, linha))
+        return (reserved_words[lexema], lexema, linha, None)
     
     # Classifica baseado no tipo do AFD
     elif tipo_token == TipoToken.ID:
-        if lexema not in id_list:
-            id_list.append(lexema)
-        index = id_list.index(lexema)
-        tokens.append((f"ID", lexema, linha))
+        return (TipoToken.ID, lexema, linha, id_list.internar(lexema))
     
     elif tipo_token == TipoToken.INT_CONST:
-        if lexema not in num_int_list:
-            num_int_list.append(lexema)
-        index = num_int_list.index(lexema)
-        tokens.append((f"INT_CONST", lexema, linha))
+        return (TipoToken.INT_CONST, lexema, linha, num_int_list.internar(lexema))
     
     elif tipo_token == TipoToken.FLOAT_CONST:
-        if lexema not in num_dec_list:
-            num_dec_list.append(lexema)
-        index = num_dec_list.index(lexema)
-        tokens.append((f"FLOAT_CONST", lexema, linha))
+        return (TipoToken.FLOAT_CONST, lexema, linha, num_dec_list.internar(lexema))
 
     elif tipo_token == TipoToken.FMT_STRING:
-        if lexema not in text_list:
-            print('{}', lexema)
-            text_list.append(lexema)
-        index = text_list.index(lexema)
-        tokens.append((f"FMT_STRING", lexema, linha))
-    
-    elif tipo_token == TipoToken.CHAR_LITERAL:
-        tokens.append((TipoToken.CHAR_LITERAL, lexema, linha))
+        return (TipoToken.FMT_STRING, lexema, linha, text_list.internar(lexema))
     
     else:
-        # Outros tokens (operadores, delimitadores)        
-        tokens.append((tipo_token, lexema, linha))
+        # Outros tokens (char, operadores, delimitadores)        
+        return (tipo_token, lexema, linha, None)
 
-def salvar_resultados_json():
-    """Salva os resultados em arquivo JSON com o mesmo nome do arquivo .p"""
-    global tokens, id_list, num_int_list, num_dec_list, text_list, erros, arquivo_analisado
+def tokens_em_fluxo(fonte):
+    """Análise léxica preguiçosa: gera os tokens no formato do parser
+    ({"token", "lexema", "linha"}) à medida que são lidos de 'fonte'.
+
+    'fonte' é um arquivo ou mmap (ver read_file.abrir_fonte). As tabelas e
+    a lista de erros são preenchidas durante a geração, mas a lista global
+    'tokens' não é usada, então a memória não cresce com o arquivo.
+    """
+    erros.clear()
+    id_list.clear()
+    num_int_list.clear()
+    num_dec_list.clear()
+    text_list.clear()
+
+    for tipo_token, token_str, linha in escanear_arquivo(fonte):
+        indice = None
+        if tipo_token != TipoToken.UNKNOWN:
+            tipo_token, token_str, linha, indice = classificar_token(tipo_token, token_str, linha)
+        else:
+            erros.append(f"Erro léxico: Token não reconhecido '{token_str}' na linha {linha}")
+            tipo_token = TipoToken.ERRO
+        yield {"token": tipo_token, "lexema": token_str, "linha": linha, "indice": indice}
+
+def nome_base_saida():
+    """Nome do arquivo .p analisado sem a extensão (base dos arquivos de saída)"""
+    global arquivo_analisado
     
     # Se não temos o nome do arquivo analisado, usa um padrão
     if not arquivo_analisado:
@@ -229,38 +117,64 @@ def salvar_resultados_json():
         else:
             arquivo_analisado = "programa"
     
-    # Remove a extensão .p e cria nome do JSON
-    nome_base = os.path.splitext(arquivo_analisado)[0]
-    arquivo_json = f"tokens_{nome_base}.json"
+    return os.path.splitext(arquivo_analisado)[0]
+
+def salvar_resultados_binario():
+    """Salva os tokens no formato binário .ptok (lido pelo main2.py)"""
+    arquivo_ptok = f"tokens_{nome_base_saida()}.ptok"
     
-    print(f" Salvando resultados como: {arquivo_json}")
+    print(f" Salvando tokens como: {arquivo_ptok}")
     
-    dados = {
+    try:
+        salvar_tokens_binario(arquivo_ptok, tokens)
+        return arquivo_ptok
+    except Exception as e:
+        print(f"Erro ao salvar tokens: {e}")
+        return None
+
+def montar_dados_tokens(tokens, ids, inteiros, decimais, textos, erros, arquivo):
+    """Estrutura do tokens_<nome>.json (tokens como tuplas de classificar_token)"""
+    return {
         "tokens": [
             {
                 "token": token[0],
                 "lexema": token[1],
-                "linha": token[2]
+                "linha": token[2],
+                "indice": token[3]
             } for token in tokens
         ],
         "tabelas": {
-            "identificadores": id_list,
-            "numeros_inteiros": num_int_list,
-            "numeros_decimais": num_dec_list,
-            "textos": text_list
+            "identificadores": list(ids),
+            "numeros_inteiros": list(inteiros),
+            "numeros_decimais": list(decimais),
+            "textos": list(textos)
         },
         "estatisticas": {
             "total_tokens": len(tokens),
-            "identificadores": len(id_list),
-            "numeros_inteiros": len(num_int_list),
-            "numeros_decimais": len(num_dec_list),
-            "textos": len(text_list),
+            "identificadores": len(ids),
+            "numeros_inteiros": len(inteiros),
+            "numeros_decimais": len(decimais),
+            "textos": len(textos),
             "erros": len(erros)
         },
         "erros": erros,
-        "arquivo_origem": arquivo_analisado,
-        "timestamp": os.path.getctime(arquivo_analisado) if os.path.exists(arquivo_analisado) else None
+        "arquivo_origem": arquivo,
+        "timestamp": os.path.getctime(arquivo) if os.path.exists(arquivo) else None
     }
+
+def salvar_resultados_json():
+    """Salva os resultados em arquivo JSON com o mesmo nome do arquivo .p"""
+    global tokens, id_list, num_int_list, num_dec_list, text_list, erros, arquivo_analisado
+    
+    # Remove a extensão .p e cria nome do JSON
+    nome_base = nome_base_saida()
+    arquivo_json = f"tokens_{nome_base}.json"
+    
+    print(f" Salvando resultados como: {arquivo_json}")
+    
+    dados = montar_dados_tokens(
+        tokens, id_list, num_int_list, num_dec_list, text_list, erros, arquivo_analisado
+    )
     
     try:
         with open(arquivo_json, 'w', encoding='utf-8') as f:
@@ -297,8 +211,8 @@ def mostrar_resultados():
     print(f"Números decimais: {len(num_dec_list)} -> {num_dec_list}")
     print(f"Textos: {len(text_list)} -> {text_list}")
 
-def main():
-    """Função principal"""
+def main(exportar_json=False):
+    """Função principal (exportar_json também gera o tokens_<nome>.json)"""
     print("=== ANALISADOR LÉXICO COM AFD ===")
     print("Buscando arquivos com extensão .p...")
     
@@ -312,13 +226,21 @@ def main():
     # Mostra resultados
     mostrar_resultados()
     
-    # Salva em JSON
-    arquivo_json = salvar_resultados_json()
-    if arquivo_json:
-        print(f"\nResultados salvos em: {arquivo_json}")
+    # Salva os tokens no formato binário
+    arquivo_ptok = salvar_resultados_binario()
+    if arquivo_ptok:
+        print(f"\nResultados salvos em: {arquivo_ptok}")
         print(f"Arquivo origem: {arquivo_analisado}")
     else:
-        print("Falha ao salvar resultados em JSON")
+        print("Falha ao salvar resultados")
+    
+    # JSON só quando pedido (python main.py --json)
+    if exportar_json:
+        arquivo_json = salvar_resultados_json()
+        if arquivo_json:
+            print(f"Resultados também salvos em: {arquivo_json}")
+        else:
+            print("Falha ao salvar resultados em JSON")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(exportar_json="--json" in sys.argv[1:])
\ No newline at end of file
@@ -1,12 +1,19 @@
 import json
-import os
-from typing import List, Dict
+from collections import deque
+from typing import Iterable, List, Dict
 
-from TipoToken import TipoToken
-from ast import (
+from TipoToken import TipoToken, TIPOS, CODIGOS
+from grammar import (
+    TABLE, FRAMES, FRAME_VALUES, RETRY, ERROR_MESSAGES, SYNC_FUNCTION,
+    BINARY_OPERATORS, PREFIX_OPERATORS
+)
+from diagnostico import Diagnostico
+from ll1 import NO_PRODUCTION
+from tokens_binarios import achar_arquivo_tokens, carregar_tokens
+from p_ast import (
     FunctionNode, BlockNode,
     VarNode, IntConstNode, FloatConstNode, CharConstNode, StringNode,
-    BinaryOpNode, AssignNode, PrintNode, ReturnNode
+    CallNode, AssignNode, PrintNode, ReturnNode, IfNode, WhileNode
 )
 
 
@@ -36,7 +43,7 @@ class SymbolTable:
 
     def add_symbol(self, name, type_, category, line):
         if name in self.symbols:
-            return f"[ERRO] '{name}' já declarado no escopo '{self.scope_name}' (linha {line})"
+            return Diagnostico(f"[ERRO] '{name}' já declarado no escopo '{self.scope_name}' (linha {{linha}})", line)
         self.symbols[name] = Symbol(name, type_, category, line)
         return None
 
@@ -48,36 +55,182 @@ class SymbolTable:
 
 
 
-class Parser:
+class ListaTokens:
+    """Adapta uma lista de dicts {"token", "lexema", "linha"} (formato do
+    JSON de tokens) à interface de acesso do parser."""
+
     def __init__(self, tokens: List[Dict]):
         self.tokens = tokens
+
+    def tipo(self, i):
+        return self.tokens[i]["token"]
+
+    def codigo(self, i):
+        return CODIGOS[self.tokens[i]["token"]]
+
+    def lexema(self, i):
+        return self.tokens[i]["lexema"]
+
+    def linha(self, i):
+        return self.tokens[i]["linha"]
+
+
+class JanelaTokens:
+    """Sequência de tokens lida sob demanda de um iterador.
+
+    O parser só olha para frente, então os tokens que ficaram mais de
+    'folga' posições para trás são descartados e a memória fica limitada
+    a uma janela, e não ao tamanho do arquivo.
+    """
+
+    def __init__(self, tokens: Iterable[Dict], folga=16):
+        self._iter = iter(tokens)
+        self._buffer = deque()
+        self._base = 0  # índice global de _buffer[0]
+        self._folga = folga
+
+    def __getitem__(self, i):
+        while self._buffer and self._base < i - self._folga:
+            self._buffer.popleft()
+            self._base += 1
+
+        if i < self._base:
+            raise IndexError(i)
+
+        while i - self._base >= len(self._buffer):
+            try:
+                self._buffer.append(next(self._iter))
+            except StopIteration:
+                raise IndexError(i) from None
+
+        return self._buffer[i - self._base]
+
+    def tipo(self, i):
+        return self[i]["token"]
+
+    def codigo(self, i):
+        return CODIGOS[self[i]["token"]]
+
+    def lexema(self, i):
+        return self[i]["lexema"]
+
+    def linha(self, i):
+        return self[i]["linha"]
+
+
+# Erros demais numa função: o resto dela é descartado
+MAX_ERRORS = 20
+
+# símbolo de pilha que marca o fim de um quadro de recuperação
+FRAME_END = TABLE.action_base + len(TABLE.actions)
+
+# código -> (sincronização, token consumido, deixa um valor)
+_FRAMES = {
+    TABLE.code(nt): (sync, skip, nt in FRAME_VALUES)
+    for nt, (sync, skip) in FRAMES.items()
+}
+_RETRY = {TABLE.code(nt): policy for nt, policy in RETRY.items()}
+_EOF = CODIGOS[TipoToken.EOF]
+
+
+class FunctionAbandoned(Exception):
+    """Limite de erros atingido: o resto da função é descartado"""
+
+
+class Parser:
+    """Parser LL(1) dirigido pela tabela de grammar.py.
+
+    A pilha guarda códigos inteiros: terminais são casados com o token
+    atual, não-terminais são trocados pela produção da tabela e ações
+    ('@nome' na gramática) chamam act_nome, que montam a AST numa pilha de
+    valores (self.values).
+    """
+
+    def __init__(self, tokens, max_errors=MAX_ERRORS):
+        # Aceita lista de dicts, BufferTokens ou qualquer iterável de dicts.
+        # Todos são acessados por tipo(i)/lexema(i)/linha(i)/codigo(i), que
+        # levantam IndexError depois do último token.
+        if isinstance(tokens, list):
+            tokens = ListaTokens(tokens)
+        elif not hasattr(tokens, "tipo"):
+            tokens = JanelaTokens(tokens)
+        self.tokens = tokens
         self.pos = 0
         self.errors = []
         self.tables: List[SymbolTable] = []
         self.current_table = None
 
+        # recuperação de erros
+        self.max_errors = max_errors
+        self.function_errors = 0
+        self.recovering = False
+
+        # estado do autômato
+        self.actions = [getattr(self, "act_" + name[1:]) for name in TABLE.actions]
+        self.stack = []
+        self.values = []
+        self.frames = []  # (altura da pilha, nº de valores, política)
+
+        # função sendo analisada
+        self.function_name = ""
+        self.function_line = 0
+        self.params = []
+        self.return_type = None
+
         
         self.functions_ast = []
 
+    def kind(self, k=0):
+        try:
+            return self.tokens.tipo(self.pos + k)
+        except IndexError:
+            return TipoToken.EOF
+
+    def code(self):
+        try:
+            return self.tokens.codigo(self.pos)
+        except IndexError:
+            return _EOF
+
+    def lexeme(self, k=0):
+        try:
+            return self.tokens.lexema(self.pos + k)
+        except IndexError:
+            return ""
+
+    def line(self, k=0):
+        try:
+            return self.tokens.linha(self.pos + k)
+        except IndexError:
+            return 0
+
     def current(self):
-        return self.tokens[self.pos] if self.pos < len(self.tokens) else {
-            "token": TipoToken.EOF, "lexema": "", "linha": 0
-        }
+        return self.peek(0)
 
-    def eat(self, expected):
-        tok = self.current()
-        if tok["token"] == expected:
-            self.pos += 1
-        else:
-            self.errors.append({
-                "linha": tok["linha"],
-                "erro": f"Erro sintático: esperado {expected}, encontrado {tok['token']}"
-            })
+    def peek(self, k):
+        return {"token": self.kind(k), "lexema": self.lexeme(k), "linha": self.line(k)}
+
+    def error(self, message):
+        """Registra um erro, a menos que já estejamos recuperando de outro
+        (erros em cascata do mesmo trecho são descartados)"""
+        if self.recovering:
+            return
+        self.recovering = True
+
+        self.function_errors += 1
+        if self.function_errors > self.max_errors:
+            raise FunctionAbandoned()
+
+        self.errors.append({"linha": self.line(), "erro": message})
+
+    def synchronize(self, sync):
+        """Modo pânico: descarta tokens até um do conjunto de sincronização"""
+        while self.kind() not in sync:
             self.pos += 1
 
   
     def parse(self):
-        while self.current()["token"] != TipoToken.EOF:
+        while self.kind() != TipoToken.EOF:
             func = self.function_decl()
             if func:
                 self.functions_ast.append(func)
@@ -86,236 +239,293 @@ class Parser:
 
   
     def function_decl(self):
-        tok = self.current()
+        if self.kind() != TipoToken.FN:
+            self.error("Função deve começar com 'fn'")
+            self.synchronize(SYNC_FUNCTION)
+            self.recovering = False
+            return None
 
-        if tok["token"] != TipoToken.FN:
+        self.function_errors = 0
+        try:
+            return self.run("Function")
+        except FunctionAbandoned:
             self.errors.append({
-                "linha": tok["linha"],
-                "erro": "Função deve começar com 'fn'"
+                "linha": self.line(),
+                "erro": f"Muitos erros sintáticos em '{self.function_name}': análise da função abandonada"
             })
-            self.pos += 1
+            self.synchronize(SYNC_FUNCTION)
+            self.recovering = False
             return None
 
-        self.eat(TipoToken.FN)
-
-        name = self.current()["lexema"]
-        line = self.current()["linha"]
-        self.eat(self.current()["token"])  
-
+    def run(self, start):
+        """Executa a tabela a partir do não-terminal 'start' e retorna o
+        valor que sobrou na pilha de valores"""
+        stack = self.stack = [TABLE.code(start)]
+        self.values = []
+        self.frames = []
+
+        table, rhs, actions = TABLE.table, TABLE.rhs, self.actions
+        n_terminals, action_base = TABLE.n_terminals, TABLE.action_base
+
+        while stack:
+            symbol = stack.pop()
+
+            if symbol < n_terminals:
+                if self.code() == symbol:
+                    self.pos += 1
+                    self.recovering = False
+                else:
+                    self.error(f"Erro sintático: esperado {TIPOS[symbol]}, encontrado {self.kind()}")
+                    self.recover()
+
+            elif symbol < action_base:
+                policy = _FRAMES.get(symbol)
+                if policy:
+                    self.frames.append((len(stack), len(self.values), policy))
+                    stack.append(FRAME_END)
+
+                production = table[symbol - n_terminals][self.code()]
+                if production == NO_PRODUCTION:
+                    self.error(self.expected_message(symbol))
+                    self.recover(symbol)
+                else:
+                    stack.extend(rhs[production])
+
+            elif symbol == FRAME_END:
+                self.frames.pop()
+
+            else:
+                actions[symbol - action_base]()
+
+        return self.values.pop() if self.values else None
+
+    def expected_message(self, symbol):
+        name = TABLE.name(symbol)
+        kind = self.kind()
+
+        # FN/EOF num não-terminal anulável: a construção ficou aberta
+        # (ex.: '}' faltando), então o esperado é o que vem depois dela
+        left_open = name in TABLE.nullable and kind in SYNC_FUNCTION
+        if name in ERROR_MESSAGES and not left_open:
+            return ERROR_MESSAGES[name].format(kind=kind)
+
+        expected = TABLE.follow[name] if left_open else TABLE.first[name]
+        expected = " ou ".join(sorted(expected, key=CODIGOS.get))
+        return f"Erro sintático: esperado {expected}, encontrado {kind}"
+
+    def recover(self, retry=None):
+        """Depois de um erro: descarta tokens até sincronizar e ajusta a
+        pilha. 'retry' é o não-terminal que falhou (já fora da pilha)."""
+        stack, frames = self.stack, self.frames
+
+        if retry in _RETRY:
+            sync, skip = _RETRY[retry]
+            self.synchronize(sync + SYNC_FUNCTION)
+            stack.append(retry)
+            if self.kind() in SYNC_FUNCTION:
+                self.complete()
+                return
+            if self.kind() == skip:
+                self.pos += 1
+            self.recovering = False
+            return
+
+        sync = SYNC_FUNCTION
+        for _, _, (frame_sync, _, _) in frames:
+            sync = sync + frame_sync
+        self.synchronize(sync)
+
+        # quadro mais interno que sincroniza com o token atual
+        kind = self.kind()
+        for i in range(len(frames) - 1, -1, -1):
+            height, n_values, (frame_sync, skip, value) = frames[i]
+            if kind in frame_sync:
+                del frames[i:], stack[height:], self.values[n_values:]
+                if value:
+                    self.values.append(None)
+                if kind == skip:
+                    self.pos += 1
+                self.recovering = False
+                return
+
+        # FN/EOF: descarta o quadro mais interno e fecha o resto
+        if frames:
+            height, n_values, (_, _, value) = frames.pop()
+            del stack[height:], self.values[n_values:]
+            if value:
+                self.values.append(None)
+        self.complete()
+
+    def complete(self):
+        """Fecha as construções abertas sem consumir tokens: cada
+        não-terminal vira a produção que precisa de menos terminais e os
+        terminais que faltam são dados como presentes (o erro já foi
+        registrado)"""
+        stack = self.stack
+        n_terminals, action_base = TABLE.n_terminals, TABLE.action_base
+
+        while stack:
+            symbol = stack.pop()
+            if symbol < n_terminals:
+                continue
+            if symbol < action_base:
+                stack.extend(TABLE.rhs[TABLE.completion[symbol - n_terminals]])
+            elif symbol == FRAME_END:
+                self.frames.pop()
+            else:
+                self.actions[symbol - action_base]()
+
+    # ------------------------------------------------------------------
+    # ações da gramática (montam a AST e as tabelas de símbolos)
+    # ------------------------------------------------------------------
+
+    def act_name(self):
         # inicia tabela de símbolos desse escopo
-        self.current_table = SymbolTable(name)
+        self.function_name = self.lexeme()
+        self.function_line = self.line()
+        self.params = []
+        self.return_type = None
+        self.current_table = SymbolTable(self.function_name)
         self.tables.append(self.current_table)
 
-        # parâmetros
-        self.eat(TipoToken.LBRACKET)
-        params = self.param_list()
-        self.eat(TipoToken.RBRACKET)
-
-        # corpo
-        body = self.block()
-
-        # retorna AST
-        return FunctionNode(name, params, body, self.current_table, line)
-
-   
-    def param_list(self):
-        params = []
+    def act_function(self):
+        body = self.values.pop()
+        self.values.append(FunctionNode(
+            self.function_name, self.params, self.return_type, body,
+            self.current_table, self.function_line
+        ))
 
-        if self.current()["token"] == TipoToken.ID:
-            while True:
-                pname = self.current()["lexema"]
-                pline = self.current()["linha"]
-                self.eat(TipoToken.ID)
+    def act_param_name(self):
+        self.values.append((self.lexeme(), self.line()))
 
-                self.eat(TipoToken.COLON)
-                ptype = self.current()["lexema"]
-                self.eat(self.current()["token"])
+    def act_type(self):
+        self.values.append(self.lexeme())
 
-                err = self.current_table.add_symbol(pname, ptype, "parâmetro", pline)
-                if err:
-                    self.errors.append({"linha": pline, "erro": err})
+    def act_param(self):
+        ptype = self.values.pop()
+        pname, pline = self.values.pop()
 
-                params.append((pname, ptype, pline))
+        err = self.current_table.add_symbol(pname, ptype, "parâmetro", pline)
+        if err:
+            self.errors.append({"linha": pline, "erro": err})
 
-                if self.current()["token"] == TipoToken.COMMA:
-                    self.eat(TipoToken.COMMA)
-                    continue
-                break
+        self.params.append((pname, ptype, pline))
 
-        return params
+    def act_return_type(self):
+        self.return_type = self.values.pop()
 
- 
-    def block(self):
-        self.eat(TipoToken.LBRACE)
+    def act_block(self):
+        self.values.append([])
 
-        commands = []
+    def act_block_end(self):
+        self.values.append(BlockNode(self.values.pop()))
 
-        while self.current()["token"] not in [TipoToken.RBRACE, TipoToken.EOF]:
+    def act_command(self):
+        cmd = self.values.pop()
+        self.values[-1].append(cmd)
 
-            if self.current()["token"] == TipoToken.LET:
-                self.var_decl()
-                continue
+    def act_declaration(self):
+        self.values.append([])
 
-            cmd = self.command()
-            if cmd:
-                commands.append(cmd)
+    def act_identifier(self):
+        self.values[-1].append((self.lexeme(), self.line()))
 
-        self.eat(TipoToken.RBRACE)
+    def act_declare(self):
+        tipo = self.values.pop()
+        ids = self.values.pop()
 
-        return BlockNode(commands)
+        # registro na tabela
+        for name, line in ids:
+            err = self.current_table.add_symbol(name, tipo, "variável", line)
+            if err:
+                self.errors.append({"linha": line, "erro": err})
 
-    
-    def var_decl(self):
-        self.eat(TipoToken.LET)
+    def act_print(self):
+        self.values.append(PrintNode([], self.line()))
 
-        ids = []
-        while True:
-            name = self.current()["lexema"]
-            line = self.current()["linha"]
-            ids.append((name, line))
-            self.eat(TipoToken.ID)
+    def act_argument(self):
+        # argumento de um println ou de uma chamada
+        expr = self.values.pop()
+        self.values[-1].args.append(expr)
 
-            if self.current()["token"] == TipoToken.COMMA:
-                self.eat(TipoToken.COMMA)
-                continue
-            break
+    def act_line(self):
+        self.values.append(self.line())
 
-        self.eat(TipoToken.COLON)
+    def act_return(self):
+        expr = self.values.pop()
+        self.values.append(ReturnNode(expr, self.values.pop()))
 
-        tipo = self.current()["lexema"]
-        self.eat(self.current()["token"])
+    def act_assign(self):
+        expr = self.values.pop()
+        var = self.values.pop()
+        self.values.append(AssignNode(var.name, expr, var.line))
 
-        self.eat(TipoToken.SEMICOLON)
+    def act_if(self):
+        else_body = self.values.pop()
+        then_body = self.values.pop()
+        cond = self.values.pop()
+        self.values.append(IfNode(cond, then_body, else_body, self.values.pop()))
 
-        # registro na tabela
-        for name, line in ids:
-            err = self.current_table.add_symbol(name, tipo, "variável", line)
-            if err:
-                self.errors.append({"linha": line, "erro": err})
+    def act_no_else(self):
+        self.values.append(None)
 
- 
-    def command(self):
-        tok = self.current()
+    def act_else_if(self):
+        self.values.append(BlockNode([self.values.pop()]))
 
-       
-        if tok["token"] == TipoToken.ID and self.tokens[self.pos + 1]["token"] == TipoToken.ASSIGN:
-            name = tok["lexema"]
-            line = tok["linha"]
+    def act_while(self):
+        body = self.values.pop()
+        cond = self.values.pop()
+        self.values.append(WhileNode(cond, body, self.values.pop()))
 
-            self.eat(TipoToken.ID)
-            self.eat(TipoToken.ASSIGN)
+    def act_operator(self):
+        self.values.append((self.kind(), self.line()))
 
-            expr = self.expression()
+    def act_binary(self):
+        right = self.values.pop()
+        op, line = self.values.pop()
+        left = self.values.pop()
+        self.values.append(BINARY_OPERATORS[op][2](op, left, right, line))
 
-            self.eat(TipoToken.SEMICOLON)
-            return AssignNode(name, expr, line)
+    def act_unary(self):
+        expr = self.values.pop()
+        op, line = self.values.pop()
+        self.values.append(PREFIX_OPERATORS[op][1](op, expr, line))
 
-      
-        if tok["token"] == TipoToken.PRINTLN:
-            line = tok["linha"]
-            self.eat(TipoToken.PRINTLN)
-            self.eat(TipoToken.LBRACKET)
+    def act_variable(self):
+        self.values.append(VarNode(self.lexeme(), self.line()))
 
-            args = []
-            if self.current()["token"] != TipoToken.RBRACKET:
-                args.append(self.expression())
-                while self.current()["token"] == TipoToken.COMMA:
-                    self.eat(TipoToken.COMMA)
-                    args.append(self.expression())
+    def act_call(self):
+        var = self.values.pop()
+        self.values.append(CallNode(var.name, [], var.line))
 
-            self.eat(TipoToken.RBRACKET)
-            self.eat(TipoToken.SEMICOLON)
+    def act_int(self):
+        self.values.append(IntConstNode(self.lexeme(), self.line()))
 
-            return PrintNode(args, line)
+    def act_float(self):
+        self.values.append(FloatConstNode(self.lexeme(), self.line()))
 
-        
-        if tok["token"] == TipoToken.RETURN:
-            line = tok["linha"]
-            self.eat(TipoToken.RETURN)
-            expr = self.expression()
-            self.eat(TipoToken.SEMICOLON)
-            return ReturnNode(expr, line)
-
-      
-        expr = self.expression()
-        self.eat(TipoToken.SEMICOLON)
-        return expr
+    def act_char(self):
+        self.values.append(CharConstNode(self.lexeme(), self.line()))
 
-  
-    def expression(self):
-        node = self.atom()
-
-        while self.current()["token"] in [
-            TipoToken.PLUS, TipoToken.MINUS, TipoToken.MULT, TipoToken.DIV
-        ]:
-            op = self.current()["token"]
-            line = self.current()["linha"]
-            self.eat(op)
-            right = self.atom()
-            node = BinaryOpNode(op, node, right, line)
-
-        return node
-
-    def atom(self):
-        tok = self.current()
-        line = tok["linha"]
-
-        if tok["token"] == TipoToken.ID:
-            name = tok["lexema"]
-            self.eat(TipoToken.ID)
-            return VarNode(name, line)
-
-        if tok["token"] == TipoToken.INT_CONST:
-            v = tok["lexema"]
-            self.eat(TipoToken.INT_CONST)
-            return IntConstNode(v, line)
-
-        if tok["token"] == TipoToken.FLOAT_CONST:
-            v = tok["lexema"]
-            self.eat(TipoToken.FLOAT_CONST)
-            return FloatConstNode(v, line)
-
-        if tok["token"] == TipoToken.CHAR_LITERAL:
-            v = tok["lexema"]
-            self.eat(TipoToken.CHAR_LITERAL)
-            return CharConstNode(v, line)
-
-        if tok["token"] == TipoToken.FMT_STRING:
-            v = tok["lexema"]
-            self.eat(TipoToken.FMT_STRING)
-            return StringNode(v, line)
-
-        if tok["token"] == TipoToken.LBRACKET:
-            self.eat(TipoToken.LBRACKET)
-            n = self.expression()
-            self.eat(TipoToken.RBRACKET)
-            return n
-
-        self.errors.append({
-            "linha": line,
-            "erro": f"Expressão inválida começando com {tok['token']}"
-        })
-        self.pos += 1
-        return None
+    def act_string(self):
+        self.values.append(StringNode(self.lexeme(), self.line()))
 
 
 
 def executar_analise_sintatica():
-    arquivos = [f for f in os.listdir(".") if f.startswith("tokens_") and f.endswith(".json")]
-    if not arquivos:
-        print(" Nenhum arquivo tokens_*.json encontrado. Rode a análise léxica antes!")
+    arquivo_tokens = achar_arquivo_tokens()
+    if not arquivo_tokens:
+        print(" Nenhum arquivo tokens_*.ptok/.json encontrado. Rode a análise léxica antes!")
         return
 
-    json_tokens = max(arquivos, key=os.path.getctime)
-    print(f" Usando arquivo de tokens: {json_tokens}")
-
-    with open(json_tokens, "r", encoding="utf-8") as f:
-        dados = json.load(f)
+    print(f" Usando arquivo de tokens: {arquivo_tokens}")
 
-    tokens = dados["tokens"]
+    tokens = carregar_tokens(arquivo_tokens)
     parser = Parser(tokens)
 
     erros, tabelas, funcoes_ast = parser.parse()
+    if hasattr(tokens, "close"):
+        tokens.close()
 
     with open("saida_sintatica.json", "w", encoding="utf-8") as f:
         json.dump({"erros_sintaticos": erros}, f, indent=2, ensure_ascii=False)
@@ -1,67 +1,60 @@
 # main_semantico.py
 
-import json
 import os
 from main2 import Parser   # usa seu parser modificado
+from saida_json import salvar_json
 from semantic import SemanticAnalyzer
+from visitor import Visitor
+from tokens_binarios import achar_arquivo_tokens, carregar_tokens
 
 def achar_json_tokens():
-    arquivos = [f for f in os.listdir(".") if f.startswith("tokens_") and f.endswith(".json")]
-    if not arquivos:
-        print("Nenhum arquivo tokens_*.json encontrado. Rode a análise léxica antes!")
+    arquivo = achar_arquivo_tokens()
+    if not arquivo:
+        print("Nenhum arquivo tokens_*.ptok/.json encontrado. Rode a análise léxica antes!")
         exit(1)
-    return max(arquivos, key=os.path.getctime)
+    return arquivo
 
-def ast_to_dict(node):
-    # valores nulos
-    if node is None:
-        return None
-
-    # se for um tipo primitivo (int, float, string, etc.)
-    if isinstance(node, (int, float, str)):
-        return node
+class AstParaDict(Visitor):
+    """Converte a AST para dicts/listas (formato do saida_semantica.json)"""
 
-    # se for uma TUPLA (como a lista de parâmetros)
-    if isinstance(node, tuple):
-        return list(node)   # converte tuple → lista para aparecer no JSON
-
-    # se for uma LISTA de nós
-    if isinstance(node, list):
-        return [ast_to_dict(n) for n in node]
+    # caso geral: nó da AST
+    def visit_ASTNode(self, node):
+        d = {"tipo": node.__class__.__name__}
 
-    # se não tiver __dict__, retorna como valor bruto
-    if not hasattr(node, "__dict__"):
-        return node
+        for attr, value in node.fields():
 
-    # caso geral: nó da AST
-    d = {"tipo": node.__class__.__name__}
+            if attr == "table":  # não incluir tabela de símbolos dentro da AST
+                continue
 
-    for attr, value in node.__dict__.items():
+            d[attr] = yield value
 
-        if attr == "table":  # não incluir tabela de símbolos dentro da AST
-            continue
+        return d
 
-        d[attr] = ast_to_dict(value)
+    # se for uma LISTA de nós
+    def visit_list(self, nodes):
+        result = []
+        for n in nodes:
+            result.append((yield n))
+        return result
 
-    return d
+    # se for uma TUPLA (como a lista de parâmetros)
+    def visit_tuple(self, node):
+        return list(node)   # converte tuple → lista para aparecer no JSON
 
+    # valores nulos e tipos primitivos (int, float, string, etc.)
+    def generic_visit(self, node):
+        return node
 
-def main():
-    json_tokens_file = achar_json_tokens()
-    print(f"Carregando tokens de {json_tokens_file}")
 
-    with open(json_tokens_file, "r", encoding="utf-8") as f:
-        dados = json.load(f)
+_ast_para_dict = AstParaDict()
 
-    tokens = dados["tokens"]
 
-    parser = Parser(tokens)
-    erros_sintaticos, tabelas_simbolos, funcoes_ast = parser.parse()
+def ast_to_dict(node):
+    return _ast_para_dict.visit(node)
 
-    sem = SemanticAnalyzer(funcoes_ast)
-    erros_semanticos = sem.analyze()
 
-    # montar estrutura final
+def montar_saida_semantica(funcoes_ast, erros_semanticos):
+    """Estrutura do saida_semantica.json"""
     saida = {
         "funcoes": {}
     }
@@ -73,8 +66,26 @@ def main():
             "erros_semanticos": erros_semanticos
         }
 
-    with open("saida_semantica.json", "w", encoding="utf-8") as f:
-        json.dump(saida, f, indent=2, ensure_ascii=False)
+    return saida
+
+
+def main():
+    json_tokens_file = achar_json_tokens()
+    print(f"Carregando tokens de {json_tokens_file}")
+
+    tokens = carregar_tokens(json_tokens_file)
+
+    parser = Parser(tokens)
+    erros_sintaticos, tabelas_simbolos, funcoes_ast = parser.parse()
+    if hasattr(tokens, "close"):
+        tokens.close()
+
+    sem = SemanticAnalyzer(funcoes_ast)
+    erros_semanticos = sem.analyze()
+
+    saida = montar_saida_semantica(funcoes_ast, erros_semanticos)
+
+    salvar_json("saida_semantica.json", saida)
 
     print("\nAnálise semântica concluída!")
     print(f"Erros semânticos encontrados: {len(erros_semanticos)}")
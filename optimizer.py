@@ -0,0 +1,268 @@
+# optimizer.py
+#
+# Otimizações sobre a AST já checada pelo semântico, feitas no lugar:
+#
+#   - dobra de constantes: operações entre IntConstNode/FloatConstNode
+#     (e o '-' de uma constante) viram uma constante só;
+#   - propagação: uma variável local com uma única atribuição, feita no
+#     nível de cima do corpo e de uma constante, é trocada pela constante
+#     nos usos (e a atribuição some);
+#   - identidades: x + 0, x - 0, x * 1, x / 1 e, em ints, x * 0 (quando x
+#     não tem chamadas nem divisões); - - x vira x; (x + 1) + 2 vira x + 3
+#     e (x * 2) * 3 vira x * 6 em ints;
+#   - redução de força: x * 2 vira x + x (com x uma variável) e a divisão
+#     de um float por uma potência de dois vira a multiplicação pelo
+#     inverso.
+#
+# Nada muda o que o programa faz em nenhum backend (ver runtime.py): não
+# se dobra uma divisão por zero (o erro continua na linha dela), ints só
+# são dobrados se o resultado cabe em 64 bits (o cgen.py escreve o
+# literal) e floats só se o resultado é finito e não é -0.0. A divisão
+# por c só vira multiplicação quando 1/c é exato, e as identidades de
+# float são só as exatas (x + 0.0 não é: -0.0 + 0.0 dá 0.0).
+#
+# A constante dobrada fica com a linha da operação; nas identidades, o
+# que sobra mantém a própria linha.
+
+import copy
+import math
+
+from p_ast import (
+    ASTNode, VarNode, IntConstNode, FloatConstNode, BinaryOpNode, UnaryOpNode,
+    AssignNode
+)
+from TipoToken import TipoToken
+from inliner import expression_size, is_pure
+from runtime import int_div
+from visitor import Transformer
+
+CONSTANTS = (IntConstNode, FloatConstNode)
+
+# maior int que vira constante (o cgen.py não escreve -2**63 como literal)
+INT_LIMIT = 2 ** 63 - 1
+
+ARITHMETIC = {
+    TipoToken.PLUS: lambda a, b: a + b,
+    TipoToken.MINUS: lambda a, b: a - b,
+    TipoToken.MULT: lambda a, b: a * b,
+}
+
+COMPARISONS = {
+    TipoToken.EQ: lambda a, b: a == b,
+    TipoToken.NE: lambda a, b: a != b,
+    TipoToken.LT: lambda a, b: a < b,
+    TipoToken.GT: lambda a, b: a > b,
+    TipoToken.LE: lambda a, b: a <= b,
+    TipoToken.GE: lambda a, b: a >= b,
+}
+
+
+def constant(value, type_name, line):
+    """Nó da constante, ou None se o valor não pode virar literal"""
+    if type_name == "int":
+        if abs(value) > INT_LIMIT:
+            return None
+        return IntConstNode(value, line)
+    if not math.isfinite(value) or (value == 0 and math.copysign(1.0, value) < 0):
+        return None
+    return FloatConstNode(value, line)
+
+
+def fold(op, a, b, type_name, line):
+    """Constante de 'a op b', ou None se não dá para dobrar"""
+    if op in COMPARISONS:
+        return IntConstNode(int(COMPARISONS[op](a, b)), line)
+    if op == TipoToken.DIV:
+        if b == 0:
+            return None  # o erro fica para a execução
+        return constant(int_div(a, b) if type_name == "int" else a / b, type_name, line)
+    return constant(ARITHMETIC[op](a, b), type_name, line)
+
+
+def exact_reciprocal(value):
+    """1/value, se value é uma potência de dois com inverso exato"""
+    if value == 0 or not math.isfinite(value) or math.frexp(value)[0] not in (0.5, -0.5):
+        return None
+    reciprocal = 1.0 / value
+    if reciprocal * value != 1.0 or math.frexp(reciprocal)[0] not in (0.5, -0.5):
+        return None
+    return reciprocal
+
+
+def _is_value(node, value):
+    return isinstance(node, CONSTANTS) and node.value == value
+
+
+def _assigned_once(func):
+    """Atribuições do nível de cima do corpo às únicas atribuições de
+    variáveis locais (não parâmetros)"""
+    counts = {}
+    stack = [func.body]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, AssignNode):
+            counts[node.name] = counts.get(node.name, 0) + 1
+        elif isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, ASTNode):
+            stack.extend(value for _, value in node.fields())
+
+    params = {name for name, _, _ in func.params}
+    return {
+        id(cmd) for cmd in func.body.commands
+        if isinstance(cmd, AssignNode) and counts[cmd.name] == 1
+        and cmd.name not in params and cmd.name in func.table.symbols
+    }
+
+
+class Optimizer(Transformer):
+    def __init__(self):
+        self.constants = {}  # variável -> constante propagada
+        self.once = set()
+        self.types = {}
+        self.eliminated = 0
+
+    def visit_FunctionNode(self, func):
+        self.constants = {}
+        self.once = _assigned_once(func)
+        self.types = {name: symbol.type for name, symbol in func.table.symbols.items()}
+        return (yield from self.generic_visit(func))
+
+    def visit_AssignNode(self, node):
+        node.expr = yield node.expr
+        if (id(node) in self.once and isinstance(node.expr, CONSTANTS)
+                and node.expr.type == self.types[node.name]):
+            self.constants[node.name] = node.expr
+            self.eliminated += 2
+            return None
+        return node
+
+    def visit_VarNode(self, node):
+        value = self.constants.get(node.name)
+        if value is None:
+            return node
+        value = copy.copy(value)
+        value.line = node.line
+        return value
+
+    def visit_UnaryOpNode(self, node):
+        node.expr = yield node.expr
+        inner = node.expr
+        if isinstance(inner, CONSTANTS):
+            folded = constant(-inner.value, inner.type, node.line)
+            if folded is not None:
+                self.eliminated += 1
+                return folded
+        if isinstance(inner, UnaryOpNode):
+            self.eliminated += 2
+            return inner.expr
+        return node
+
+    def visit_BinaryOpNode(self, node):
+        node.left = yield node.left
+        node.right = yield node.right
+        left, right = node.left, node.right
+        if isinstance(left, CONSTANTS) and isinstance(right, CONSTANTS):
+            folded = fold(node.op, left.value, right.value, node.type, node.line)
+            if folded is not None:
+                self.eliminated += 2
+                return folded
+        if node.type == "int":
+            return self.simplify_int(node, left, right)
+        if node.type == "float":
+            return self.simplify_float(node, left, right)
+        return node
+
+    def keep(self, kept, dropped):
+        """'kept' fica no lugar da operação; 'dropped' sai junto com ela"""
+        self.eliminated += 1 + expression_size(dropped)
+        return kept
+
+    def simplify_int(self, node, left, right):
+        op = node.op
+        if op == TipoToken.PLUS:
+            if _is_value(right, 0):
+                return self.keep(left, right)
+            if _is_value(left, 0):
+                return self.keep(right, left)
+        elif op == TipoToken.MINUS and _is_value(right, 0):
+            return self.keep(left, right)
+        elif op == TipoToken.MULT:
+            if _is_value(right, 1):
+                return self.keep(left, right)
+            if _is_value(left, 1):
+                return self.keep(right, left)
+            if _is_value(right, 0) and is_pure(left):
+                return self.keep(right, left)
+            if _is_value(left, 0) and is_pure(right):
+                return self.keep(left, right)
+        elif op == TipoToken.DIV and _is_value(right, 1):
+            return self.keep(left, right)
+
+        if isinstance(right, IntConstNode):
+            combined = self.reassociate(node, left, right)
+            if combined is not None:
+                return combined
+        return self.double(node, left, right)
+
+    def reassociate(self, node, left, right):
+        """(x + c1) + c2 -> x + (c1 + c2) e (x * c1) * c2 -> x * (c1 * c2)
+        (em ints a ordem não muda o resultado, nem com o estouro do C)"""
+        if not (isinstance(left, BinaryOpNode) and isinstance(left.right, IntConstNode)):
+            return None
+        additive = (TipoToken.PLUS, TipoToken.MINUS)
+        if node.op in additive and left.op in additive:
+            sign = 1 if left.op == TipoToken.PLUS else -1
+            value = sign * left.right.value + (right.value if node.op == TipoToken.PLUS else -right.value)
+            op = TipoToken.PLUS if value >= 0 else TipoToken.MINUS
+            value = abs(value)
+        elif node.op == TipoToken.MULT and left.op == TipoToken.MULT:
+            op, value = TipoToken.MULT, left.right.value * right.value
+        else:
+            return None
+
+        folded = constant(value, "int", node.line)
+        if folded is None:
+            return None
+        node.op, node.left, node.right = op, left.left, folded
+        self.eliminated += 2
+        # o resultado pode ser uma identidade (x + 1 - 1)
+        return self.simplify_int(node, node.left, node.right)
+
+    def simplify_float(self, node, left, right):
+        op = node.op
+        if op == TipoToken.MINUS and _is_value(right, 0.0):
+            return self.keep(left, right)
+        if op == TipoToken.MULT:
+            if _is_value(right, 1.0):
+                return self.keep(left, right)
+            if _is_value(left, 1.0):
+                return self.keep(right, left)
+        elif op == TipoToken.DIV and isinstance(right, FloatConstNode):
+            if right.value == 1.0:
+                return self.keep(left, right)
+            reciprocal = exact_reciprocal(right.value)
+            if reciprocal is not None:
+                node.op = TipoToken.MULT
+                node.right = FloatConstNode(reciprocal, right.line)
+                return node
+        return self.double(node, left, right)
+
+    def double(self, node, left, right):
+        """x * 2 -> x + x, com x uma variável"""
+        if node.op != TipoToken.MULT:
+            return node
+        if isinstance(left, VarNode) and _is_value(right, 2):
+            node.op, node.right = TipoToken.PLUS, copy.copy(left)
+        elif isinstance(right, VarNode) and _is_value(left, 2):
+            node.op, node.left = TipoToken.PLUS, copy.copy(right)
+        return node
+
+
+def optimize(functions_ast):
+    """Otimiza, no lugar, as funções do programa; retorna quantos nós da
+    AST foram eliminados"""
+    optimizer = Optimizer()
+    for func in functions_ast:
+        optimizer.visit(func)
+    return optimizer.eliminated
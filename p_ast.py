@@ -0,0 +1,156 @@
+
+
+class ASTNode:
+    # Os nós usam __slots__ (sem __dict__ por instância): a AST de um
+    # arquivo grande ocupa bem menos memória. Os atributos de cada nó são
+    # os de __slots__, na ordem em que aparecem na saída JSON.
+    __slots__ = ()
+
+    def fields(self):
+        """(nome, valor) de cada atributo do nó"""
+        return [(name, getattr(self, name)) for name in self.__slots__]
+
+
+
+# expressões
+
+
+class VarNode(ASTNode):
+    __slots__ = ("name", "line", "type")
+
+    def __init__(self, name, line):
+        self.name = name
+        self.line = line
+        self.type = None
+
+
+class IntConstNode(ASTNode):
+    __slots__ = ("value", "line", "type")
+
+    def __init__(self, value, line):
+        self.value = int(value)
+        self.line = line
+        self.type = "int"
+
+
+class FloatConstNode(ASTNode):
+    __slots__ = ("value", "line", "type")
+
+    def __init__(self, value, line):
+        self.value = float(value)
+        self.line = line
+        self.type = "float"
+
+
+class CharConstNode(ASTNode):
+    __slots__ = ("value", "line", "type")
+
+    def __init__(self, value, line):
+        self.value = value
+        self.line = line
+        self.type = "char"
+
+
+class StringNode(ASTNode):
+    __slots__ = ("value", "line", "type")
+
+    def __init__(self, value, line):
+        self.value = value
+        self.line = line
+        self.type = "string"
+
+
+class BinaryOpNode(ASTNode):
+    __slots__ = ("op", "left", "right", "line", "type")
+
+    def __init__(self, op, left, right, line):
+        self.op = op
+        self.left = left
+        self.right = right
+        self.line = line
+        self.type = None
+
+
+class UnaryOpNode(ASTNode):
+    __slots__ = ("op", "expr", "line", "type")
+
+    def __init__(self, op, expr, line):
+        self.op = op
+        self.expr = expr
+        self.line = line
+        self.type = None
+
+
+class CallNode(ASTNode):
+    __slots__ = ("name", "args", "line", "type")
+
+    def __init__(self, name, args, line):
+        self.name = name
+        self.args = args
+        self.line = line
+        self.type = None
+
+
+class AssignNode(ASTNode):
+    __slots__ = ("name", "expr", "line")
+
+    def __init__(self, name, expr, line):
+        self.name = name
+        self.expr = expr
+        self.line = line
+
+
+class PrintNode(ASTNode):
+    __slots__ = ("args", "line")
+
+    def __init__(self, args, line):
+        self.args = args
+        self.line = line
+
+
+class ReturnNode(ASTNode):
+    __slots__ = ("expr", "line")
+
+    def __init__(self, expr, line):
+        self.expr = expr
+        self.line = line
+
+
+class BlockNode(ASTNode):
+    __slots__ = ("commands",)
+
+    def __init__(self, commands):
+        self.commands = commands
+
+
+class IfNode(ASTNode):
+    __slots__ = ("cond", "then_body", "else_body", "line")
+
+    def __init__(self, cond, then_body, else_body, line):
+        self.cond = cond
+        self.then_body = then_body
+        self.else_body = else_body  # BlockNode ou None ('else if' é um bloco com o if)
+        self.line = line
+
+
+class WhileNode(ASTNode):
+    __slots__ = ("cond", "body", "line")
+
+    def __init__(self, cond, body, line):
+        self.cond = cond
+        self.body = body
+        self.line = line
+
+
+
+
+class FunctionNode(ASTNode):
+    __slots__ = ("name", "params", "return_type", "body", "table", "line")
+
+    def __init__(self, name, params, return_type, body, table, line):
+        self.name = name
+        self.params = params
+        self.return_type = return_type  # None: a função não retorna valor
+        self.body = body
+        self.table = table
+        self.line = line
@@ -0,0 +1,187 @@
+# pipeline.py
+#
+# Executa léxico -> sintático -> semântico no mesmo processo, passando os
+# tokens (BufferTokens), as tabelas de símbolos e a AST direto entre as
+# fases. Os arquivos de saída só são gravados quando pedidos.
+#
+#     python pipeline.py programa.p [--saida DIR] [--json] [--cache DIR] [--inline] [--otimizar]
+
+import argparse
+import os
+import time
+
+from arena_ast import ArenaAST
+from buffer_tokens import analisar_para_buffer
+from cache import CacheCompilacao
+from inliner import inline_calls
+from main import montar_dados_tokens
+from main2 import Parser
+from main_semantico import montar_saida_semantica
+from optimizer import optimize
+from read_file import save_string
+from saida_json import salvar_json
+from semantic import SemanticAnalyzer
+from TipoToken import TipoToken
+from tokens_binarios import salvar_tokens_binario
+
+
+class ResultadoCompilacao:
+    """Tudo o que as três fases produziram para um arquivo .p"""
+
+    def __init__(self, arquivo, tokens, erros_lexicos, erros_sintaticos,
+                 tabelas, funcoes, erros_semanticos, tempos):
+        self.arquivo = arquivo
+        self.tokens = tokens
+        self.erros_lexicos = erros_lexicos
+        self.erros_sintaticos = erros_sintaticos
+        self.tabelas = tabelas
+        self.funcoes = funcoes
+        self.erros_semanticos = erros_semanticos
+        self.tempos = tempos
+        self.do_cache = False
+
+    # O pickle (usado pelo cache e pelo lote.py) é recursivo e não aguenta
+    # uma AST funda; a AST vai como ArenaAST, que é só arrays.
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        estado["funcoes"] = ArenaAST(self.funcoes)
+        return estado
+
+    def __setstate__(self, estado):
+        estado["funcoes"] = estado["funcoes"].para_ast()
+        self.__dict__.update(estado)
+
+    @property
+    def total_erros(self):
+        return len(self.erros_lexicos) + len(self.erros_sintaticos) + len(self.erros_semanticos)
+
+
+def compilar_codigo(codigo, arquivo="programa.p"):
+    """Roda as três fases sobre o código-fonte, sem gravar nada em disco"""
+    tempos = {}
+
+    inicio = time.perf_counter()
+    tokens, erros_lexicos = analisar_para_buffer(codigo)
+    tempos["lexico"] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    erros_sintaticos, tabelas, funcoes = Parser(tokens).parse()
+    tempos["sintatico"] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    erros_semanticos = SemanticAnalyzer(funcoes).analyze()
+    tempos["semantico"] = time.perf_counter() - inicio
+
+    return ResultadoCompilacao(
+        arquivo, tokens, erros_lexicos, erros_sintaticos,
+        tabelas, funcoes, erros_semanticos, tempos
+    )
+
+
+def compilar_arquivo(caminho, cache=None):
+    """Compila um arquivo .p; com um cache.CacheCompilacao, reaproveita o
+    resultado de um arquivo com o mesmo conteúdo já compilado antes."""
+    with open(caminho, 'rb') as f:
+        dados = f.read()
+
+    if cache is not None:
+        chave = cache.chave(dados)
+        resultado = cache.obter(chave)
+        if resultado is not None:
+            resultado.arquivo = caminho
+            resultado.do_cache = True
+            return resultado
+
+    codigo = dados.decode('utf-8')
+    if '\r' in codigo:
+        # mesma normalização de quebras de linha do open() em modo texto
+        codigo = codigo.replace('\r\n', '\n').replace('\r', '\n')
+    resultado = compilar_codigo(codigo, caminho)
+
+    if cache is not None:
+        cache.guardar(chave, resultado)
+    return resultado
+
+
+def salvar_artefatos(resultado, diretorio=".", exportar_json=False):
+    """Grava as saídas das três fases em 'diretorio' e retorna os caminhos.
+
+    Os nomes são os mesmos dos scripts separados (tokens_<nome>.ptok,
+    saida_sintatica.json, tabelas_simbolos.json, saida_semantica.json);
+    com exportar_json também grava tokens_<nome>.json.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    nome_base = os.path.splitext(os.path.basename(resultado.arquivo))[0]
+    caminhos = []
+
+    def caminho(nome):
+        caminhos.append(os.path.join(diretorio, nome))
+        return caminhos[-1]
+
+    salvar_tokens_binario(caminho(f"tokens_{nome_base}.ptok"), resultado.tokens.tuplas())
+
+    if exportar_json:
+        tabelas = resultado.tokens.tabelas
+        dados = montar_dados_tokens(
+            list(resultado.tokens.tuplas()),
+            tabelas[TipoToken.ID], tabelas[TipoToken.INT_CONST],
+            tabelas[TipoToken.FLOAT_CONST], tabelas[TipoToken.FMT_STRING],
+            resultado.erros_lexicos, resultado.arquivo
+        )
+        salvar_json(caminho(f"tokens_{nome_base}.json"), dados)
+
+    salvar_json(caminho("saida_sintatica.json"), {"erros_sintaticos": resultado.erros_sintaticos})
+    salvar_json(caminho("tabelas_simbolos.json"), {"tabelas": [t.to_dict() for t in resultado.tabelas]})
+    salvar_json(
+        caminho("saida_semantica.json"),
+        montar_saida_semantica(resultado.funcoes, resultado.erros_semanticos)
+    )
+
+    return caminhos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compila um programa P (léxico, sintático e semântico)")
+    parser.add_argument("arquivo", nargs="?", help="arquivo .p (se omitido, pergunta qual usar)")
+    parser.add_argument("--saida", help="diretório onde gravar as saídas (padrão: não grava)")
+    parser.add_argument("--json", action="store_true", help="grava também tokens_<nome>.json")
+    parser.add_argument("--cache", help="diretório do cache de resultados")
+    parser.add_argument("--inline", action="store_true",
+                        help="expande as chamadas a funções pequenas (inliner.py)")
+    parser.add_argument("--otimizar", action="store_true",
+                        help="dobra constantes e simplifica expressões (optimizer.py)")
+    args = parser.parse_args()
+
+    if args.arquivo:
+        cache = CacheCompilacao(args.cache) if args.cache else None
+        resultado = compilar_arquivo(args.arquivo, cache)
+    else:
+        codigo, nome_arquivo = save_string()
+        if not codigo:
+            return
+        resultado = compilar_codigo(codigo, nome_arquivo)
+
+    print(f"\n=== {resultado.arquivo} ===")
+    print(f"Tokens: {len(resultado.tokens)}")
+    for fase, erros in (("léxicos", resultado.erros_lexicos),
+                        ("sintáticos", resultado.erros_sintaticos),
+                        ("semânticos", resultado.erros_semanticos)):
+        print(f"Erros {fase}: {len(erros)}")
+        for erro in erros:
+            print(" -", erro["erro"] if isinstance(erro, dict) else erro)
+
+    if args.inline and not resultado.total_erros:
+        print(f"Chamadas expandidas: {inline_calls(resultado.funcoes)}")
+    if args.otimizar and not resultado.total_erros:
+        print(f"Nós eliminados: {optimize(resultado.funcoes)}")
+
+    tempo_total = sum(resultado.tempos.values())
+    print(f"Tempo total: {tempo_total * 1000:.2f} ms" + (" (do cache)" if resultado.do_cache else ""))
+
+    if args.saida:
+        for caminho in salvar_artefatos(resultado, args.saida, args.json):
+            print(f"Salvo: {caminho}")
+
+
+if __name__ == "__main__":
+    main()
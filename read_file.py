@@ -1,5 +1,7 @@
 # read_file.py
+import mmap
 import os
+from contextlib import contextmanager
 
 def save_string():
     """Lê um arquivo .p do diretório atual e retorna (conteúdo, nome_arquivo)"""
@@ -31,4 +33,18 @@ def save_string():
         return "", ""
     except Exception as e:
         print(f"Erro ao ler arquivo: {e}")
-        return "", ""
\ No newline at end of file
+        return "", ""
+
+@contextmanager
+def abrir_fonte(caminho, usar_mmap=True):
+    """Abre um arquivo .p para leitura em fluxo (ver afd.escanear_arquivo).
+
+    Com usar_mmap o arquivo é mapeado em memória e lido como bytes; arquivos
+    vazios (que não podem ser mapeados) caem na leitura comum.
+    """
+    with open(caminho, 'rb') as f:
+        if usar_mmap and os.fstat(f.fileno()).st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                yield m
+        else:
+            yield f
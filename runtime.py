@@ -0,0 +1,198 @@
+# runtime.py
+#
+# O que os backends de execução (interpreter.py e os seguintes)
+# compartilham, para um programa P fazer a mesma coisa em qualquer um:
+#
+#   - valores: int e float do Python, char e string como str;
+#   - variáveis: cada função tem um quadro (lista) com uma posição por
+#     símbolo da SymbolTable, na ordem da tabela (os parâmetros primeiro),
+#     começando com o valor zero do tipo;
+#   - '/' entre ints trunca em direção a zero, e dividir por zero (int ou
+#     float) é erro de execução;
+#   - comparações resultam em int (0 ou 1);
+#   - println("texto {} ...", a, ...): cada '{}' é trocado pelo argumento
+#     seguinte; floats saem na menor forma que volta ao mesmo valor
+#     ('%.Ng' com o menor N), então 1.0 sai como '1' e 0.1 como '0.1';
+#   - uma função só roda com tantos argumentos quantos são os parâmetros
+#     (o semântico aceita 'fn main(x: int)', mas main é chamada sem nenhum).
+
+import sys
+
+from p_ast import (
+    ASTNode, StringNode, BinaryOpNode, UnaryOpNode, CallNode, AssignNode, PrintNode,
+    ReturnNode, BlockNode, IfNode, WhileNode
+)
+
+
+class ExecutionError(Exception):
+    """Erro durante a execução de um programa P (ou ao prepará-lo)"""
+
+
+# o que é executado num bloco (o resto o semântico também ignora)
+STATEMENTS = (AssignNode, PrintNode, ReturnNode, IfNode, WhileNode)
+EXPRESSIONS = (BinaryOpNode, UnaryOpNode, CallNode)  # valor descartado
+
+DEFAULT_VALUES = {"int": 0, "float": 0.0, "char": "\0", "string": ""}
+
+_ESCAPES = {"n": "\n", "t": "\t", "\\": "\\", "0": "\0"}
+
+
+def default_value(type_name):
+    return DEFAULT_VALUES.get(type_name)
+
+
+def check_arguments(name, n_params, n_args):
+    """Erro de execução se a função 'name' é chamada com o número errado
+    de argumentos (o ponto de entrada de cada backend passa por aqui)"""
+    if n_params != n_args:
+        raise ExecutionError(
+            f"[ERRO DE EXECUÇÃO] Função '{name}' tem {n_params} parâmetro(s) "
+            f"e foi chamada com {n_args} argumento(s)"
+        )
+
+
+def frame_layout(func):
+    """(nome -> posição no quadro, quadro inicial) de uma função"""
+    slots = {}
+    template = []
+    for name, symbol in func.table.symbols.items():
+        slots[name] = len(template)
+        template.append(default_value(symbol.type))
+    return slots, template
+
+
+def int_div(a, b):
+    """Divisão inteira truncada em direção a zero (como em C)"""
+    q = a // b
+    if q < 0 and q * b != a:
+        q += 1
+    return q
+
+
+def format_float(x):
+    for precision in range(1, 18):
+        text = "%.*g" % (precision, x)
+        if float(text) == x:
+            return text
+    return repr(x)
+
+
+def formatter(type_name):
+    """Função que converte um valor do tipo para o texto do println"""
+    if type_name == "float":
+        return format_float
+    if type_name == "int":
+        return str
+    return None  # char e string já são texto
+
+
+def decode_char(literal):
+    """Valor de um CharConstNode ("'a'" -> 'a'; "''" -> '\\0')"""
+    text = literal[1:-1] if len(literal) >= 2 and literal.endswith("'") else literal[1:]
+    return text[:1] or "\0"
+
+
+def decode_string(literal):
+    """Texto de um StringNode, sem as aspas e com \\n, \\t, \\\\ e \\0"""
+    text = literal[1:-1] if len(literal) >= 2 and literal.endswith('"') else literal[1:]
+    if "\\" not in text:
+        return text
+    out = []
+    i = 0
+    while i < len(text):
+        if text[i] == "\\" and i + 1 < len(text) and text[i + 1] in _ESCAPES:
+            out.append(_ESCAPES[text[i + 1]])
+            i += 2
+        else:
+            out.append(text[i])
+            i += 1
+    return "".join(out)
+
+
+def print_pieces(node):
+    """Divide um println em (textos fixos, argumentos): a saída é
+    textos[0] + arg0 + textos[1] + ... + textos[-1] + '\\n'"""
+    args = list(node.args)
+    if args and isinstance(args[0], StringNode):
+        pieces = decode_string(args.pop(0).value).split("{}")
+    else:
+        pieces = [""] * (len(args) + 1) if args else [""]
+        for k in range(1, len(args)):
+            pieces[k] = " "
+
+    if len(pieces) - 1 != len(args):
+        raise ExecutionError(
+            f"[ERRO DE EXECUÇÃO] println com {len(pieces) - 1} '{{}}' e "
+            f"{len(args)} argumento(s) (linha {node.line})"
+        )
+    pieces[-1] += "\n"
+    return pieces, args
+
+
+def check_types(functions_ast):
+    """Confere que toda expressão usada como valor tem o tipo anotado pelo
+    semântico; os backends contam com isso (ExecutionError se não tem, em
+    vez de um TypeError no meio da execução ou do código gerado)"""
+    # de trás para frente na pilha: o primeiro erro do texto é o achado
+    stack = [func.body for func in reversed(functions_ast)]
+    while stack:
+        node = stack.pop()
+        kind = node.__class__
+        if kind is BinaryOpNode:
+            stack += (node.right, node.left)
+        elif kind is BlockNode:
+            for cmd in reversed(node.commands):
+                if isinstance(cmd, CallNode):
+                    stack.extend(reversed(cmd.args))  # chamada como comando: valor descartado
+                elif isinstance(cmd, STATEMENTS + EXPRESSIONS):
+                    stack.append(cmd)
+            continue
+        elif kind is UnaryOpNode:
+            stack.append(node.expr)
+        elif kind is CallNode:
+            stack.extend(reversed(node.args))
+        elif isinstance(node, STATEMENTS):
+            stack.extend(value for _, value in reversed(node.fields())
+                         if isinstance(value, (ASTNode, list)))
+            continue
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+            continue
+        if getattr(node, "type", None) is None:  # None: expressão que faltou no parser
+            raise ExecutionError(
+                f"[ERRO DE EXECUÇÃO] Expressão sem tipo (linha {getattr(node, 'line', '?')}): "
+                f"o programa precisa passar pelo semântico sem erros"
+            )
+
+
+def too_deep(expr, limit):
+    """A expressão tem mais de 'limit' níveis (para no primeiro nó que
+    passar do limite, sem recursão)"""
+    stack = [(expr, 1)]
+    while stack:
+        node, depth = stack.pop()
+        if isinstance(node, list):
+            stack.extend((item, depth) for item in node)
+        elif isinstance(node, ASTNode):
+            if depth > limit:
+                return True
+            stack.extend((value, depth + 1) for _, value in node.fields())
+    return False
+
+
+def load_program(path, optimized=False):
+    """Compila um .p com o pipeline (e, com 'optimized', passa o
+    optimizer.py); se houver erros, mostra-os e retorna None"""
+    from optimizer import optimize
+    from pipeline import compilar_arquivo
+
+    resultado = compilar_arquivo(path)
+    if resultado.total_erros:
+        for erros in (resultado.erros_lexicos, resultado.erros_sintaticos,
+                      resultado.erros_semanticos):
+            for erro in erros:
+                print(erro["erro"] if isinstance(erro, dict) else erro, file=sys.stderr)
+        return None
+    if optimized:
+        optimize(resultado.funcoes)
+    return resultado.funcoes
@@ -0,0 +1,80 @@
+# saida_json.py
+#
+# Gravação de JSON sem recursão. O json.dump com indent percorre os dados
+# recursivamente e estoura o limite de recursão numa AST funda (uma
+# expressão com milhares de operandos vira milhares de dicts aninhados);
+# aqui o percurso usa uma pilha explícita. A saída é idêntica à de
+# json.dump(dados, f, indent=recuo, ensure_ascii=False).
+#
+# Com recuo, o tamanho do texto cresce com nós x profundidade (cada linha
+# é recuada até o nível dela); recuo=None grava compacto, em tempo linear.
+
+import json
+
+_codificar = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def pedacos_json(dados, recuo=2):
+    """Texto JSON de 'dados', em pedaços (str)"""
+    pilha = []  # [iterador dos itens, é dict, primeiro item] por nível aberto
+    valor = dados
+
+    if recuo is None:
+        separador = ", "
+        def quebra(nivel):
+            return ""
+    else:
+        separador = ","
+        def quebra(nivel):
+            return "\n" + " " * (recuo * nivel)
+
+    while True:
+        if isinstance(valor, dict) and valor:
+            yield "{"
+            pilha.append([iter(valor.items()), True, True])
+        elif isinstance(valor, (list, tuple)) and valor:
+            yield "["
+            pilha.append([iter(valor), False, True])
+        else:
+            yield _codificar(valor)
+
+        # próximo valor a escrever (fechando os níveis que acabaram)
+        while pilha:
+            nivel = pilha[-1]
+            item = next(nivel[0], _FIM)
+            if item is _FIM:
+                pilha.pop()
+                yield quebra(len(pilha)) + ("}" if nivel[1] else "]")
+                continue
+
+            yield ("" if nivel[2] else separador) + quebra(len(pilha))
+            nivel[2] = False
+            if nivel[1]:
+                chave, valor = item
+                yield _codificar(_chave(chave)) + ": "
+            else:
+                valor = item
+            break
+        else:
+            return
+
+
+_FIM = object()
+
+
+def _chave(chave):
+    # mesma conversão do json para chaves que não são str
+    if isinstance(chave, str):
+        return chave
+    if chave is True or chave is False or chave is None:
+        return json.dumps(chave)
+    return str(chave)
+
+
+def escrever_json(dados, arquivo, recuo=2):
+    arquivo.writelines(pedacos_json(dados, recuo))
+
+
+def salvar_json(caminho, dados, recuo=2):
+    with open(caminho, "w", encoding="utf-8") as f:
+        escrever_json(dados, f, recuo)
@@ -1,121 +1,302 @@
-
-
-from ast import (
+from p_ast import (
     FunctionNode, BlockNode,
-    VarNode, IntConstNode, FloatConstNode, CharConstNode, StringNode,
-    BinaryOpNode, AssignNode, PrintNode, ReturnNode
+    BinaryOpNode, UnaryOpNode, CallNode, AssignNode, PrintNode, ReturnNode,
+    IfNode, WhileNode
+)
+from diagnostico import Diagnostico
+from visitor import Visitor
+
+# nós checados como comando (um átomo sozinho, como 'x;', não é checado)
+COMMANDS = (
+    AssignNode, PrintNode, ReturnNode, BinaryOpNode, UnaryOpNode, CallNode,
+    IfNode, WhileNode
 )
 
-class SemanticAnalyzer:
-    def __init__(self, functions_ast):
+
+class Signature:
+    """Assinatura de uma função: tipos dos parâmetros e tipo de retorno"""
+
+    def __init__(self, name, param_types, return_type, line):
+        self.name = name
+        self.param_types = param_types
+        self.return_type = return_type
+        self.line = line
+
+
+def build_signatures(functions_ast):
+    """Índice nome -> Signature de todas as funções do programa (com nomes
+    repetidos, vale a última; a repetição é um erro, ver
+    redefinition_errors)"""
+    return {
+        func.name: Signature(func.name, [ptype for _, ptype, _ in func.params],
+                             func.return_type, func.line)
+        for func in functions_ast
+    }
+
+
+def redefinition_errors(functions_ast):
+    """id da função -> erro, para cada função com o nome de uma anterior
+    (as chamadas continuam indo para a última, como em build_signatures)"""
+    first = {}
+    errors = {}
+    for func in functions_ast:
+        previous = first.setdefault(func.name, func)
+        if previous is not func:
+            errors[id(func)] = Diagnostico(
+                f"[ERRO SEMÂNTICO] Função '{func.name}' já definida na linha "
+                f"{previous.line} (linha {{linha}})",
+                func.line
+            )
+    return errors
+
+
+class SemanticAnalyzer(Visitor):
+    # Cada classe de nó tem seu visit_<Classe> (despachado pelo Visitor):
+    # nas expressões o retorno é o tipo ("int", "float", ...) ou None, que
+    # também fica gravado no atributo 'type' do nó; as fases seguintes leem
+    # esse tipo em vez de calculá-lo de novo. Os filhos são pedidos com
+    # 'yield', sem recursão (ver visitor.py).
+
+    def __init__(self, functions_ast, signatures=None):
         self.functions = functions_ast
         self.errors = []
+        # as assinaturas de todas as funções, antes de checar qualquer corpo
+        self.signatures = build_signatures(functions_ast) if signatures is None else signatures
+
+
+    def report(self, line, message):
+        """Registra um erro; '{linha}' na mensagem vira a linha"""
+        self.errors.append(Diagnostico(message, line))
 
-   
     def analyze(self):
+        redefined = redefinition_errors(self.functions)
         for func in self.functions:
+            if id(func) in redefined:
+                self.errors.append(redefined[id(func)])
             self.check_function(func)
         return self.errors
 
- 
+
     def check_function(self, func: FunctionNode):
+        self.current_function = func
         self.current_table = func.table
         self.check_block(func.body)
 
 
     def check_block(self, block: BlockNode):
-        for cmd in block.commands:
-            self.check_command(cmd)
+        self.visit(block)
 
     def check_command(self, cmd):
+        # as regras de um comando dentro de um bloco (chamadas descartam o valor)
+        self.visit(BlockNode([cmd]))
 
-       
-        if isinstance(cmd, AssignNode):
-            symbol = self.current_table.symbols.get(cmd.name)
+    def check_expression(self, expr):
+        return self.visit(expr)
 
-            if not symbol:
-                self.errors.append(
-                    f"[ERRO SEMÂNTICO] Variável '{cmd.name}' não declarada (linha {cmd.line})"
-                )
-                return
+    # comandos
 
-            expr_type = self.check_expression(cmd.expr)
+    def visit_BlockNode(self, block):
+        for cmd in block.commands:
+            if isinstance(cmd, CallNode):
+                # chamada como comando: o valor (se houver) é descartado
+                yield from self.check_call(cmd)
+            elif isinstance(cmd, COMMANDS):
+                yield cmd
 
-            if expr_type and expr_type != symbol.type:
-                self.errors.append(
-                    f"[ERRO SEMÂNTICO] Tipo incompatível em '{cmd.name}' = expr "
-                    f"(linha {cmd.line}) → esperado {symbol.type}, encontrado {expr_type}"
-                )
-            return
+    def visit_IfNode(self, cmd):
+        yield from self.check_condition(cmd, "if")
+        yield cmd.then_body
+        if cmd.else_body is not None:
+            yield cmd.else_body
 
-      
-        if isinstance(cmd, PrintNode):
-            for expr in cmd.args:
-                self.check_expression(expr)
-            return
+    def visit_WhileNode(self, cmd):
+        yield from self.check_condition(cmd, "while")
+        yield cmd.body
 
-    
-        if isinstance(cmd, ReturnNode):
-            self.check_expression(cmd.expr)
-            return
+    def check_condition(self, cmd, keyword):
+        # condições são int (o resultado das comparações)
+        cond_type = yield from self.value_type(cmd.cond, cmd.line)
+        if cond_type and cond_type != "int":
+            self.report(
+                cmd.line,
+                f"[ERRO SEMÂNTICO] Condição do '{keyword}' deve ser int, "
+                f"encontrado {cond_type} (linha {{linha}})"
+            )
 
-      
-        if isinstance(cmd, BinaryOpNode):
-            self.check_expression(cmd)
+    def visit_AssignNode(self, cmd):
+        symbol = self.current_table.symbols.get(cmd.name)
+
+        if not symbol:
+            self.report(
+                cmd.line,
+                f"[ERRO SEMÂNTICO] Variável '{cmd.name}' não declarada (linha {{linha}})"
+            )
             return
 
-    def check_expression(self, expr):
+        expr_type = yield from self.value_type(cmd.expr, cmd.line)
+
+        if expr_type and expr_type != symbol.type:
+            self.report(
+                cmd.line,
+                f"[ERRO SEMÂNTICO] Tipo incompatível em '{cmd.name}' = expr "
+                f"(linha {{linha}}) → esperado {symbol.type}, encontrado {expr_type}"
+            )
 
-        
-        if isinstance(expr, VarNode):
-            symbol = self.current_table.symbols.get(expr.name)
-            if not symbol:
-                self.errors.append(
+    def visit_PrintNode(self, cmd):
+        for expr in cmd.args:
+            yield from self.value_type(expr, cmd.line)
+
+    def visit_ReturnNode(self, cmd):
+        expr_type = yield from self.value_type(cmd.expr, cmd.line)
+        func = self.current_function
+
+        if func.return_type is None:
+            self.report(
+                cmd.line,
+                f"[ERRO SEMÂNTICO] Função '{func.name}' não tem tipo de retorno, "
+                f"mas retorna um valor (linha {{linha}})"
+            )
+        elif expr_type and expr_type != func.return_type:
+            self.report(
+                cmd.line,
+                f"[ERRO SEMÂNTICO] Tipo incompatível no retorno de '{func.name}' "
+                f"(linha {{linha}}) → esperado {func.return_type}, encontrado {expr_type}"
+            )
+
+    # expressões
+
+    def value_type(self, expr, line):
+        """Tipo de uma expressão usada como valor. Uma expressão sem tipo
+        sempre tem um erro registrado: se nenhum foi (um nó que o semântico
+        não conhece), registra um aqui."""
+        errors = len(self.errors)
+        expr_type = yield expr
+        if expr_type is None and expr is not None and len(self.errors) == errors:
+            self.report(line, "[ERRO SEMÂNTICO] Expressão sem tipo usada como valor (linha {linha})")
+        return expr_type
+
+    def visit_VarNode(self, expr):
+        symbol = self.current_table.symbols.get(expr.name)
+        if not symbol:
+            if expr.name in self.signatures:
+                self.report(
+                    expr.line,
+                    f"[ERRO SEMÂNTICO] '{expr.name}' é uma função, não uma variável "
+                    f"(linha {{linha}})"
+                )
+            else:
+                self.report(
+                    expr.line,
                     f"[ERRO SEMÂNTICO] Variável '{expr.name}' não declarada "
-                    f"(linha {expr.line})"
+                    f"(linha {{linha}})"
                 )
-                return None
-            return symbol.type
-
-        # INT
-        if isinstance(expr, IntConstNode):
-            return "int"
-
-        # FLOAT
-        if isinstance(expr, FloatConstNode):
-            return "float"
-
-        # CHAR
-        if isinstance(expr, CharConstNode):
-            return "char"
-
-        # STRING
-        if isinstance(expr, StringNode):
-            return "string"
-
-        # BINÁRIO
-        if isinstance(expr, BinaryOpNode):
-            left = self.check_expression(expr.left)
-            right = self.check_expression(expr.right)
-
-            # qualquer operação exige tipos compatíveis
-            if left != right:
-                self.errors.append(
-                    f"[ERRO SEMÂNTICO] Tipos incompatíveis em operação binária "
-                    f"'{expr.op}' (linha {expr.line})"
+            expr.type = None
+            return None
+        expr.type = symbol.type
+        return expr.type
+
+    def visit_constant(self, expr):
+        # o tipo de uma constante já vem do parser
+        return expr.type
+
+    visit_IntConstNode = visit_FloatConstNode = visit_constant
+    visit_CharConstNode = visit_StringNode = visit_constant
+
+    def visit_BinaryOpNode(self, expr):
+        expr.type = yield from self.binary_type(expr)
+        return expr.type
+
+    def visit_CallNode(self, expr):
+        # chamada dentro de uma expressão: precisa de um valor
+        call_type = yield from self.check_call(expr)
+        signature = self.signatures.get(expr.name)
+        if signature is not None and signature.return_type is None:
+            self.report(
+                expr.line,
+                f"[ERRO SEMÂNTICO] Função '{expr.name}' não tem tipo de retorno "
+                f"e foi usada como valor (linha {{linha}})"
+            )
+        return call_type
+
+    def check_call(self, expr):
+        arg_types = []
+        for arg in expr.args:
+            arg_types.append((yield arg))
+
+        signature = self.signatures.get(expr.name)
+        if signature is None:
+            self.report(
+                expr.line,
+                f"[ERRO SEMÂNTICO] Função '{expr.name}' não declarada (linha {{linha}})"
+            )
+            expr.type = None
+            return None
+
+        if len(arg_types) != len(signature.param_types):
+            self.report(
+                expr.line,
+                f"[ERRO SEMÂNTICO] Função '{expr.name}' espera "
+                f"{len(signature.param_types)} argumento(s), recebeu {len(arg_types)} "
+                f"(linha {{linha}})"
+            )
+        else:
+            for k, (arg_type, param_type) in enumerate(zip(arg_types, signature.param_types), 1):
+                if arg_type and arg_type != param_type:
+                    self.report(
+                        expr.line,
+                        f"[ERRO SEMÂNTICO] Tipo incompatível no argumento {k} de "
+                        f"'{expr.name}' (linha {{linha}}) → esperado {param_type}, "
+                        f"encontrado {arg_type}"
+                    )
+
+        expr.type = signature.return_type
+        return expr.type
+
+    def binary_type(self, expr):
+        left = yield expr.left
+        right = yield expr.right
+
+        # qualquer operação exige tipos compatíveis
+        if left != right:
+            self.report(
+                expr.line,
+                f"[ERRO SEMÂNTICO] Tipos incompatíveis em operação binária "
+                f"'{expr.op}' (linha {{linha}})"
+            )
+            return None
+
+        # Apenas int/float aceitos em + - * /
+        if expr.op in ["PLUS", "MINUS", "MULT", "DIV"]:
+            if left not in ["int", "float"]:
+                self.report(
+                    expr.line,
+                    f"[ERRO SEMÂNTICO] Operação '{expr.op}' só aceita int/float "
+                    f"(linha {{linha}})"
                 )
                 return None
+            return left  # preserva tipo
 
-            # Apenas int/float aceitos em + - * /
-            if expr.op in ["PLUS", "MINUS", "MULT", "DIV"]:
-                if left not in ["int", "float"]:
-                    self.errors.append(
-                        f"[ERRO SEMÂNTICO] Operação '{expr.op}' só aceita int/float "
-                        f"(linha {expr.line})"
-                    )
-                    return None
-                return left  # preserva tipo
+        # comparações (== != < > <= >=) resultam em int (0 ou 1)
+        return "int"
+
+    def visit_UnaryOpNode(self, expr):
+        expr.type = yield from self.unary_type(expr)
+        return expr.type
+
+    def unary_type(self, expr):
+        operand = yield expr.expr
+        if operand is None:
+            return None
 
+        if operand not in ["int", "float"]:
+            self.report(
+                expr.line,
+                f"[ERRO SEMÂNTICO] Operação '{expr.op}' só aceita int/float "
+                f"(linha {{linha}})"
+            )
             return None
+        return operand
 
+    def generic_visit(self, node):
+        # nós sem regra (ou None, numa expressão com erro): sem tipo
         return None
@@ -0,0 +1,52 @@
+# tabela_interna.py
+
+
+class TabelaInterna:
+    """Tabela de lexemas do léxico (identificadores, números, textos).
+
+    Cada lexema distinto recebe um índice inteiro estável, na ordem em que
+    apareceu pela primeira vez. A busca é por dicionário, então inserir e
+    consultar custa O(1) em vez de percorrer uma lista.
+    """
+
+    def __init__(self):
+        self.indices = {}
+        self.lexemas = []
+
+    def internar(self, lexema):
+        """Retorna o índice do lexema, inserindo-o se ainda não existir"""
+        indice = self.indices.get(lexema)
+        if indice is None:
+            indice = len(self.lexemas)
+            self.indices[lexema] = indice
+            self.lexemas.append(lexema)
+        return indice
+
+    def indice(self, lexema):
+        return self.indices.get(lexema)
+
+    def copy(self):
+        """Cópia independente (mesmos índices)"""
+        nova = TabelaInterna()
+        nova.indices = dict(self.indices)
+        nova.lexemas = list(self.lexemas)
+        return nova
+
+    def clear(self):
+        self.indices.clear()
+        self.lexemas.clear()
+
+    def __getitem__(self, indice):
+        return self.lexemas[indice]
+
+    def __contains__(self, lexema):
+        return lexema in self.indices
+
+    def __len__(self):
+        return len(self.lexemas)
+
+    def __iter__(self):
+        return iter(self.lexemas)
+
+    def __repr__(self):
+        return repr(self.lexemas)
@@ -0,0 +1,156 @@
+# tokens_binarios.py
+#
+# Formato binário de tokens (tokens_<nome>.ptok), usado para passar os tokens
+# do léxico (main.py) para o sintático/semântico sem JSON:
+#
+#   cabeçalho   '<4sHHIII': "PTOK", versão, reservado, nº de tokens,
+#               nº de strings, tamanho do bloco de texto
+#   registros   nº de tokens × 4 int32: código do tipo, id do lexema,
+#               linha, índice na tabela do léxico (-1 = sem tabela)
+#   offsets     (nº de strings + 1) × uint32 dentro do bloco de texto
+#   texto       lexemas distintos em UTF-8, concatenados
+#
+# Tudo em little-endian. Como os registros têm largura fixa, o leitor abre o
+# arquivo com mmap e acessa o token i direto, sem criar um dict por token.
+
+import glob
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from TipoToken import TIPOS, CODIGOS
+
+MAGICO = b"PTOK"
+VERSAO = 1
+CABECALHO = struct.Struct('<4sHHIII')
+CAMPOS = 4  # int32 por registro
+
+
+def salvar_tokens_binario(caminho, tokens):
+    """Grava tokens (tuplas (tipo, lexema, linha[, índice])) no formato .ptok"""
+    registros = array('i')
+    ids = {}
+    offsets = array('I', [0])
+    texto = bytearray()
+
+    for token in tokens:
+        tipo, lexema, linha = token[0], token[1], token[2]
+        indice = token[3] if len(token) > 3 and token[3] is not None else -1
+
+        id_lexema = ids.get(lexema)
+        if id_lexema is None:
+            id_lexema = ids[lexema] = len(ids)
+            texto += lexema.encode('utf-8')
+            offsets.append(len(texto))
+
+        registros.extend((CODIGOS[tipo], id_lexema, linha, indice))
+
+    if sys.byteorder != 'little':
+        registros.byteswap()
+        offsets.byteswap()
+
+    with open(caminho, 'wb') as f:
+        f.write(CABECALHO.pack(MAGICO, VERSAO, 0, len(registros) // CAMPOS, len(ids), len(texto)))
+        f.write(registros.tobytes())
+        f.write(offsets.tobytes())
+        f.write(texto)
+
+
+class TokensBinarios:
+    """Leitor de um arquivo .ptok mapeado em memória.
+
+    Oferece a mesma interface de acesso do BufferTokens (tipo(i), codigo(i),
+    lexema(i), linha(i), indice(i)), então pode ser passado direto para o Parser.
+    """
+
+    def __init__(self, caminho):
+        with open(caminho, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magico, versao, _, n_tokens, n_strings, _ = CABECALHO.unpack_from(self._mmap)
+        if magico != MAGICO or versao != VERSAO:
+            self._mmap.close()
+            raise ValueError(f"{caminho} não é um arquivo de tokens .ptok válido")
+
+        inicio = CABECALHO.size
+        fim_registros = inicio + n_tokens * CAMPOS * 4
+        fim_offsets = fim_registros + (n_strings + 1) * 4
+
+        visao = memoryview(self._mmap)
+        if sys.byteorder == 'little':
+            self._registros = visao[inicio:fim_registros].cast('i')
+            self._offsets = visao[fim_registros:fim_offsets].cast('I')
+        else:
+            self._registros = array('i', visao[inicio:fim_registros])
+            self._registros.byteswap()
+            self._offsets = array('I', visao[fim_registros:fim_offsets])
+            self._offsets.byteswap()
+        self._texto = visao[fim_offsets:]
+        self._n_tokens = n_tokens
+
+    def __len__(self):
+        return self._n_tokens
+
+    def _campo(self, i, campo):
+        if not 0 <= i < self._n_tokens:
+            raise IndexError(i)
+        return self._registros[i * CAMPOS + campo]
+
+    def tipo(self, i):
+        return TIPOS[self._campo(i, 0)]
+
+    def codigo(self, i):
+        return self._campo(i, 0)
+
+    def lexema(self, i):
+        id_lexema = self._campo(i, 1)
+        return str(self._texto[self._offsets[id_lexema]:self._offsets[id_lexema + 1]], 'utf-8')
+
+    def linha(self, i):
+        return self._campo(i, 2)
+
+    def indice(self, i):
+        indice = self._campo(i, 3)
+        return None if indice < 0 else indice
+
+    def __getitem__(self, i):
+        """Token i no formato de dict usado pelo JSON de tokens"""
+        return {
+            "token": self.tipo(i),
+            "lexema": self.lexema(i),
+            "linha": self.linha(i),
+            "indice": self.indice(i)
+        }
+
+    def close(self):
+        # as visões precisam ser liberadas antes de fechar o mmap
+        for visao in (self._registros, self._offsets, self._texto):
+            if isinstance(visao, memoryview):
+                visao.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def achar_arquivo_tokens():
+    """Arquivo de tokens (.ptok ou .json) mais recente do diretório atual"""
+    arquivos = glob.glob("tokens_*.ptok") + glob.glob("tokens_*.json")
+    if not arquivos:
+        return None
+    return max(arquivos, key=os.path.getctime)
+
+
+def carregar_tokens(caminho):
+    """Abre um arquivo de tokens: .ptok vira TokensBinarios, .json a lista de dicts"""
+    if caminho.endswith(".ptok"):
+        return TokensBinarios(caminho)
+
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)["tokens"]
@@ -0,0 +1,400 @@
+# transpiler.py
+#
+# Tradução de um programa P para Python: a AST checada vira uma árvore do
+# módulo ast da biblioteca padrão, que o compile() do CPython transforma
+# num code object. Cada função P vira uma função Python (p_<nome>, com as
+# variáveis v_<nome>), então aritmética, laços e chamadas rodam direto no
+# bytecode do CPython, sem interpretação no meio.
+#
+# Os nós gerados levam a linha do fonte P, então um erro de execução (a
+# divisão por zero) aponta para a linha certa do .p. As regras de
+# runtime.py valem aqui também: '/' entre ints passa por runtime.int_div,
+# comparações resultam em 1/0 e o println formata floats com format_float.
+#
+# Uma expressão aninhada demais para o compile() (mais de MAX_NESTING
+# níveis) é gerada em forma linear: cada operação vai para uma variável
+# temporária, na ordem em que seria avaliada.
+#
+# O code object é serializado com marshal; com --cache ele fica guardado
+# pelo conteúdo do .p, e a próxima execução não passa nem pelo compilador P
+# nem pelo compile().
+#
+#     python transpiler.py programa.p [--cache DIR] [--tempo]
+#     python transpiler.py programa.p --fonte     mostra o Python gerado
+
+import argparse
+import ast
+import contextlib
+import gc
+import importlib.util
+import marshal
+import sys
+import time
+
+from cache import CacheCompilacao
+from p_ast import UnaryOpNode
+from runtime import (
+    STATEMENTS, EXPRESSIONS, ExecutionError, check_arguments, check_types, default_value, int_div,
+    format_float, decode_char, decode_string, print_pieces, too_deep, load_program
+)
+import optimizer
+import runtime
+from TipoToken import TipoToken
+from visitor import Visitor
+
+MAX_NESTING = 100
+
+ARITHMETIC = {
+    TipoToken.PLUS: ast.Add,
+    TipoToken.MINUS: ast.Sub,
+    TipoToken.MULT: ast.Mult,
+}
+
+COMPARISONS = {
+    TipoToken.EQ: ast.Eq,
+    TipoToken.NE: ast.NotEq,
+    TipoToken.LT: ast.Lt,
+    TipoToken.GT: ast.Gt,
+    TipoToken.LE: ast.LtE,
+    TipoToken.GE: ast.GtE,
+}
+
+# nomes globais que o código gerado usa
+HELPERS = {"_div": int_div, "_float": format_float}
+
+
+def _at(node, line):
+    node.lineno = node.end_lineno = line
+    node.col_offset = node.end_col_offset = 0
+    return node
+
+
+def _name(identifier, line, store=False):
+    return _at(ast.Name(identifier, ast.Store() if store else ast.Load()), line)
+
+
+def _call(function, args, line):
+    return _at(ast.Call(_name(function, line), args, []), line)
+
+
+def _function_name(name):
+    return "p_" + name
+
+
+def _variable_name(name):
+    return "v_" + name
+
+
+class PythonTranspiler(Visitor):
+    """Gera o ast.Module de um programa (a AST já passou pelo semântico).
+    Comandos retornam listas de ast.stmt, expressões um ast.expr."""
+
+    def __init__(self, functions_ast):
+        self.functions_ast = functions_ast
+
+    def module(self):
+        # com nomes repetidos vale a última função, como no semântico
+        body = [self.function(func) for func in {f.name: f for f in self.functions_ast}.values()]
+        return ast.Module(body, [])
+
+    def function(self, func):
+        self.prelude = None     # comandos das temporárias, em forma linear
+        params = {name for name, _, _ in func.params}
+
+        body = []
+        for name, symbol in func.table.symbols.items():
+            if name not in params:
+                value = _at(ast.Constant(default_value(symbol.type)), func.line)
+                body.append(_at(ast.Assign([_name(_variable_name(name), func.line, True)], value), func.line))
+        body += self.visit(func.body)
+        default = _at(ast.Constant(default_value(func.return_type)), func.line)
+        body.append(_at(ast.Return(default), func.line))
+
+        args = ast.arguments(
+            posonlyargs=[],
+            args=[_at(ast.arg(_variable_name(name)), func.line) for name, _, _ in func.params],
+            kwonlyargs=[], kw_defaults=[], defaults=[]
+        )
+        return _at(ast.FunctionDef(_function_name(func.name), args, body, []), func.line)
+
+    def statement(self, expressions, build):
+        """Gera as expressões do comando (em forma linear se alguma for
+        profunda demais) e os comandos de 'build(valores)'"""
+        linear = any(too_deep(expr, MAX_NESTING) for expr in expressions)
+        self.prelude = [] if linear else None
+        self.live = 0
+        values = []
+        for expr in expressions:
+            values.append((yield expr))
+        prelude, self.prelude = self.prelude or [], None
+        return prelude + build(*values)
+
+    def value(self, node, line, operands):
+        """Resultado de uma operação sobre 'operands'; em forma linear, vai
+        para uma temporária. As temporárias são usadas como uma pilha: as
+        dos operandos ficam livres quando a operação as consome (uma cadeia
+        'a + b + c ...' inteira usa uma só)."""
+        _at(node, line)
+        if self.prelude is None:
+            return node
+        self.live -= sum(1 for operand in operands if getattr(operand, "temporary", False))
+        name = f"t{self.live}"
+        self.live += 1
+        self.prelude.append(_at(ast.Assign([_name(name, line, True)], node), line))
+        result = _name(name, line)
+        result.temporary = True
+        return result
+
+    # comandos
+
+    def visit_BlockNode(self, block):
+        body = []
+        for cmd in block.commands:
+            if isinstance(cmd, STATEMENTS):
+                body += yield cmd
+            elif isinstance(cmd, EXPRESSIONS):
+                body += yield from self.statement(
+                    [cmd], lambda value: [_at(ast.Expr(value), cmd.line)]
+                )
+        return body
+
+    def visit_AssignNode(self, cmd):
+        target = _variable_name(cmd.name)
+        return (yield from self.statement(
+            [cmd.expr], lambda value: [_at(ast.Assign([_name(target, cmd.line, True)], value), cmd.line)]
+        ))
+
+    def visit_PrintNode(self, cmd):
+        pieces, args = print_pieces(cmd)
+        line = cmd.line
+
+        def build(*values):
+            parts = []
+            for piece, value, arg in zip(pieces, values + (None,), args + [None]):
+                if piece:
+                    parts.append(_at(ast.Constant(piece), line))
+                if value is not None:
+                    if arg.type == "float":
+                        value = _call("_float", [value], line)
+                    parts.append(_at(ast.FormattedValue(value, -1, None), line))
+            text = _at(ast.JoinedStr(parts), line)
+            return [_at(ast.Expr(_call("_write", [text], line)), line)]
+
+        return (yield from self.statement(args, build))
+
+    def visit_ReturnNode(self, cmd):
+        return (yield from self.statement(
+            [cmd.expr], lambda value: [_at(ast.Return(value), cmd.line)]
+        ))
+
+    def visit_IfNode(self, cmd):
+        then_body = (yield cmd.then_body) or [_at(ast.Pass(), cmd.line)]
+        else_body = (yield cmd.else_body) if cmd.else_body is not None else []
+        return (yield from self.statement(
+            [cmd.cond],
+            lambda cond: [_at(ast.If(self.truth(cond), then_body, else_body), cmd.line)]
+        ))
+
+    def visit_WhileNode(self, cmd):
+        body = (yield cmd.body) or [_at(ast.Pass(), cmd.line)]
+        statements = yield from self.statement([cmd.cond], lambda cond: [cond])
+        *prelude, cond = statements
+        if not prelude:
+            return [_at(ast.While(self.truth(cond), body, []), cmd.line)]
+
+        # condição em forma linear: recalculada no começo de cada volta
+        stop = _at(ast.If(_at(ast.UnaryOp(ast.Not(), self.truth(cond)), cmd.line),
+                          [_at(ast.Break(), cmd.line)], []), cmd.line)
+        return [_at(ast.While(_at(ast.Constant(True), cmd.line), prelude + [stop] + body, []), cmd.line)]
+
+    @staticmethod
+    def truth(cond):
+        # '1 if a < b else 0' numa condição: basta a comparação
+        if isinstance(cond, ast.IfExp) and isinstance(cond.test, ast.Compare):
+            return cond.test
+        return cond
+
+    # expressões
+
+    def visit_VarNode(self, expr):
+        return _name(_variable_name(expr.name), expr.line)
+
+    def visit_IntConstNode(self, expr):
+        return _at(ast.Constant(expr.value), expr.line)
+
+    visit_FloatConstNode = visit_IntConstNode
+
+    def visit_CharConstNode(self, expr):
+        return _at(ast.Constant(decode_char(expr.value)), expr.line)
+
+    def visit_StringNode(self, expr):
+        return _at(ast.Constant(decode_string(expr.value)), expr.line)
+
+    def visit_BinaryOpNode(self, expr):
+        left = yield expr.left
+        right = yield expr.right
+        line = expr.line
+        if expr.op in ARITHMETIC:
+            return self.value(ast.BinOp(left, ARITHMETIC[expr.op](), right), line, (left, right))
+        if expr.op in COMPARISONS:
+            compare = _at(ast.Compare(left, [COMPARISONS[expr.op]()], [right]), line)
+            one, zero = _at(ast.Constant(1), line), _at(ast.Constant(0), line)
+            return self.value(ast.IfExp(compare, one, zero), line, (left, right))
+        if expr.left.type == "int":
+            return self.value(ast.Call(_name("_div", line), [left, right], []), line, (left, right))
+        return self.value(ast.BinOp(left, ast.Div(), right), line, (left, right))
+
+    def visit_UnaryOpNode(self, expr):
+        count = 0
+        node = expr
+        while isinstance(node, UnaryOpNode):
+            count += 1
+            node = node.expr
+        value = yield node
+        if count % 2 == 0:
+            return value
+        return self.value(ast.UnaryOp(ast.USub(), value), expr.line, (value,))
+
+    def visit_CallNode(self, expr):
+        args = []
+        for arg in expr.args:
+            args.append((yield arg))
+        return self.value(ast.Call(_name(_function_name(expr.name), expr.line), args, []), expr.line, args)
+
+    def generic_visit(self, node):
+        raise ExecutionError(
+            f"[ERRO DE EXECUÇÃO] Nó {type(node).__name__} não pode ser traduzido para Python"
+        )
+
+
+@contextlib.contextmanager
+def _without_gc():
+    # A árvore gerada (e a que o compile() monta a partir dela) não tem
+    # ciclos; com o coletor de lixo ligado, cada passada dele percorreria
+    # os nós já criados, e o tempo cresceria mais que linearmente com o
+    # tamanho do programa
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def python_module(functions_ast):
+    # todos os nós já saem com a linha (_at), sem ast.fix_missing_locations
+    check_types(functions_ast)
+    with _without_gc():
+        return PythonTranspiler(functions_ast).module()
+
+
+def compile_program(functions_ast, filename="<programa P>"):
+    """Code object do programa (define as funções p_<nome>)"""
+    check_types(functions_ast)
+    with _without_gc():
+        module = PythonTranspiler(functions_ast).module()
+        try:
+            return compile(module, filename, "exec")
+        except (SyntaxError, RecursionError, MemoryError) as erro:
+            raise ExecutionError(
+                f"[ERRO DE EXECUÇÃO] O programa não pôde ser compilado para Python: {erro}"
+            ) from None
+
+
+class PythonProgram:
+    """Programa P compilado para um code object do CPython"""
+
+    def __init__(self, code, out=None):
+        self.code = code
+        self.namespace = dict(HELPERS)
+        self.namespace["_write"] = (out if out is not None else sys.stdout).write
+        exec(code, self.namespace)
+
+    def run(self, entry="main"):
+        function = self.namespace.get(_function_name(entry))
+        if function is None:
+            raise ExecutionError(f"[ERRO DE EXECUÇÃO] Função '{entry}' não existe")
+        check_arguments(entry, function.__code__.co_argcount, 0)
+        try:
+            return function()
+        except ZeroDivisionError as erro:
+            raise ExecutionError(
+                f"[ERRO DE EXECUÇÃO] Divisão por zero (linha {self._line(erro)})"
+            ) from None
+        except RecursionError:
+            raise ExecutionError(
+                f"[ERRO DE EXECUÇÃO] Recursão profunda demais em '{entry}'"
+            ) from None
+
+    def _line(self, erro):
+        """Linha P do erro: a do último quadro que é código do programa"""
+        line = None
+        traceback = erro.__traceback__
+        while traceback is not None:
+            if traceback.tb_frame.f_code.co_filename == self.code.co_filename:
+                line = traceback.tb_lineno
+            traceback = traceback.tb_next
+        return line
+
+
+def carregar(caminho, cache=None, otimizar=False):
+    """Code object de um .p (compilado ou do cache); None se o .p tem erros.
+    'otimizar' passa o optimizer.py na AST."""
+    with open(caminho, 'rb') as f:
+        dados = f.read()
+
+    if cache is not None:
+        # o formato do marshal muda com a versão do Python
+        modulos = (sys.modules[__name__], runtime) + ((optimizer,) if otimizar else ())
+        chave = cache.chave(importlib.util.MAGIC_NUMBER + dados, modulos)
+        guardado = cache.obter(chave)
+        if guardado is not None:
+            return marshal.loads(guardado)
+
+    funcoes = load_program(caminho, otimizar)
+    if funcoes is None:
+        return None
+    code = compile_program(funcoes, caminho)
+    if cache is not None:
+        cache.guardar(chave, marshal.dumps(code))
+    return code
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Executa um programa P traduzido para Python")
+    parser.add_argument("arquivo", help="arquivo .p")
+    parser.add_argument("--cache", help="diretório do cache de code objects")
+    parser.add_argument("--fonte", action="store_true", help="mostra o Python gerado em vez de executar")
+    parser.add_argument("--tempo", action="store_true", help="mostra o tempo de execução")
+    parser.add_argument("--otimizar", action="store_true", help="passa o optimizer.py antes")
+    args = parser.parse_args()
+
+    try:
+        if args.fonte:
+            funcoes = load_program(args.arquivo, args.otimizar)
+            if funcoes is None:
+                sys.exit(1)
+            print(ast.unparse(python_module(funcoes)))
+            return
+
+        inicio = time.perf_counter()
+        cache = CacheCompilacao(args.cache) if args.cache else None
+        code = carregar(args.arquivo, cache, args.otimizar)
+        if code is None:
+            sys.exit(1)
+        program = PythonProgram(code)
+        carregado = time.perf_counter()
+        program.run()
+        fim = time.perf_counter()
+    except ExecutionError as erro:
+        print(erro, file=sys.stderr)
+        sys.exit(1)
+
+    if args.tempo:
+        print(f"carga {(carregado - inicio) * 1000:.2f} ms, "
+              f"execução {(fim - carregado) * 1000:.2f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
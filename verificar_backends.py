@@ -0,0 +1,161 @@
+# verificar_backends.py
+#
+# Roda programas P pelos quatro backends (interpreter.py, vm.py,
+# transpiler.py e cgen.py) e confere que todos escrevem a mesma saída e
+# param com o mesmo erro de execução. Cada caso é um programa pequeno com
+# a saída esperada, conferida com a AST do semântico e com a AST depois do
+# inliner.py; sem um compilador C, o cgen.py fica de fora.
+#
+#     python verificar_backends.py [--sem-c]
+
+import argparse
+import io
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import bytecode
+import cgen
+import transpiler
+from inliner import inline_calls
+from interpreter import Interpreter
+from pipeline import compilar_codigo
+from reserved_words import reserved_words
+from runtime import ExecutionError
+from vm import VM
+
+
+def funcoes_do_programa(codigo, preparar=None):
+    resultado = compilar_codigo(codigo)
+    assert not resultado.total_erros, f"o programa tem erros: {codigo!r}"
+    if preparar is not None:
+        preparar(resultado.funcoes)
+    return resultado.funcoes
+
+
+def _rodar(criar):
+    """Saída do programa, com o erro de execução (se houver) no fim"""
+    out = io.StringIO()
+    try:
+        criar(out).run()
+    except ExecutionError as erro:
+        out.write(f"{erro}\n")
+    return out.getvalue()
+
+
+def saida_interpreter(funcoes):
+    return _rodar(lambda out: Interpreter(funcoes, out))
+
+
+def saida_vm(funcoes):
+    return _rodar(lambda out: VM(bytecode.compile_program(funcoes), out))
+
+
+def saida_transpiler(funcoes):
+    return _rodar(lambda out: transpiler.PythonProgram(transpiler.compile_program(funcoes), out))
+
+
+def saida_cgen(funcoes):
+    with tempfile.TemporaryDirectory() as pasta:
+        executavel = os.path.join(pasta, "programa")
+        try:
+            cgen.build(cgen.c_source(funcoes), executavel)
+        except ExecutionError as erro:
+            return f"{erro}\n"
+        saida = subprocess.run([executavel], capture_output=True, text=True)
+        return saida.stdout + saida.stderr
+
+
+BACKENDS = {
+    "interpreter": saida_interpreter,
+    "vm": saida_vm,
+    "transpiler": saida_transpiler,
+    "cgen": saida_cgen,
+}
+
+# AST com que cada caso roda
+PREPARACOES = {
+    "semântico": None,
+    "inline": inline_calls,
+}
+
+
+def caso_nomes_do_preludio():
+    """Funções P com o nome de cada função de apoio do prelúdio do C"""
+    nomes = sorted(set(re.findall(r"\bprt_(\w+)", cgen.PRELUDE)) - set(reserved_words))
+    funcoes = "".join(
+        f"fn {nome}(a: int) -> int {{ return a + {i}; }}\n" for i, nome in enumerate(nomes)
+    )
+    chamadas = "".join(f'    println("{{}}", {nome}({i}));\n' for i, nome in enumerate(nomes))
+    esperado = "".join(f"{2 * i}\n" for i in range(len(nomes)))
+    return funcoes + "fn main() {\n" + chamadas + "}\n", esperado
+
+
+def caso_main_com_parametros():
+    """main é chamada sem argumentos: todos param com o mesmo erro"""
+    codigo = 'fn main(x: int) {\n    println("{}", x);\n}\n'
+    esperado = ("[ERRO DE EXECUÇÃO] Função 'main' tem 1 parâmetro(s) "
+                "e foi chamada com 0 argumento(s)\n")
+    return codigo, esperado
+
+
+def caso_inline_divisao_antes_da_chamada():
+    """A divisão do argumento para o programa antes do println de g"""
+    codigo = (
+        'fn g() -> int {\n    println("g");\n    return 1;\n}\n'
+        'fn f(a: int) -> int { return g() + a; }\n'
+        'fn main() {\n    let z: int;\n    z = 0;\n    println("{}", f(5 / z));\n}\n'
+    )
+    return codigo, "[ERRO DE EXECUÇÃO] Divisão por zero (linha 9)\n"
+
+
+def caso_inline_argumento_sem_uso():
+    """O argumento de um parâmetro que não é usado ainda é calculado"""
+    codigo = (
+        'fn k(a: int) -> int { return 7; }\n'
+        'fn main() {\n    let z: int;\n    z = 0;\n    println("{}", k(1 / z));\n}\n'
+    )
+    return codigo, "[ERRO DE EXECUÇÃO] Divisão por zero (linha 5)\n"
+
+
+CASOS = {
+    "nomes do prelúdio do C": caso_nomes_do_preludio,
+    "main com parâmetros": caso_main_com_parametros,
+    "inline: divisão antes da chamada": caso_inline_divisao_antes_da_chamada,
+    "inline: argumento sem uso": caso_inline_argumento_sem_uso,
+}
+
+
+def verificar(backends):
+    falhas = 0
+    for nome, caso in CASOS.items():
+        codigo, esperado = caso()
+        for backend in backends:
+            for preparacao, preparar in PREPARACOES.items():
+                obtido = BACKENDS[backend](funcoes_do_programa(codigo, preparar))
+                if obtido != esperado:
+                    falhas += 1
+                    print(f"FALHOU: {nome} ({backend}, {preparacao}): "
+                          f"esperado {esperado!r}, obtido {obtido!r}", file=sys.stderr)
+    return falhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Confere os backends contra a saída esperada")
+    parser.add_argument("--sem-c", action="store_true", help="não roda o cgen.py")
+    args = parser.parse_args()
+
+    backends = list(BACKENDS)
+    if args.sem_c or shutil.which(cgen.CC) is None:
+        backends.remove("cgen")
+    falhas = verificar(backends)
+    if falhas:
+        sys.exit(1)
+    print(f"{len(CASOS)} casos ok em {', '.join(backends)}")
+
+
+if __name__ == "__main__":
+    main()
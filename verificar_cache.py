@@ -0,0 +1,65 @@
+# verificar_cache.py
+#
+# Confere que a chave do cache (cache.py) muda quando o código-fonte de
+# qualquer módulo da impressão digital do compilador muda: cada módulo é
+# trocado, um de cada vez, por uma cópia com uma linha a mais, e a chave do
+# mesmo .p tem que sair diferente. Também confere que os módulos que
+# definem o que vai para o cache (o pipeline.py e o tabela_interna.py, que
+# vai no pickle do BufferTokens) estão na impressão digital.
+#
+#     python verificar_cache.py
+
+import os
+import shutil
+import sys
+import tempfile
+
+import cache
+
+OBRIGATORIOS = ("pipeline", "tabela_interna", "buffer_tokens", "arena_ast")
+
+
+def chave(compilacao, dados):
+    """Chave de 'dados' com a impressão digital calculada de novo"""
+    cache._impressao = None
+    return compilacao.chave(dados)
+
+
+def verificar_modulos():
+    nomes = {modulo.__name__ for modulo in cache.modulos_compilador()}
+    faltando = [nome for nome in OBRIGATORIOS if nome not in nomes]
+    assert not faltando, f"fora da impressão digital: {', '.join(faltando)}"
+
+
+def verificar_invalidacao():
+    dados = b"fn main() { println(\"{}\", 1); }\n"
+    with tempfile.TemporaryDirectory() as pasta:
+        compilacao = cache.CacheCompilacao(os.path.join(pasta, "cache"))
+        original = chave(compilacao, dados)
+        for modulo in cache.modulos_compilador():
+            arquivo = modulo.__file__
+            copia = os.path.join(pasta, os.path.basename(arquivo))
+            shutil.copyfile(arquivo, copia)
+            with open(copia, "a", encoding="utf-8") as f:
+                f.write("\n# mudou\n")
+            modulo.__file__ = copia
+            try:
+                assert chave(compilacao, dados) != original, \
+                    f"mudar {modulo.__name__}.py não mudou a chave"
+            finally:
+                modulo.__file__ = arquivo
+        assert chave(compilacao, dados) == original, "a chave mudou sem nenhuma mudança"
+    return len(cache.modulos_compilador())
+
+
+def main():
+    try:
+        verificar_modulos()
+        print(f"{verificar_invalidacao()} módulos ok")
+    except AssertionError as erro:
+        print(f"FALHOU: {erro}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
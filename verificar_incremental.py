@@ -0,0 +1,147 @@
+# verificar_incremental.py
+#
+# Confere os caminhos incrementais contra o pipeline completo, com edições
+# aleatórias (reproduzíveis pela semente): depois de cada edição, o
+# resultado incremental tem que ser igual ao de analisar o texto inteiro
+# do zero.
+#
+#   - relexar (buffer_tokens.py): tokens (tipo, lexema, linha, posições),
+#     erros léxicos e lexemas das tabelas iguais aos de analisar_para_buffer,
+#     sem alterar o buffer antigo;
+#   - Documento (incremental.py): erros sintáticos, tabelas de símbolos,
+#     AST (com os tipos) e erros semânticos iguais aos de Parser +
+#     SemanticAnalyzer sobre o texto inteiro.
+#
+#     python verificar_incremental.py [--edicoes 3000] [--semente 1]
+
+import argparse
+import os
+import random
+import sys
+
+from buffer_tokens import analisar_para_buffer, relexar
+from incremental import Documento
+from main2 import Parser
+from main_semantico import ast_to_dict
+from semantic import SemanticAnalyzer
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+# texto de partida: os exemplos do repositório, mais tokens que cruzam linhas
+EXEMPLOS = ("soma.p", "media.p", "loop_simples.p", "calculadora.p", "lexical_error.p")
+EXTRA = '\n"str\ning" \'a\' 12.5 x1 != -> ==\n'
+
+# o texto reinicia quando passa deste tamanho (as edições só acrescentam)
+TAMANHO_MAXIMO = 4000
+
+
+def texto_base():
+    partes = []
+    for nome in EXEMPLOS:
+        with open(os.path.join(DIRETORIO, nome), encoding="utf-8") as f:
+            partes.append(f.read())
+    return "\n".join(partes) + EXTRA
+
+
+def edicao_aleatoria(rnd, fonte, pedacos):
+    """(posição, removidos, inseridos) de uma edição pequena"""
+    posicao = rnd.randint(0, len(fonte))
+    removidos = rnd.randint(0, min(4, len(fonte) - posicao))
+    inseridos = "".join(rnd.choice(pedacos) for _ in range(rnd.randint(0, 3)))
+    return posicao, removidos, inseridos
+
+
+def _tokens(buffer):
+    return [
+        (buffer.tipo(i), buffer.lexema(i), buffer.linha(i), buffer.inicios[i], buffer.fins[i])
+        for i in range(len(buffer))
+    ]
+
+
+def _lexemas_tabelados(buffer):
+    """Lexema que o índice de cada token aponta na tabela do seu tipo"""
+    return [list(tabela) for tabela in buffer.tabelas.values()], [
+        buffer.tabelas[buffer.tipo(i)][buffer.indices[i]] if buffer.indices[i] >= 0 else None
+        for i in range(len(buffer))
+    ]
+
+
+def verificar_relexar(edicoes, semente):
+    rnd = random.Random(semente)
+    base = texto_base()
+    pedacos = list('ab1 .\n"\'=!<>-{}();:,+*/$é')
+    buffer, _ = analisar_para_buffer(base)
+
+    for n in range(edicoes):
+        posicao, removidos, inseridos = edicao_aleatoria(rnd, buffer.fonte, pedacos)
+        antes = _tokens(buffer), _lexemas_tabelados(buffer)
+
+        novo, _, _, _ = relexar(buffer, posicao, removidos, inseridos)
+        completo, _ = analisar_para_buffer(novo.fonte)
+
+        contexto = f"edição {n}: ({posicao}, {removidos}, {inseridos!r})"
+        assert _tokens(novo) == _tokens(completo), f"tokens diferentes na {contexto}"
+        assert novo.erros() == completo.erros(), f"erros léxicos diferentes na {contexto}"
+        assert _lexemas_tabelados(novo)[1] == _lexemas_tabelados(completo)[1], \
+            f"tabelas diferentes na {contexto}"
+        assert (_tokens(buffer), _lexemas_tabelados(buffer)) == antes, \
+            f"o buffer antigo mudou na {contexto}"
+
+        buffer = novo
+        if len(buffer.fonte) > TAMANHO_MAXIMO:
+            buffer, _ = analisar_para_buffer(base)
+    return edicoes
+
+
+def _analise(erros_sintaticos, tabelas, funcoes, erros_semanticos):
+    """Resultado da análise em forma comparável"""
+    return (erros_sintaticos, [tabela.to_dict() for tabela in tabelas],
+            [ast_to_dict(func) for func in funcoes], erros_semanticos)
+
+
+def analise_completa(codigo):
+    tokens, _ = analisar_para_buffer(codigo)
+    erros_sintaticos, tabelas, funcoes = Parser(tokens).parse()
+    erros_semanticos = SemanticAnalyzer(funcoes).analyze()
+    return _analise(erros_sintaticos, tabelas, funcoes, erros_semanticos)
+
+
+def verificar_analise(edicoes, semente):
+    rnd = random.Random(semente)
+    base = texto_base()
+    # pedaços que abrem e fecham funções, blocos e declarações
+    pedacos = ["a", " ", "\n", "1", "fn x(){", "}", "{", ";", "let q: int;", "=", "(", ")", ","]
+    documento = Documento(base)
+    assert _analise(*documento.resultado) == analise_completa(base), "análise inicial diferente"
+
+    for n in range(edicoes):
+        fonte = documento.codigo
+        posicao = rnd.randint(0, len(fonte))
+        removidos = rnd.randint(0, min(3, len(fonte) - posicao))
+        inseridos = rnd.choice(pedacos) if rnd.random() < 0.8 else ""
+
+        resultado = documento.editar(posicao, removidos, inseridos)
+        assert _analise(*resultado) == analise_completa(documento.codigo), \
+            f"análise diferente na edição {n}: ({posicao}, {removidos}, {inseridos!r})"
+
+        if len(documento.codigo) > TAMANHO_MAXIMO:
+            documento = Documento(base)
+    return edicoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Confere a análise incremental contra a completa")
+    parser.add_argument("--edicoes", type=int, default=3000, help="edições aleatórias por verificação")
+    parser.add_argument("--semente", type=int, default=1, help="semente das edições")
+    args = parser.parse_args()
+
+    try:
+        print(f"relexar: {verificar_relexar(args.edicoes, args.semente)} edições ok")
+        print(f"análise: {verificar_analise(args.edicoes, args.semente)} edições ok")
+    except AssertionError as erro:
+        print(f"FALHOU: {erro}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# visitor.py
+#
+# Base dos passos sobre a AST (semântico, serialização, otimizações).
+#
+# visit(no) chama o método visit_<Classe> do passo, procurando pela MRO da
+# classe do nó (visit_ASTNode pega qualquer nó, visit_object qualquer
+# valor); sem nenhum, cai em generic_visit. Os ganchos opcionais
+# enter_<Classe>(no) e leave_<Classe>(no, resultado) rodam antes e depois
+# (o retorno de leave_ substitui o resultado).
+#
+# O handler de cada classe é montado uma vez, na primeira vez que ela
+# aparece, e fica num dict da classe do passo: despachar um nó é uma busca
+# nesse dict.
+#
+# Sem recursão: um handler escrito como gerador pede a visita de um filho
+# com 'yield filho' e recebe o resultado de volta,
+#
+#     def visit_BinaryOpNode(self, no):
+#         esquerda = yield no.left
+#         direita = yield no.right
+#         return ...
+#
+# e visit() executa esses geradores com uma pilha explícita, então a
+# profundidade da árvore não esbarra no limite de recursão do Python.
+# Handlers comuns (que não são geradores) continuam funcionando.
+
+from inspect import isgeneratorfunction
+
+from p_ast import ASTNode
+
+
+class Visitor:
+    _handlers = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._handlers = {}  # classe do nó -> (função(self, no), é gerador)
+
+    def visit(self, node):
+        handlers = self._handlers
+        stack = []  # geradores esperando o resultado de um filho
+
+        while True:
+            entry = handlers.get(node.__class__)
+            if entry is None:
+                entry = self._resolve(node.__class__)
+            handler, generator = entry
+
+            if generator:
+                gen = handler(self, node)
+                try:
+                    node = gen.send(None)
+                    stack.append(gen)
+                    continue
+                except StopIteration as stop:
+                    result = stop.value
+            else:
+                result = handler(self, node)
+
+            # devolve o resultado ao pai até algum pedir outro filho
+            while stack:
+                try:
+                    node = stack[-1].send(result)
+                    break
+                except StopIteration as stop:
+                    stack.pop()
+                    result = stop.value
+            else:
+                return result
+
+    @classmethod
+    def _resolve(cls, node_class):
+        visit = enter = leave = None
+        for klass in node_class.__mro__:
+            name = klass.__name__
+            visit = visit or getattr(cls, "visit_" + name, None)
+            enter = enter or getattr(cls, "enter_" + name, None)
+            leave = leave or getattr(cls, "leave_" + name, None)
+        visit = visit or cls.generic_visit
+        generator = isgeneratorfunction(visit)
+
+        handler = visit
+        if (enter or leave) and generator:
+            def handler(self, node):
+                if enter:
+                    enter(self, node)
+                result = yield from visit(self, node)
+                if leave:
+                    result = leave(self, node, result)
+                return result
+        elif enter or leave:
+            def handler(self, node):
+                if enter:
+                    enter(self, node)
+                result = visit(self, node)
+                if leave:
+                    result = leave(self, node, result)
+                return result
+
+        cls._handlers[node_class] = (handler, generator)
+        return cls._handlers[node_class]
+
+    def generic_visit(self, node):
+        """Visita os filhos de um nó (atributos que são nós ou listas)"""
+        if isinstance(node, ASTNode):
+            for _, value in node.fields():
+                if isinstance(value, list):
+                    for item in value:
+                        yield item
+                elif isinstance(value, ASTNode):
+                    yield value
+        return None
+
+
+class Transformer(Visitor):
+    """Visitor que pode trocar nós: o retorno de cada visit_ substitui o nó
+    visitado (None remove o nó de uma lista). Por padrão os nós são
+    mantidos e só os filhos são visitados."""
+
+    def generic_visit(self, node):
+        if not isinstance(node, ASTNode):
+            return node
+
+        for name, value in node.fields():
+            if isinstance(value, list):
+                new = []
+                for item in value:
+                    if isinstance(item, ASTNode):
+                        item = yield item
+                    if item is not None:
+                        new.append(item)
+                value[:] = new
+            elif isinstance(value, ASTNode):
+                setattr(node, name, (yield value))
+        return node
@@ -0,0 +1,336 @@
+# vm.py
+#
+# Máquina de pilha que executa o bytecode de bytecode.py. Uma pilha de
+# valores só, compartilhada pelas chamadas, e uma pilha de quadros
+# (função, posição, locais) para CALL e RETURN: chamadas P não viram
+# chamadas Python, então a profundidade da recursão só é limitada por
+# MAX_CALL_DEPTH.
+#
+# O laço de despacho trabalha com o bytecode já decodificado (uma lista de
+# opcodes e outra de argumentos por função, montadas uma vez ao carregar) e
+# testa os opcodes na ordem de frequência. Ao carregar, as sequências mais
+# comuns nos laços viram superinstruções (só na memória; o bytecode salvo
+# não muda): 'i = i + 1' ou 'while i < n' passam a ser um despacho só. A
+# superinstrução fica na posição da primeira instrução da sequência e
+# continua depois da última, então os destinos de desvio não mudam.
+#
+#     python vm.py programa.p [--cache DIR] [--salvar programa.pbc] [--tempo]
+#     python vm.py programa.pbc            roda o bytecode salvo
+#     python vm.py programa.p --dis        mostra o bytecode
+
+import argparse
+import sys
+import time
+
+import bytecode
+from bytecode import (
+    LOAD_LOCAL, LOAD_CONST, STORE_LOCAL, BINARY, BINARY_LOCAL, BINARY_CONST,
+    JUMP_UNLESS, JUMP_WHEN, POP_JUMP_IF_FALSE, POP_JUMP_IF_TRUE, JUMP, CALL,
+    RETURN_VALUE, RETURN_DEFAULT, PRINT, NEGATE, POP,
+    BINARY_FUNCTIONS, COMPARE, Program, compile_program, decode
+)
+from cache import CacheCompilacao
+import optimizer
+import runtime
+from runtime import ExecutionError, check_arguments, default_value, formatter, load_program
+
+MAX_CALL_DEPTH = 1_000_000
+
+# superinstruções (argumento: tupla com os operandos e, no fim, a posição
+# seguinte à sequência)
+(
+    LOCAL_BINARY_CONST,         # push f(local a, k)
+    LOCAL_BINARY_LOCAL,         # push f(local a, local b)
+    LOCAL_BINARY_CONST_STORE,   # local d = f(local a, k)
+    LOCAL_BINARY_LOCAL_STORE,   # local d = f(local a, local b)
+    BINARY_STORE,               # local d = f(a, b)
+    BINARY_CONST_STORE,         # local d = f(a, k)
+    BINARY_LOCAL_STORE,         # local d = f(a, local b)
+    LOCALS_JUMP_WHEN,           # desvia se compare(local a, local b)
+    LOCALS_JUMP_UNLESS,
+    LOCAL_CONST_JUMP_WHEN,      # desvia se compare(local a, k)
+    LOCAL_CONST_JUMP_UNLESS,
+) = range(32, 43)
+
+FUSED = LOCAL_BINARY_CONST
+
+
+def _text(value):
+    return value
+
+
+class LoadedFunction:
+    """FunctionCode pronta para executar"""
+
+    def __init__(self, code):
+        self.code = code
+        self.name = code.name
+        self.n_params = code.n_params
+        self.template = [default_value(t) for t in code.local_types]
+        self.default = default_value(code.return_type)
+        self.ops, self.args = decode(code.code)
+        self.consts = [self._prepare(value) for value in code.consts]
+        self._fuse()
+
+    @staticmethod
+    def _prepare(value):
+        # println: (textos, tipos) -> (textos, conversões para texto)
+        if isinstance(value, tuple):
+            pieces, types = value
+            return pieces, [formatter(t) or _text for t in types]
+        return value
+
+    def _fuse(self):
+        ops, args, consts = self.ops, self.args, self.consts
+        fused_ops, fused_args = ops[:], args[:]
+        n = len(ops)
+        for i in range(n):
+            op, arg = ops[i], args[i]
+            op2 = ops[i + 1] if i + 1 < n else None
+            op3 = ops[i + 2] if i + 2 < n else None
+            arg2 = args[i + 1] if i + 1 < n else None
+            arg3 = args[i + 2] if i + 2 < n else None
+
+            if op == LOAD_LOCAL and op2 in (BINARY_CONST, BINARY_LOCAL):
+                f = BINARY_FUNCTIONS[arg2 & 15]
+                b = consts[arg2 >> 4] if op2 == BINARY_CONST else arg2 >> 4
+                if op3 == STORE_LOCAL:
+                    new = (LOCAL_BINARY_CONST_STORE if op2 == BINARY_CONST
+                           else LOCAL_BINARY_LOCAL_STORE), (arg, f, b, arg3, i + 3)
+                else:
+                    new = (LOCAL_BINARY_CONST if op2 == BINARY_CONST
+                           else LOCAL_BINARY_LOCAL), (arg, f, b, i + 2)
+            elif op == LOAD_LOCAL and op2 in (LOAD_LOCAL, LOAD_CONST) and op3 in (JUMP_WHEN, JUMP_UNLESS):
+                compare = COMPARE[arg3 & 7]
+                if op2 == LOAD_LOCAL:
+                    fused = LOCALS_JUMP_WHEN if op3 == JUMP_WHEN else LOCALS_JUMP_UNLESS
+                    b = arg2
+                else:
+                    fused = LOCAL_CONST_JUMP_WHEN if op3 == JUMP_WHEN else LOCAL_CONST_JUMP_UNLESS
+                    b = consts[arg2]
+                new = fused, (arg, b, compare, arg3 >> 3, i + 3)
+            elif op in (BINARY, BINARY_CONST, BINARY_LOCAL) and op2 == STORE_LOCAL:
+                if op == BINARY:
+                    new = BINARY_STORE, (BINARY_FUNCTIONS[arg], arg2, i + 2)
+                else:
+                    b = consts[arg >> 4] if op == BINARY_CONST else arg >> 4
+                    new = (BINARY_CONST_STORE if op == BINARY_CONST
+                           else BINARY_LOCAL_STORE), (BINARY_FUNCTIONS[arg & 15], b, arg2, i + 2)
+            else:
+                continue
+            fused_ops[i], fused_args[i] = new
+        self.ops, self.args = fused_ops, fused_args
+
+
+class VM:
+    def __init__(self, program, out=None):
+        self.program = program
+        self.functions = [LoadedFunction(code) for code in program.functions]
+        self.write = (out if out is not None else sys.stdout).write
+
+    def run(self, entry="main"):
+        if entry not in self.program.index:
+            raise ExecutionError(f"[ERRO DE EXECUÇÃO] Função '{entry}' não existe")
+        index = self.program.index[entry]
+        check_arguments(entry, self.functions[index].n_params, 0)
+        return self.call(index, [])
+
+    def call(self, index, arguments):
+        """Executa a função 'index' com os argumentos e retorna o valor"""
+        functions = self.functions
+        write = self.write
+        binary = BINARY_FUNCTIONS
+        compare = COMPARE
+
+        function = functions[index]
+        ops, args, consts = function.ops, function.args, function.consts
+        local = function.template[:]
+        local[:len(arguments)] = arguments
+        frames = []
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+
+        try:
+            while True:
+                op = ops[pc]
+                arg = args[pc]
+                pc += 1
+
+                if op == LOCAL_BINARY_CONST_STORE:
+                    a, f, b, d, pc = arg
+                    local[d] = f(local[a], b)
+                elif op == LOCAL_CONST_JUMP_WHEN:
+                    a, b, f, target, pc = arg
+                    if f(local[a], b):
+                        pc = target
+                elif op == LOCALS_JUMP_WHEN:
+                    a, b, f, target, pc = arg
+                    if f(local[a], local[b]):
+                        pc = target
+                elif op == LOCAL_BINARY_CONST:
+                    a, f, b, pc = arg
+                    push(f(local[a], b))
+                elif op == LOCAL_BINARY_LOCAL_STORE:
+                    a, f, b, d, pc = arg
+                    local[d] = f(local[a], local[b])
+                elif op == BINARY_STORE:
+                    f, d, pc = arg
+                    b = pop()
+                    local[d] = f(pop(), b)
+                elif op == LOAD_LOCAL:
+                    push(local[arg])
+                elif op == BINARY_CONST:
+                    stack[-1] = binary[arg & 15](stack[-1], consts[arg >> 4])
+                elif op == STORE_LOCAL:
+                    local[arg] = pop()
+                elif op == BINARY_LOCAL:
+                    stack[-1] = binary[arg & 15](stack[-1], local[arg >> 4])
+                elif op == LOAD_CONST:
+                    push(consts[arg])
+                elif op == JUMP_WHEN:
+                    b = pop()
+                    if compare[arg & 7](pop(), b):
+                        pc = arg >> 3
+                elif op == JUMP_UNLESS:
+                    b = pop()
+                    if not compare[arg & 7](pop(), b):
+                        pc = arg >> 3
+                elif op == BINARY:
+                    b = pop()
+                    stack[-1] = binary[arg](stack[-1], b)
+                elif op == JUMP:
+                    pc = arg
+                elif op == CALL:
+                    if len(frames) >= MAX_CALL_DEPTH:
+                        raise ExecutionError(
+                            f"[ERRO DE EXECUÇÃO] Recursão profunda demais em '{functions[arg].name}'"
+                        )
+                    frames.append((function, pc, local))
+                    function = functions[arg]
+                    ops, args, consts = function.ops, function.args, function.consts
+                    local = function.template[:]
+                    n = function.n_params
+                    if n:
+                        local[:n] = stack[-n:]
+                        del stack[-n:]
+                    pc = 0
+                elif op == RETURN_VALUE or op == RETURN_DEFAULT:
+                    if op == RETURN_DEFAULT:
+                        push(function.default)
+                    if not frames:
+                        return pop()
+                    # o valor fica na pilha para quem chamou
+                    function, pc, local = frames.pop()
+                    ops, args, consts = function.ops, function.args, function.consts
+                elif op == POP_JUMP_IF_FALSE:
+                    if not pop():
+                        pc = arg
+                elif op == POP_JUMP_IF_TRUE:
+                    if pop():
+                        pc = arg
+                elif op == PRINT:
+                    pieces, formats = consts[arg]
+                    n = len(formats)
+                    if n:
+                        values = stack[-n:]
+                        del stack[-n:]
+                        parts = [pieces[0]]
+                        for fmt, value, piece in zip(formats, values, pieces[1:]):
+                            parts.append(fmt(value))
+                            parts.append(piece)
+                        write("".join(parts))
+                    else:
+                        write(pieces[0])
+                elif op == NEGATE:
+                    stack[-1] = -stack[-1]
+                elif op == POP:
+                    pop()
+                elif op == LOCAL_BINARY_LOCAL:
+                    a, f, b, pc = arg
+                    push(f(local[a], local[b]))
+                elif op == BINARY_CONST_STORE:
+                    f, b, d, pc = arg
+                    local[d] = f(pop(), b)
+                elif op == BINARY_LOCAL_STORE:
+                    f, b, d, pc = arg
+                    local[d] = f(pop(), local[b])
+                elif op == LOCAL_CONST_JUMP_UNLESS:
+                    a, b, f, target, pc = arg
+                    if not f(local[a], b):
+                        pc = target
+                elif op == LOCALS_JUMP_UNLESS:
+                    a, b, f, target, pc = arg
+                    if not f(local[a], local[b]):
+                        pc = target
+                else:
+                    raise ExecutionError(f"[ERRO DE EXECUÇÃO] Opcode inválido {op} em '{function.name}'")
+        except ZeroDivisionError:
+            # numa superinstrução, a divisão é a última da sequência
+            index = arg[-1] - 1 if op >= FUSED else pc - 1
+            line = function.code.line_at(index)
+            raise ExecutionError(f"[ERRO DE EXECUÇÃO] Divisão por zero (linha {line})") from None
+
+
+def carregar(caminho, cache=None, otimizar=False):
+    """Program de um .p (compilado, ou do cache) ou de um .pbc salvo;
+    None se o .p tem erros. 'otimizar' passa o optimizer.py na AST."""
+    with open(caminho, 'rb') as f:
+        dados = f.read()
+    if caminho.endswith(".pbc"):
+        return Program.from_bytes(dados)
+
+    if cache is not None:
+        chave = cache.chave(dados, (bytecode, runtime) + ((optimizer,) if otimizar else ()))
+        program = cache.obter(chave)
+        if program is not None:
+            return program
+
+    funcoes = load_program(caminho, otimizar)
+    if funcoes is None:
+        return None
+    program = compile_program(funcoes)
+    if cache is not None:
+        cache.guardar(chave, program)
+    return program
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Executa um programa P na máquina de pilha")
+    parser.add_argument("arquivo", help="arquivo .p, ou .pbc salvo com --salvar")
+    parser.add_argument("--cache", help="diretório do cache de bytecode")
+    parser.add_argument("--salvar", metavar="ARQUIVO", help="grava o bytecode (.pbc)")
+    parser.add_argument("--dis", action="store_true", help="mostra o bytecode em vez de executar")
+    parser.add_argument("--tempo", action="store_true", help="mostra o tempo de execução")
+    parser.add_argument("--otimizar", action="store_true", help="passa o optimizer.py antes")
+    args = parser.parse_args()
+
+    try:
+        inicio = time.perf_counter()
+        cache = CacheCompilacao(args.cache) if args.cache else None
+        program = carregar(args.arquivo, cache, args.otimizar)
+        if program is None:
+            sys.exit(1)
+        if args.salvar:
+            with open(args.salvar, 'wb') as f:
+                f.write(program.to_bytes())
+        if args.dis:
+            print(program.disassemble())
+            return
+
+        vm = VM(program)
+        carregado = time.perf_counter()
+        vm.run()
+        fim = time.perf_counter()
+    except ExecutionError as erro:
+        print(erro, file=sys.stderr)
+        sys.exit(1)
+
+    if args.tempo:
+        print(f"carga {(carregado - inicio) * 1000:.2f} ms, "
+              f"execução {(fim - carregado) * 1000:.2f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()